@@ -16,6 +16,7 @@ CREATE TABLE Place (
     price DECIMAL(10, 2),
     latitude FLOAT,
     longitude FLOAT,
+    geo_cell INTEGER, -- grid cell of (latitude, longitude), see app/services/geo.py
     owner_id CHAR(36) NOT NULL,
     FOREIGN KEY (owner_id) REFERENCES User(id) ON DELETE CASCADE
 );
@@ -47,6 +48,28 @@ CREATE TABLE Place_Amenity (
     FOREIGN KEY (amenity_id) REFERENCES Amenity(id) ON DELETE CASCADE
 );
 
+-- Change counters of the catalogs cached by the workers
+CREATE TABLE Catalog_Versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version INT NOT NULL DEFAULT 0,
+    stamp VARCHAR(32) NOT NULL
+);
+
+-- Indexes used by the place search filters
+CREATE INDEX idx_place_price ON Place (price);
+CREATE INDEX idx_place_amenity_amenity_id ON Place_Amenity (amenity_id);
+
+-- Places of one owner
+CREATE INDEX idx_place_owner_id ON Place (owner_id);
+
+-- Spatial index used by the bounding box search
+CREATE INDEX idx_place_geo_cell ON Place (geo_cell);
+
+-- Per-place review listings
+CREATE INDEX idx_review_place_id ON Review (place_id);
+CREATE INDEX idx_review_place_id_rating ON Review (place_id, rating);
+CREATE INDEX idx_review_user_id ON Review (user_id);
+
 -- Insert Administrator User
 INSERT INTO User (id, first_name, last_name, email, password, is_admin) 
 VALUES (
@@ -1,4 +1,5 @@
 # __init__.py
+import os
 from config import config
 from flask import Flask, redirect, url_for
 from flask_restx import Api
@@ -11,6 +12,10 @@ from app.api.v1.routes_login import api as auth_ns
 from app.api.v1.routes_FrontEnd import home_bp
 
 from app.services.facade import HBnBFacade
+from app.cache.sqlite_store import SQLiteStore
+from app.cache.tiered import TieredCache
+from app.services.amenity_catalog import AmenityCatalog
+from app.persistence import caching_repository, unit_of_work
 from app.extensions import bcrypt, jwt, db, migrate
 
 
@@ -23,8 +28,38 @@ def create_app(config_class="config.DevelopmentConfig"):
     jwt.init_app(app)
     migrate.init_app(app, db) 
 
-    facade = HBnBFacade() # type: ignore
+    response_cache = app.config.get('RESPONSE_CACHE')
+    response_store = None
+    if response_cache:
+        path = response_cache.get('path') or os.path.join(app.instance_path, 'response_cache.sqlite3')
+        response_store = SQLiteStore(path, max_entries=response_cache.get('max_entries'),
+                                     purge_every=response_cache.get('purge_every', 100))
+    app.extensions['RESPONSE_CACHE'] = response_store
+
+    catalog_settings = app.config.get('AMENITY_CATALOG')
+    amenity_catalog = None
+    if catalog_settings:
+        path = catalog_settings.get('path') or os.path.join(app.instance_path, 'amenity_catalog.bin')
+        amenity_catalog = AmenityCatalog(path, catalog_settings.get('check_interval', 1.0))
+
+    tiered_settings = app.config.get('TIERED_CACHE')
+    tiered_cache = None
+    if tiered_settings:
+        path = tiered_settings.get('path') or os.path.join(app.instance_path, 'tiered_cache.sqlite3')
+        l2 = SQLiteStore(path, max_entries=tiered_settings.get('max_entries'),
+                         purge_every=tiered_settings.get('purge_every', 100))
+        tiered_cache = TieredCache(l2, tiered_settings.get('l1_size', 1024),
+                                   tiered_settings.get('l1_ttl', 5), tiered_settings.get('ttl', 300))
+    app.extensions['TIERED_CACHE'] = tiered_cache
+
+    facade = HBnBFacade(app.config.get('REPOSITORY_CACHE'), response_store,
+                        app.config.get('EMAIL_BLOOM_FILTER'), amenity_catalog, tiered_cache) # type: ignore
     app.extensions['FACADE'] = facade
+    app.teardown_request(facade.clear_identity_map)
+    # One commit per request, the facade writes only flush
+    unit_of_work.init_app(app)
+    # Writes check existence and ownership against the database, not this worker's caches
+    caching_repository.init_app(app)
 
     # Register the blueprints
     app.register_blueprint(home_bp, url_prefix="/HBnB")
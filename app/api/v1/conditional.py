@@ -0,0 +1,61 @@
+"""
+Conditional GET helpers: strong ETags, Last-Modified and 304 responses
+"""
+
+import hashlib
+from datetime import timezone
+from flask import request
+from werkzeug.http import http_date
+
+
+def make_etag(*parts):
+    """Build a strong ETag from the values the response depends on, and the query string"""
+    digest = hashlib.sha1(repr((request.path, request.query_string, parts)).encode()).hexdigest()
+    return digest
+
+
+def entity_validators(*objects):
+    """Return the (etag, last_modified) pair of a response built from the given objects"""
+    present = [obj for obj in objects if obj is not None]
+    timestamps = [obj.updated_at for obj in present if obj.updated_at]
+    etag = make_etag(*[(obj.id, obj.updated_at.isoformat() if obj.updated_at else None) for obj in present])
+    return etag, max(timestamps) if timestamps else None
+
+
+def collection_validators(version, *extra):
+    """
+    Return the (etag, last_modified) pair of a collection from its (count, max updated_at) version.
+    Deleting a row does not move max(updated_at), so collections only get an ETag (the count
+    changes) and last_modified is always None
+    """
+    count, updated_at = version
+    etag = make_etag(count, updated_at.isoformat() if updated_at else None, *extra)
+    return etag, None
+
+
+def _utc(value):
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def not_modified(etag, last_modified):
+    """Return a 304 response when the client copy is still current, otherwise None"""
+    headers = cache_headers(etag, last_modified)
+    if request.if_none_match:
+        if request.if_none_match.contains(etag):
+            return None, 304, headers
+        return None
+    if request.if_modified_since and last_modified is not None:
+        # HTTP dates only carry whole seconds
+        if _utc(last_modified).replace(microsecond=0) <= request.if_modified_since:
+            return None, 304, headers
+    return None
+
+
+def cache_headers(etag, last_modified):
+    """Validator headers sent along with a 200 or 304 response"""
+    headers = {'ETag': f'"{etag}"', 'Cache-Control': 'no-cache'}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(_utc(last_modified))
+    return headers
@@ -0,0 +1,36 @@
+"""
+Query string helpers shared by the collection endpoints
+"""
+
+from flask import current_app, request
+from app.persistence.repository import DEFAULT_ORDER, decode_cursor
+
+page_params = {
+    'limit': {'description': 'Maximum number of items to return', 'in': 'query', 'type': 'integer'},
+    'cursor': {'description': 'Opaque token returned as next_cursor by the previous page', 'in': 'query', 'type': 'string'}
+}
+
+
+def is_paginated():
+    """Collections keep returning a plain list unless the client asks for a page"""
+    return 'limit' in request.args or 'cursor' in request.args
+
+
+def parse_page_args(order=DEFAULT_ORDER):
+    """
+    Return the (limit, cursor) pair of the current request, raise ValueError if invalid.
+    The cursor is checked against the sort order of the listing, call this before
+    answering a conditional request so bad arguments get a 400 rather than a 304
+    """
+    default_limit = current_app.config.get('PAGE_DEFAULT_LIMIT', 50)
+    max_limit = current_app.config.get('PAGE_MAX_LIMIT', 500)
+    try:
+        limit = int(request.args.get('limit', default_limit))
+    except ValueError:
+        raise ValueError('Limit must be an integer')
+    if not (1 <= limit <= max_limit):
+        raise ValueError(f'Limit must be between 1 and {max_limit}')
+    cursor = request.args.get('cursor') or None
+    if cursor:
+        decode_cursor(cursor, order)
+    return limit, cursor
@@ -0,0 +1,132 @@
+"""
+Shared cache of serialized GET responses, invalidated by tags from the facade writes
+"""
+
+import json
+import threading
+from functools import wraps
+from urllib.parse import urlencode
+from flask import current_app, request
+from app.cache.lru import bypass_local_caches
+from app.cache.single_flight import SingleFlight
+
+# Concurrent misses for the same key in this process wait for a single rebuild
+_loads = SingleFlight()
+
+# Keys being rebuilt in the background for stale-while-revalidate endpoints
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def _cache_key(params):
+    """
+    Path and the accepted query arguments in the order of params, so equivalent
+    URLs share an entry. None when the request carries an argument the view does
+    not accept: such URLs are not cached, they would each add an entry
+    """
+    if any(name not in params for name in request.args):
+        return None
+    query = [(name, value) for name in params for value in request.args.getlist(name)]
+    return f'response:{request.path}?{urlencode(query)}'
+
+
+def _unpack(result):
+    """Split a view return value into (data, status, headers) like flask-restx does"""
+    if not isinstance(result, tuple):
+        return result, 200, {}
+    status = result[1] if len(result) > 1 else 200
+    headers = result[2] if len(result) > 2 else {}
+    return result[0], status, headers or {}
+
+
+def _respond(entry, state):
+    response = current_app.response_class(entry['body'], status=200, headers=entry['headers'],
+                                          mimetype='application/json')
+    response.headers['X-Cache'] = state
+    # Answers If-None-Match / If-Modified-Since with a 304 straight from the cached validators
+    return response.make_conditional(request)
+
+
+def _revalidate(key, load):
+    """Rebuild an entry on a background thread, at most one rebuild per key at a time"""
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    app = current_app._get_current_object()
+    path = request.full_path
+
+    def run():
+        try:
+            with app.app_context():
+                _loads.do(key, load)
+        except Exception:
+            app.logger.exception('Background refresh of %s failed', path)
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def cached_response(tags, policy=None, params=()):
+    """
+    Serve a public GET from the shared response cache.
+
+    tags(**view_kwargs) names the data the body depends on, the facade
+    invalidates those tags when it writes. params names the query arguments
+    the view accepts (a dict of api.doc params works), requests carrying any
+    other argument skip the cache. Only 200 responses are stored,
+    built without the per-process caches: they miss the other workers'
+    writes and the stored body is shared by every worker.
+    When RESPONSE_CACHE['endpoints'][policy] sets a soft_ttl and a hard_ttl,
+    entries older than soft_ttl (or invalidated) are still served while a
+    background thread rebuilds them, until hard_ttl.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            store = current_app.extensions.get('RESPONSE_CACHE')
+            key = _cache_key(params)
+            if store is None or key is None:
+                return view(*args, **kwargs)
+
+            settings = current_app.config['RESPONSE_CACHE']
+            revalidate = settings.get('endpoints', {}).get(policy) if policy else None
+            ttl = revalidate['hard_ttl'] if revalidate else settings['ttl']
+            stale_after = revalidate['soft_ttl'] if revalidate else None
+
+            entry_tags = tags(**kwargs)
+            app = current_app._get_current_object()
+            path = request.full_path
+            own = []
+
+            def load():
+                versions = store.tag_versions(entry_tags)
+                # Every worker serves the body, build it past this process' caches and without the
+                # caller's conditional headers: the full 200 is stored, a 304 is derived from it
+                with bypass_local_caches(), app.test_request_context(path):
+                    result = view(*args, **kwargs)
+                own.append(result)
+                data, status, headers = _unpack(result)
+                if status != 200:
+                    return None
+                entry = {'body': json.dumps(data) + '\n', 'headers': dict(headers or {})}
+                # Refused when a write invalidated one of the tags while the body was being built
+                store.set(key, json.dumps(entry).encode(), ttl, entry_tags, versions, stale_after)
+                return entry
+
+            cached, stale = store.lookup(key)
+            if cached is not None and not stale:
+                return _respond(json.loads(cached), 'HIT')
+            if cached is not None and revalidate:
+                _revalidate((store.path, key), load)
+                return _respond(json.loads(cached), 'STALE')
+
+            entry = _loads.do((store.path, key), load)
+            if entry is None:
+                # Not shareable (an error), build our own
+                return own[0] if own else view(*args, **kwargs)
+            return _respond(entry, 'MISS')
+        return wrapper
+    return decorator
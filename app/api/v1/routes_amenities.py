@@ -1,6 +1,9 @@
 from flask_restx import Namespace, Resource, fields
 from flask import current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity # type: ignore
+from app.api.v1.pagination import page_params, is_paginated, parse_page_args
+from app.api.v1.conditional import collection_validators, entity_validators, make_etag, not_modified, cache_headers
+from app.api.v1.response_cache import cached_response
 
 
 api = Namespace('amenities', description='Amenity operations')
@@ -44,21 +47,45 @@ class AmenityList(Resource):
         }, 201
 
     @api.response(200, 'List of amenities retrieved successfully')
+    @api.response(304, 'Amenities not modified')
+    @api.response(400, 'Invalid pagination parameters')
+    @api.doc(params=page_params)
+    @cached_response(lambda: ['amenities'], params=page_params)
     def get(self):
         """Retrieve a list of all amenities"""
         facade = current_app.extensions['FACADE']
-        amenities = facade.get_all_amenities()
+
+        if not is_paginated():
+            # The whole list comes from the catalog shared by the workers
+            etag = make_etag(facade.get_amenity_catalog_version())
+            unchanged = not_modified(etag, None)
+            if unchanged:
+                return unchanged
+            return facade.get_amenity_catalog(), 200, cache_headers(etag, None)
+
+        try:
+            limit, cursor = parse_page_args()
+            etag, last_modified = collection_validators(facade.get_amenities_version())
+            unchanged = not_modified(etag, last_modified)
+            if unchanged:
+                return unchanged
+            rows, next_cursor = facade.get_amenity_rows_page(limit, cursor)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
         amenity_list = []
-        for amenity in amenities:
+        for amenity_id, name in rows:
             amenity_list.append({
-                'id': amenity.id,
-                'name': amenity.name
+                'id': amenity_id,
+                'name': name
             })
-        return amenity_list, 200
+
+        return {'items': amenity_list, 'next_cursor': next_cursor}, 200, cache_headers(etag, last_modified)
 
 @api.route('/<amenity_id>')
 class AmenityResource(Resource):
     @api.response(200, 'Amenity details retrieved successfully')
+    @api.response(304, 'Amenity not modified')
     @api.response(404, 'Amenity not found')
     def get(self, amenity_id):
         """Get amenity details by ID"""
@@ -66,10 +93,15 @@ class AmenityResource(Resource):
         amenity = facade.get_amenity(amenity_id)
         if not amenity:
             return {'error': 'Amenity not found'}, 404
+
+        etag, last_modified = entity_validators(amenity)
+        unchanged = not_modified(etag, last_modified)
+        if unchanged:
+            return unchanged
         return {
             'id': amenity.id,
             'name': amenity.name
-        }, 200
+        }, 200, cache_headers(etag, last_modified)
 
     @api.expect(amenity_model)
     @api.response(200, 'Amenity updated successfully')
@@ -1,6 +1,10 @@
 from flask_restx import Namespace, Resource, fields
-from flask import current_app
+from flask import current_app, request
 from flask_jwt_extended import jwt_required, get_jwt_identity # type: ignore
+from app.api.v1.pagination import page_params, is_paginated, parse_page_args
+from app.api.v1.conditional import collection_validators, entity_validators, not_modified, cache_headers
+from app.api.v1.response_cache import cached_response
+from app.services.geo import parse_bbox
 
 
 api = Namespace('places', description='Place operations')
@@ -36,6 +40,83 @@ auth_header = {'Authorization': {
     }
 }
 
+filter_params = {
+    'min_price': {'description': 'Minimum price per night', 'in': 'query', 'type': 'number'},
+    'max_price': {'description': 'Maximum price per night', 'in': 'query', 'type': 'number'},
+    'owner_id': {'description': 'Only places owned by this user', 'in': 'query', 'type': 'string'},
+    'amenities': {'description': 'Comma separated amenity IDs', 'in': 'query', 'type': 'string'},
+    'amenities_match': {'description': 'all (default) or any', 'in': 'query', 'type': 'string'}
+}
+
+
+def parse_place_filters():
+    """Read the place search criteria from the query string, raise ValueError if invalid"""
+    criteria = {}
+    for key in ('min_price', 'max_price'):
+        if request.args.get(key):
+            try:
+                criteria[key] = float(request.args[key])
+            except ValueError:
+                raise ValueError(f'{key} must be a number')
+
+    if request.args.get('owner_id'):
+        criteria['owner_id'] = request.args['owner_id']
+
+    amenity_ids = [amenity_id.strip()
+                   for value in request.args.getlist('amenities')
+                   for amenity_id in value.split(',') if amenity_id.strip()]
+    if amenity_ids:
+        criteria['amenities'] = amenity_ids
+        criteria['amenities_match'] = request.args.get('amenities_match', 'all')
+        if criteria['amenities_match'] not in ('all', 'any'):
+            raise ValueError('amenities_match must be all or any')
+    return criteria
+
+
+def serialize_place(place):
+    """Build the listing representation of a place with its owner already loaded"""
+    owner = place.place_owner
+    owner_data = {
+        'id': owner.id,
+        'first_name': owner.first_name,
+        'last_name': owner.last_name,
+        'email': owner.email
+    } if owner else None
+    return {
+        'id': place.id,
+        'title': place.title,
+        'description': place.description,
+        'price': place.price,
+        'latitude': place.latitude,
+        'longitude': place.longitude,
+        'owner_id': place.owner_id,
+        'owner': owner_data,
+        'amenities': place.amenities
+    }
+
+
+def serialize_place_row(row):
+    """Build the listing representation of a place from its PLACE_WITH_OWNER_ROW row"""
+    (place_id, title, description, price, latitude, longitude, owner_id, amenities,
+     owner_key, first_name, last_name, email) = row
+    owner_data = {
+        'id': owner_key,
+        'first_name': first_name,
+        'last_name': last_name,
+        'email': email
+    } if owner_key else None
+    return {
+        'id': place_id,
+        'title': title,
+        'description': description,
+        'price': price,
+        'latitude': latitude,
+        'longitude': longitude,
+        'owner_id': owner_id,
+        'owner': owner_data,
+        'amenities': amenities
+    }
+
 
 @api.route('/')
 class PlaceList(Resource):
@@ -63,10 +144,9 @@ class PlaceList(Resource):
             return {'error': 'Owner not found'}, 400
 
         amenity_ids = place_data.get('amenities', [])
-        for amenity_id in amenity_ids:
-            amenity = facade.get_amenity(amenity_id)
-            if not amenity:
-                return {'error': f'Amenity with ID {amenity_id} not found'}, 400
+        missing_ids = facade.get_missing_amenity_ids(amenity_ids)
+        if missing_ids:
+            return {'error': f'Amenity with ID {missing_ids[0]} not found'}, 400
 
         try:
             new_place = facade.create_place(place_data)
@@ -85,36 +165,104 @@ class PlaceList(Resource):
         }, 201
 
     @api.response(200, 'List of places retrieved successfully')
+    @api.response(304, 'Places not modified')
+    @api.response(400, 'Invalid pagination or filter parameters')
+    @api.doc(params={**page_params, **filter_params})
+    @cached_response(lambda: ['places', 'users'], policy='place_list', params={**page_params, **filter_params})
     def get(self):
-        """Retrieve a list of all places"""
+        """Retrieve a list of all places, optionally filtered"""
         facade = current_app.extensions['FACADE']
-        places = facade.get_all_places()
-        place_list = []
-        for place in places:
-            owner = facade.get_user(place.owner_id)
-            owner_data = {
-                'id': owner.id,
-                'first_name': owner.first_name,
-                'last_name': owner.last_name,
-                'email': owner.email
-            } if owner else None
-            place_list.append({
-                'id': place.id,
-                'title': place.title,
-                'description': place.description,
-                'price': place.price,
-                'latitude': place.latitude,
-                'longitude': place.longitude,
-                'owner_id': place.owner_id,
-                'owner': owner_data,
-                'amenities': place.amenities
-            })
-        return place_list, 200
+
+        next_cursor = None
+        try:
+            criteria = parse_place_filters()
+            if is_paginated():
+                limit, cursor = parse_page_args()
+            # Listings embed the owners, so a changed owner changes the ETag too
+            etag, last_modified = collection_validators(facade.get_places_version(criteria),
+                                                        facade.get_users_version())
+            unchanged = not_modified(etag, last_modified)
+            if unchanged:
+                return unchanged
+            if is_paginated():
+                rows, next_cursor = facade.get_place_rows_page(limit, cursor, criteria)
+            else:
+                rows = facade.get_place_rows(criteria)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        place_list = [serialize_place_row(row) for row in rows]
+
+        if is_paginated():
+            return {'items': place_list, 'next_cursor': next_cursor}, 200, cache_headers(etag, last_modified)
+        return place_list, 200, cache_headers(etag, last_modified)
+
+@api.route('/search')
+class PlaceSearch(Resource):
+    @api.response(200, 'Places inside the bounding box retrieved successfully')
+    @api.response(400, 'Invalid bounding box or pagination parameters')
+    @api.doc(params={**page_params, 'bbox': {
+        'description': 'min_lon,min_lat,max_lon,max_lat', 'in': 'query', 'type': 'string', 'required': True}})
+    def get(self):
+        """Retrieve the places inside a bounding box"""
+        facade = current_app.extensions['FACADE']
+        try:
+            bbox = parse_bbox(request.args.get('bbox'))
+            limit, cursor = parse_page_args()
+            etag, last_modified = collection_validators(facade.get_places_version(),
+                                                        facade.get_users_version())
+            unchanged = not_modified(etag, last_modified)
+            if unchanged:
+                return unchanged
+            rows, next_cursor = facade.search_place_rows_in_bbox(bbox, limit, cursor)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        return ({'items': [serialize_place_row(row) for row in rows], 'next_cursor': next_cursor},
+                200, cache_headers(etag, last_modified))
+
+@api.route('/near')
+class PlaceNear(Resource):
+    @api.response(200, 'Closest places retrieved successfully')
+    @api.response(400, 'Invalid coordinates, radius or limit')
+    @api.doc(params={
+        'lat': {'description': 'Latitude of the center', 'in': 'query', 'type': 'number', 'required': True},
+        'lon': {'description': 'Longitude of the center', 'in': 'query', 'type': 'number', 'required': True},
+        'radius_km': {'description': 'Search radius in kilometers', 'in': 'query', 'type': 'number', 'required': True},
+        'limit': page_params['limit']})
+    def get(self):
+        """Retrieve the places closest to a point, sorted by distance"""
+        facade = current_app.extensions['FACADE']
+        try:
+            try:
+                latitude = float(request.args['lat'])
+                longitude = float(request.args['lon'])
+                radius_km = float(request.args['radius_km'])
+            except (KeyError, ValueError):
+                raise ValueError('lat, lon and radius_km must be numbers')
+            if not (-90 <= latitude <= 90) or not (-180 <= longitude <= 180):
+                raise ValueError('lat must be between -90 and 90 and lon between -180 and 180')
+            if not (0 < radius_km <= 20000):
+                raise ValueError('radius_km must be between 0 and 20000')
+            limit, _ = parse_page_args()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        etag, last_modified = collection_validators(facade.get_places_version(), facade.get_users_version())
+        unchanged = not_modified(etag, last_modified)
+        if unchanged:
+            return unchanged
+
+        results = facade.search_places_near(latitude, longitude, radius_km, limit)
+        return ([dict(serialize_place(place), distance_km=round(distance, 3)) for place, distance in results],
+                200, cache_headers(etag, last_modified))
 
 @api.route('/<place_id>')
 class PlaceResource(Resource):
     @api.response(200, 'Place details retrieved successfully')
+    @api.response(304, 'Place not modified')
     @api.response(404, 'Place not found')
+    @cached_response(lambda place_id: [f'place:{place_id}', 'users'])
     def get(self, place_id):
         """Get place details by ID"""
         facade = current_app.extensions['FACADE']
@@ -123,6 +271,11 @@ class PlaceResource(Resource):
             return {'error': 'Place not found'}, 404
 
         owner = facade.get_user(place.owner_id)
+        etag, last_modified = entity_validators(place, owner)
+        unchanged = not_modified(etag, last_modified)
+        if unchanged:
+            return unchanged
+
         owner_data = {
             'id': owner.id,
             'first_name': owner.first_name,
@@ -140,7 +293,7 @@ class PlaceResource(Resource):
             'owner_id': place.owner_id,
             'owner': owner_data,
             'amenities': place.amenities 
-        }, 200
+        }, 200, cache_headers(etag, last_modified)
 
     @api.expect(place_model)
     @api.response(200, 'Place updated successfully')
@@ -165,10 +318,9 @@ class PlaceResource(Resource):
 
         if 'amenities' in place_data:
             amenity_ids = place_data['amenities']
-            for amenity_id in amenity_ids:
-                amenity = facade.get_amenity(amenity_id)
-                if not amenity:
-                    return {'error': f'Amenity with ID {amenity_id} not found'}, 400
+            missing_ids = facade.get_missing_amenity_ids(amenity_ids)
+            if missing_ids:
+                return {'error': f'Amenity with ID {missing_ids[0]} not found'}, 400
 
             place.amenities = amenity_ids
 
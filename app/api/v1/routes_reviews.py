@@ -1,6 +1,10 @@
 from flask_restx import Namespace, Resource, fields
-from flask import current_app
+from flask import current_app, request
 from flask_jwt_extended import jwt_required, get_jwt_identity # type: ignore
+from app.api.v1.pagination import page_params, is_paginated, parse_page_args
+from app.api.v1.conditional import collection_validators, entity_validators, not_modified, cache_headers
+from app.api.v1.response_cache import cached_response
+from app.services.facade import DuplicateReviewError
 
 
 api = Namespace('reviews', description='Review operations')
@@ -20,6 +24,11 @@ auth_header = {'Authorization': {
     }
 }
 
+review_list_params = {
+    **page_params,
+    'sort': {'description': 'recent (default) or rating', 'in': 'query', 'type': 'string'}
+}
+
 @api.route('/')
 class ReviewList(Resource):
     @api.expect(review_model)
@@ -43,10 +52,8 @@ class ReviewList(Resource):
         if place.owner_id == current_user["id"]:
             return {'error': 'Unauthorized action: You cannot review your own place.'}, 403
 
-        reviews = facade.get_all_reviews()
-        for review in reviews:
-            if current_user["id"] == review.user_id and place.id == review.place_id:
-                return {'error': 'Unauthorized action: You already reviewed this place.'}, 403
+        if facade.review_exists(current_user["id"], place.id):
+            return {'error': 'Unauthorized action: You already reviewed this place.'}, 403
 
 
         if not all(key in review_data for key in ('user_id', 'place_id', 'rating', 'text')):
@@ -63,6 +70,8 @@ class ReviewList(Resource):
 
         try:
             new_review = facade.create_review(review_data)
+        except DuplicateReviewError:
+            return {'error': 'Unauthorized action: You already reviewed this place.'}, 403
         except ValueError as e:
             return {'error': str(e)}, 400
 
@@ -75,24 +84,46 @@ class ReviewList(Resource):
         }, 201
 
     @api.response(200, 'List of reviews retrieved successfully')
+    @api.response(304, 'Reviews not modified')
+    @api.response(400, 'Invalid pagination parameters')
+    @api.doc(params=page_params)
     def get(self):
         """Retrieve a list of all reviews"""
         facade = current_app.extensions['FACADE']
-        reviews = facade.get_all_reviews()
+
+        next_cursor = None
+        try:
+            if is_paginated():
+                limit, cursor = parse_page_args()
+            etag, last_modified = collection_validators(facade.get_reviews_version())
+            unchanged = not_modified(etag, last_modified)
+            if unchanged:
+                return unchanged
+            if is_paginated():
+                rows, next_cursor = facade.get_review_rows_page(limit, cursor)
+            else:
+                rows = facade.get_review_rows()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
         review_list = []
-        for review in reviews:
+        for review_id, text, rating, user_id, review_place_id in rows:
             review_list.append({
-                'id': review.id,
-                'text': review.text,
-                'rating': review.rating,
-                'user_id': review.user_id,
-                'place_id': review.place_id
+                'id': review_id,
+                'text': text,
+                'rating': rating,
+                'user_id': user_id,
+                'place_id': review_place_id
             })
-        return review_list, 200
+
+        if is_paginated():
+            return {'items': review_list, 'next_cursor': next_cursor}, 200, cache_headers(etag, last_modified)
+        return review_list, 200, cache_headers(etag, last_modified)
 
 @api.route('/<review_id>')
 class ReviewResource(Resource):
     @api.response(200, 'Review details retrieved successfully')
+    @api.response(304, 'Review not modified')
     @api.response(404, 'Review not found')
     def get(self, review_id):
         """Get review details by ID"""
@@ -100,13 +131,18 @@ class ReviewResource(Resource):
         review = facade.get_review(review_id)
         if not review:
             return {'error': 'Review not found'}, 404
+
+        etag, last_modified = entity_validators(review)
+        unchanged = not_modified(etag, last_modified)
+        if unchanged:
+            return unchanged
         return {
             'id': review.id,
             'text': review.text,
             'rating': review.rating,
             'user_id': review.user_id,
             'place_id': review.place_id
-        }, 200
+        }, 200, cache_headers(etag, last_modified)
 
     @api.expect(review_model)
     @api.response(200, 'Review updated successfully')
@@ -169,7 +205,12 @@ class ReviewResource(Resource):
 @api.route('/places/<place_id>/reviews')
 class PlaceReviewList(Resource):
     @api.response(200, 'List of reviews for the place retrieved successfully')
+    @api.response(304, 'Reviews not modified')
+    @api.response(400, 'Invalid pagination or sort parameters')
     @api.response(404, 'Place not found')
+    @api.doc(params=review_list_params)
+    @cached_response(lambda place_id: [f'place_reviews:{place_id}', f'place:{place_id}'],
+                     params=review_list_params)
     def get(self, place_id):
         """Get all reviews for a specific place"""
         facade = current_app.extensions['FACADE']
@@ -177,16 +218,37 @@ class PlaceReviewList(Resource):
         if not place:
             return {'error': 'Place not found'}, 404
 
-        reviews = facade.get_reviews_by_place(place_id)
+        sort = request.args.get('sort', 'recent')
+        next_cursor = None
+        try:
+            order = facade.review_order(sort)
+            if is_paginated():
+                limit, cursor = parse_page_args(order)
+            # The reviews embed the place title
+            place_etag, _ = entity_validators(place)
+            etag, last_modified = collection_validators(facade.get_reviews_by_place_version(place_id), place_etag)
+            unchanged = not_modified(etag, last_modified)
+            if unchanged:
+                return unchanged
+            if is_paginated():
+                rows, next_cursor = facade.get_review_rows_by_place_page(place_id, limit, cursor, sort)
+            else:
+                rows = facade.get_review_rows_by_place(place_id, sort)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
         place_name = place.title
         reviews_list = []
-        for review in reviews:
+        for review_id, text, rating, user_id, review_place_id in rows:
             reviews_list.append({
-                'id': review.id,
-                'text': review.text,
-                'rating': review.rating,
-                'user_id': review.user_id,
-                'place_id': review.place_id,
+                'id': review_id,
+                'text': text,
+                'rating': rating,
+                'user_id': user_id,
+                'place_id': review_place_id,
                 'place_name': place_name
             })
-        return reviews_list, 200
\ No newline at end of file
+
+        if is_paginated():
+            return {'items': reviews_list, 'next_cursor': next_cursor}, 200, cache_headers(etag, last_modified)
+        return reviews_list, 200, cache_headers(etag, last_modified)
\ No newline at end of file
@@ -1,9 +1,11 @@
 # route_users.py
 
 from flask_restx import Namespace, Resource, fields
-from flask import current_app
+from flask import current_app, request
 from flask_jwt_extended import jwt_required, get_jwt_identity # type: ignore
 from app.extensions import bcrypt
+from app.api.v1.pagination import page_params, is_paginated, parse_page_args
+from app.api.v1.conditional import collection_validators, entity_validators, not_modified, cache_headers
 
 
 api = Namespace('users', description='User operations')
@@ -48,6 +50,19 @@ class Home(Resource):
 
         return {"message": f"Hello {current_user_first_name} {current_user_last_name}"}, 200
 
+@api.route('/email-available')
+class EmailAvailable(Resource):
+    @api.response(200, 'Availability of the email returned')
+    @api.response(400, 'Missing email')
+    @api.doc(params={'email': {'description': 'Email to check', 'in': 'query', 'type': 'string', 'required': True}})
+    def get(self):
+        """Check whether an email can still be used to register"""
+        facade = current_app.extensions['FACADE']
+        email = request.args.get('email', '').strip()
+        if not email:
+            return {'error': 'Missing email'}, 400
+        return {'email': email, 'available': facade.is_email_available(email)}, 200
+
 @api.route('/')
 class UserList(Resource):
     
@@ -65,8 +80,7 @@ class UserList(Resource):
         facade = current_app.extensions['FACADE']
         user_data = api.payload
 
-        existing_user = facade.get_user_by_email(user_data['email'])
-        if existing_user:
+        if not facade.is_email_available(user_data['email']):
             return {'error': 'Email already registered'}, 400
 
         try:
@@ -83,24 +97,46 @@ class UserList(Resource):
         }, 201
     
     @api.response(200, 'List of users retrieved successfully')
+    @api.response(304, 'Users not modified')
+    @api.response(400, 'Invalid pagination parameters')
+    @api.doc(params=page_params)
     def get(self):
         """Retrieve a list of all users"""
         facade = current_app.extensions['FACADE']
-        users = facade.get_all_users()
+
+        next_cursor = None
+        try:
+            if is_paginated():
+                limit, cursor = parse_page_args()
+            etag, last_modified = collection_validators(facade.get_users_version())
+            unchanged = not_modified(etag, last_modified)
+            if unchanged:
+                return unchanged
+            if is_paginated():
+                rows, next_cursor = facade.get_user_rows_page(limit, cursor)
+            else:
+                rows = facade.get_user_rows()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
         user_list = []
-        for user in users:
+        for user_id, first_name, last_name, email in rows:
             user_list.append({
-                'id': user.id,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'email': user.email,
+                'id': user_id,
+                'first_name': first_name,
+                'last_name': last_name,
+                'email': email,
                 'password' : "****"
             })
-        return user_list, 200
+
+        if is_paginated():
+            return {'items': user_list, 'next_cursor': next_cursor}, 200, cache_headers(etag, last_modified)
+        return user_list, 200, cache_headers(etag, last_modified)
 
 @api.route('/<user_id>')
 class UserResource(Resource):
     @api.response(200, 'User details retrieved successfully')
+    @api.response(304, 'User not modified')
     @api.response(404, 'User not found')
     def get(self, user_id):
         """Get user details by ID"""
@@ -108,13 +144,18 @@ class UserResource(Resource):
         user = facade.get_user(user_id)
         if not user:
             return {'error': 'User not found'}, 404
+
+        etag, last_modified = entity_validators(user)
+        unchanged = not_modified(etag, last_modified)
+        if unchanged:
+            return unchanged
         return {
             'id': user.id,
             'first_name': user.first_name,
             'last_name': user.last_name,
             'email': user.email,
             'password' : "****"
-        }, 200
+        }, 200, cache_headers(etag, last_modified)
     
     @api.expect(user_model)
     @api.response(200, 'User updated successfully')
@@ -145,11 +186,13 @@ class UserResource(Resource):
             user_data["email"] = user.email
             user_data["password"] = user.password
 
-        existing_user = facade.get_user_by_email(user_data['email'])
-        if existing_user and user.email != user_data['email']:
+        if user.email != user_data['email'] and not facade.is_email_available(user_data['email']):
             return {'error': 'Email already registered'}, 400
 
-        updated_user = facade.update_user(user_id, user_data)
+        try:
+            updated_user = facade.update_user(user_id, user_data)
+        except ValueError as e:
+            return {'error': str(e)}, 400
 
         return {
             'id': updated_user.id,
@@ -183,24 +226,89 @@ class UserResource(Resource):
 @api.route('/<user_id>/places')
 class UserPlacesResource(Resource):
     @api.response(200, 'List of places retrieved successfully')
+    @api.response(400, 'Invalid pagination parameters')
     @api.response(404, 'User not found')
+    @api.doc(params=page_params)
     def get(self, user_id):
         """Get all places for a user"""
         facade = current_app.extensions['FACADE']
-        places = facade.get_all_places()
+        if not facade.get_user(user_id):
+            return {'error': 'User not found'}, 404
+
+        next_cursor = None
+        try:
+            if is_paginated():
+                limit, cursor = parse_page_args()
+            etag, last_modified = collection_validators(facade.get_places_by_owner_version(user_id))
+            unchanged = not_modified(etag, last_modified)
+            if unchanged:
+                return unchanged
+            if is_paginated():
+                rows, next_cursor = facade.get_place_rows_by_owner_page(user_id, limit, cursor)
+            else:
+                rows = facade.get_place_rows_by_owner(user_id)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
         place_list = []
-        for place in places:
-            if place.owner_id == user_id:
-                place_list.append({
-                'id': place.id,
-                'title': place.title,
-                'description': place.description,
-                'price': place.price,
-                'latitude': place.latitude,
-                'longitude': place.longitude,
-                'owner_id': place.owner_id,
+        for place_id, title, description, price, latitude, longitude, owner_id, amenities in rows:
+            place_list.append({
+                'id': place_id,
+                'title': title,
+                'description': description,
+                'price': price,
+                'latitude': latitude,
+                'longitude': longitude,
+                'owner_id': owner_id,
                 'owner': user_id,
-                'amenities': place.amenities
-                })
-        
-        return place_list, 200
\ No newline at end of file
+                'amenities': amenities
+            })
+
+        if is_paginated():
+            return {'items': place_list, 'next_cursor': next_cursor}, 200, cache_headers(etag, last_modified)
+        return place_list, 200, cache_headers(etag, last_modified)
+
+
+@api.route('/<user_id>/reviews')
+class UserReviewsResource(Resource):
+    @api.response(200, 'List of reviews retrieved successfully')
+    @api.response(400, 'Invalid pagination parameters')
+    @api.response(404, 'User not found')
+    @api.doc(params=page_params)
+    def get(self, user_id):
+        """Get all reviews written by a user, newest first"""
+        facade = current_app.extensions['FACADE']
+        if not facade.get_user(user_id):
+            return {'error': 'User not found'}, 404
+
+        next_cursor = None
+        try:
+            if is_paginated():
+                limit, cursor = parse_page_args(facade.review_order('recent'))
+            # The reviews embed their place title
+            etag, last_modified = collection_validators(facade.get_reviews_by_user_version(user_id),
+                                                        facade.get_places_version())
+            unchanged = not_modified(etag, last_modified)
+            if unchanged:
+                return unchanged
+            if is_paginated():
+                rows, next_cursor = facade.get_review_rows_by_user_page(user_id, limit, cursor)
+            else:
+                rows = facade.get_review_rows_by_user(user_id)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        review_list = []
+        for review_id, text, rating, review_user_id, place_id, place_name in rows:
+            review_list.append({
+                'id': review_id,
+                'text': text,
+                'rating': rating,
+                'user_id': review_user_id,
+                'place_id': place_id,
+                'place_name': place_name
+            })
+
+        if is_paginated():
+            return {'items': review_list, 'next_cursor': next_cursor}, 200, cache_headers(etag, last_modified)
+        return review_list, 200, cache_headers(etag, last_modified)
@@ -0,0 +1,5 @@
+from app.cache.lru import LRUCache, bypass_local_caches
+from app.cache.sqlite_store import SQLiteStore
+from app.cache.single_flight import SingleFlight
+from app.cache.bloom import BloomFilter
+from app.cache.tiered import TieredCache, Codec, cached
@@ -0,0 +1,41 @@
+# bloom.py
+
+import hashlib
+import math
+import threading
+import time
+
+
+class BloomFilter:
+    """
+    Set membership with false positives but no false negatives.
+
+    Sized for capacity items at the given false positive rate. Items cannot
+    be removed, so a filter over a changing set is rebuilt from time to
+    time; built_at records when.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(int(capacity), 1)
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.built_at = time.monotonic()
+
+    def _positions(self, value):
+        # Double hashing: the k positions come from two halves of one digest
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, value):
+        positions = self._positions(value)
+        with self._lock:
+            for position in positions:
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def __contains__(self, value):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
@@ -0,0 +1,54 @@
+# shared_snapshot.py
+
+import mmap
+import os
+import struct
+import tempfile
+
+_MAGIC = b'HBNBSNAP'
+# magic, version token length, payload length
+_HEADER = struct.Struct('<8sII')
+
+
+class SharedSnapshot:
+    """
+    Versioned byte payload in a file that every worker maps read-only.
+
+    write() replaces the file atomically, so readers holding the previous
+    mapping keep a consistent copy until they map the new one.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def write(self, version, payload):
+        token = version.encode('utf-8')
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot-')
+        try:
+            with os.fdopen(fd, 'wb') as temp:
+                temp.write(_HEADER.pack(_MAGIC, len(token), len(payload)))
+                temp.write(token)
+                temp.write(payload)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def read(self):
+        """Map the file read-only and return (version, payload), (None, None) if missing or corrupt"""
+        try:
+            with open(self.path, 'rb') as snapshot:
+                mapped = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return None, None
+        with mapped:
+            if len(mapped) < _HEADER.size:
+                return None, None
+            magic, token_length, payload_length = _HEADER.unpack_from(mapped, 0)
+            start = _HEADER.size + token_length
+            if magic != _MAGIC or len(mapped) < start + payload_length:
+                return None, None
+            return mapped[_HEADER.size:start].decode('utf-8'), mapped[start:start + payload_length]
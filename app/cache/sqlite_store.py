@@ -0,0 +1,223 @@
+# sqlite_store.py
+
+import os
+import sqlite3
+import threading
+import time
+
+# Bumped when the tables change, older cache files are simply recreated
+_SCHEMA_VERSION = 3
+
+_SCHEMA = """
+DROP TABLE IF EXISTS entries;
+DROP TABLE IF EXISTS entry_tags;
+DROP TABLE IF EXISTS tag_versions;
+CREATE TABLE entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires_at REAL NOT NULL,
+    stale_at REAL
+);
+CREATE INDEX ix_entries_expires_at ON entries (expires_at);
+CREATE TABLE entry_tags (
+    tag TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (tag, key)
+);
+CREATE INDEX ix_entry_tags_key ON entry_tags (key);
+CREATE TABLE tag_versions (
+    tag TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+
+class SQLiteStore:
+    """
+    Byte store shared by every process that opens the same SQLite file.
+
+    Entries carry a TTL and a set of tags. invalidate(tags) drops every
+    entry carrying one of the tags and bumps the tag versions, so a value
+    computed from data read before the invalidation can be refused by
+    passing the versions read beforehand to set().
+
+    Entries stored with stale_after become stale after that many seconds
+    but stay readable through lookup() until their TTL; invalidating them
+    marks them stale instead of dropping them.
+
+    Every purge_every writes of this process, expired entries are deleted
+    and, past max_entries, the entries closest to expiring are evicted, so
+    the file holds at most max_entries plus the writes since each
+    process' last purge.
+    """
+
+    def __init__(self, path, clock=time.time, max_entries=None, purge_every=100):
+        self.path = path
+        self._clock = clock
+        self.max_entries = max_entries
+        self.purge_every = purge_every
+        self._writes = 0
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._create_schema()
+
+    def _create_schema(self):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            if connection.execute('PRAGMA user_version').fetchone()[0] != _SCHEMA_VERSION:
+                for statement in _SCHEMA.split(';'):
+                    if statement.strip():
+                        connection.execute(statement)
+                connection.execute(f'PRAGMA user_version = {_SCHEMA_VERSION}')
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def _connection(self):
+        """One connection per thread, SQLite connections cannot be shared between threads"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def _count(self, counter):
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def lookup(self, key):
+        """Return (value, stale) for a live entry, (None, False) if there is none"""
+        now = self._clock()
+        row = self._connection().execute(
+            'SELECT value, stale_at FROM entries WHERE key = ? AND expires_at > ?', (key, now)).fetchone()
+        if row is None:
+            self._count('misses')
+            return None, False
+        stale = row[1] is not None and row[1] <= now
+        self._count('stale_hits' if stale else 'hits')
+        return row[0], stale
+
+    def get(self, key):
+        """Return the value of a live entry that is not stale"""
+        value, stale = self.lookup(key)
+        return None if stale else value
+
+    def tag_versions(self, tags):
+        """Return the current version of each tag, to be handed back to set()"""
+        tags = list(tags)
+        if not tags:
+            return {}
+        rows = self._connection().execute(
+            f'SELECT tag, version FROM tag_versions WHERE tag IN ({",".join("?" * len(tags))})', tags).fetchall()
+        versions = dict.fromkeys(tags, 0)
+        versions.update(rows)
+        return versions
+
+    def set(self, key, value, ttl, tags=(), versions=None, stale_after=None):
+        """Store value under key, unless one of the tags was invalidated since versions were read"""
+        tags = list(tags)
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            if versions is not None:
+                current = self.tag_versions(versions)
+                if current != versions:
+                    connection.execute('ROLLBACK')
+                    return False
+            now = self._clock()
+            connection.execute(
+                'INSERT OR REPLACE INTO entries (key, value, expires_at, stale_at) VALUES (?, ?, ?, ?)',
+                (key, value, now + ttl, None if stale_after is None else now + stale_after))
+            connection.execute('DELETE FROM entry_tags WHERE key = ?', (key,))
+            connection.executemany('INSERT OR IGNORE INTO entry_tags (tag, key) VALUES (?, ?)',
+                                   [(tag, key) for tag in tags])
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        if self._due_for_purge():
+            self.purge_expired()
+        return True
+
+    def _due_for_purge(self):
+        with self._counter_lock:
+            self._writes += 1
+            if self._writes < self.purge_every:
+                return False
+            self._writes = 0
+            return True
+
+    def delete(self, key):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        connection.execute('DELETE FROM entries WHERE key = ?', (key,))
+        connection.execute('DELETE FROM entry_tags WHERE key = ?', (key,))
+        connection.execute('COMMIT')
+
+    def invalidate(self, tags):
+        """Drop (or mark stale) every entry carrying one of the tags, in every process"""
+        tags = list(tags)
+        if not tags:
+            return
+        placeholders = ','.join('?' * len(tags))
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            rows = connection.execute(
+                'SELECT key, stale_at IS NOT NULL FROM entries WHERE key IN '
+                f'(SELECT key FROM entry_tags WHERE tag IN ({placeholders}))', tags).fetchall()
+            stale_keys = [(key,) for key, revalidated in rows if revalidated]
+            dropped_keys = [(key,) for key, revalidated in rows if not revalidated]
+            connection.executemany('UPDATE entries SET stale_at = 0 WHERE key = ?', stale_keys)
+            connection.executemany('DELETE FROM entries WHERE key = ?', dropped_keys)
+            connection.executemany('DELETE FROM entry_tags WHERE key = ?', dropped_keys)
+            connection.executemany(
+                'INSERT INTO tag_versions (tag, version) VALUES (?, 1) '
+                'ON CONFLICT (tag) DO UPDATE SET version = version + 1', [(tag,) for tag in tags])
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def purge_expired(self):
+        """Delete the expired entries, then evict the entries closest to expiring past max_entries"""
+        now = self._clock()
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            keys = connection.execute('SELECT key FROM entries WHERE expires_at <= ?', (now,)).fetchall()
+            evicted = []
+            if self.max_entries is not None:
+                evicted = connection.execute(
+                    'SELECT key FROM entries WHERE expires_at > ? ORDER BY expires_at DESC LIMIT -1 OFFSET ?',
+                    (now, self.max_entries)).fetchall()
+            connection.executemany('DELETE FROM entries WHERE key = ?', keys + evicted)
+            connection.executemany('DELETE FROM entry_tags WHERE key = ?', keys + evicted)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        with self._counter_lock:
+            self.evictions += len(evicted)
+
+    def clear(self):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        connection.execute('DELETE FROM entries')
+        connection.execute('DELETE FROM entry_tags')
+        connection.execute('COMMIT')
+
+    def stats(self):
+        size = self._connection().execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        return {'hits': self.hits, 'stale_hits': self.stale_hits, 'misses': self.misses,
+                'evictions': self.evictions, 'size': size}
@@ -0,0 +1,163 @@
+# tiered.py
+
+import json
+import pickle
+import threading
+import time
+from collections import defaultdict
+from functools import wraps
+from app.cache.lru import LRUCache, bypass_local_caches
+from app.cache.single_flight import SingleFlight
+
+
+class Codec:
+    """
+    Serialization hooks of one cached namespace.
+
+    dump(value) turns a loaded value into plain data, which is what L1
+    keeps; load(data) builds the value handed to the caller on every hit.
+    The default keeps values as they are.
+    """
+
+    def dump(self, value):
+        return value
+
+    def load(self, data):
+        return data
+
+
+class TieredCache:
+    """
+    Two level cache: a per-process LRU (L1) in front of a store shared by
+    every worker (L2, usually a SQLiteStore).
+
+    Keys are namespaced, entries carry tags and a TTL. invalidate(tags)
+    drops the tagged entries of this process' L1 and of L2, which every
+    worker sees at once; the L1 of other workers only notices when its
+    entries expire, so l1_ttl bounds how stale they can be. Values go
+    through the namespace codec, then encode/decode turn the plain data
+    into the bytes stored in L2 (pickle by default, the store is local and
+    trusted). Concurrent misses for the same key share one load, which
+    bypasses the per-process caches (this L1 and the caching repositories)
+    so L2 is never refilled with a value another worker already changed.
+    """
+
+    def __init__(self, l2=None, l1_size=1024, l1_ttl=5, ttl=300, encode=pickle.dumps, decode=pickle.loads,
+                 clock=time.monotonic):
+        self.l1 = LRUCache(l1_size, l1_ttl, clock)
+        self.l2 = l2
+        self.ttl = ttl
+        self.encode = encode
+        self.decode = decode
+        self._loads = SingleFlight()
+        self._lock = threading.Lock()
+        # How many times each tag was invalidated in this process, L1 entries
+        # remember the counts of their tags and are ignored once one moved
+        self._generations = defaultdict(int)
+        self._counters = defaultdict(lambda: {'l1_hits': 0, 'l2_hits': 0, 'misses': 0})
+
+    @staticmethod
+    def make_key(namespace, key):
+        return f'{namespace}:{key}'
+
+    def _count(self, namespace, counter):
+        with self._lock:
+            self._counters[namespace][counter] += 1
+
+    def get_or_load(self, namespace, key, load, tags=(), ttl=None, codec=None):
+        """Return the cached value of namespace:key, calling load() on a miss in both tiers"""
+        codec = codec or Codec()
+        full_key = self.make_key(namespace, key)
+        tags = list(tags)
+        entry = self.l1.get(full_key)
+        if entry is not None and entry[1] == self._tag_generations(tags):
+            self._count(namespace, 'l1_hits')
+            return codec.load(entry[0])
+
+        loaded = []
+
+        def fill():
+            generations = self._tag_generations(tags)
+            if self.l2 is not None:
+                cached = self.l2.get(full_key)
+                if cached is not None:
+                    self._count(namespace, 'l2_hits')
+                    data = self.decode(cached)
+                    self.l1.set(full_key, (data, generations))
+                    return data
+                versions = self.l2.tag_versions(tags)
+
+            self._count(namespace, 'misses')
+            # Past the per-process caches, which may still hold what another worker just changed
+            with bypass_local_caches():
+                value = load()
+            loaded.append(value)
+            if value is None:
+                # Not cached, a later create of the same key would have nothing to invalidate
+                return None
+            data = codec.dump(value)
+            if self.l2 is not None:
+                # Refused when a write invalidated one of the tags during the load
+                self.l2.set(full_key, self.encode(data), self.ttl if ttl is None else ttl, tags, versions)
+            self.l1.set(full_key, (data, generations))
+            return data
+
+        data = self._loads.do(full_key, fill)
+        if loaded:
+            return loaded[0]
+        return None if data is None else codec.load(data)
+
+    def _tag_generations(self, tags):
+        with self._lock:
+            return [self._generations.get(tag, 0) for tag in tags]
+
+    def invalidate(self, tags):
+        tags = list(tags)
+        if not tags:
+            return
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] += 1
+        if self.l2 is not None:
+            self.l2.invalidate(tags)
+
+    def clear(self):
+        self.l1.clear()
+        if self.l2 is not None:
+            self.l2.clear()
+
+    def stats(self):
+        """Per namespace counters with the share of lookups answered by each tier"""
+        with self._lock:
+            counters = {namespace: dict(values) for namespace, values in self._counters.items()}
+        for values in counters.values():
+            lookups = values['l1_hits'] + values['l2_hits'] + values['misses']
+            l2_lookups = values['l2_hits'] + values['misses']
+            values['l1_hit_ratio'] = values['l1_hits'] / lookups if lookups else 0.0
+            values['l2_hit_ratio'] = values['l2_hits'] / l2_lookups if l2_lookups else 0.0
+        return {'namespaces': counters, 'l1': self.l1.stats(), 'loads': self._loads.stats()}
+
+
+def _default_key(args, kwargs):
+    return json.dumps([args, kwargs], sort_keys=True, default=str)
+
+
+def cached(namespace, tags=lambda *args, **kwargs: (), ttl=None, codec=None, key=_default_key):
+    """
+    Serve a method from the owner's tiered_cache, when it has one.
+
+    tags(*args, **kwargs) names the data the result depends on, codec names
+    an entry of the owner's cache_codecs used to (de)serialize it, and
+    key(args, kwargs) builds the key inside the namespace. None results
+    are not cached.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            cache = getattr(self, 'tiered_cache', None)
+            if cache is None:
+                return method(self, *args, **kwargs)
+            return cache.get_or_load(namespace, key(args, kwargs), lambda: method(self, *args, **kwargs),
+                                     tags(*args, **kwargs), ttl, self.cache_codecs[codec] if codec else None)
+        return wrapper
+    return decorator
@@ -0,0 +1,29 @@
+# catalog_version.py
+
+import uuid
+from app.extensions import db
+from app.persistence.unit_of_work import UnitOfWork
+
+
+class CatalogVersion(db.Model):
+    """Change counter of a cached catalog, bumped by every write to it"""
+    __tablename__ = 'catalog_versions'
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    # Random per bump, tells apart equal counters of two different databases
+    stamp = db.Column(db.String(32), nullable=False)
+
+    @classmethod
+    def current(cls, name):
+        """Return the 'version-stamp' token of the catalog, None if it was never written"""
+        row = db.session.query(cls.version, cls.stamp).filter(cls.name == name).first()
+        return f'{row.version}-{row.stamp}' if row else None
+
+    @classmethod
+    def bump(cls, name):
+        stamp = uuid.uuid4().hex
+        with UnitOfWork():
+            updated = cls.query.filter(cls.name == name).update(
+                {cls.version: cls.version + 1, cls.stamp: stamp}, synchronize_session=False)
+            if not updated:
+                db.session.add(cls(name=name, version=1, stamp=stamp))
@@ -7,11 +7,16 @@ from app.models.association_tables import place_amenity
 
 class Place(BaseModel):
     __tablename__ = 'places'
+    __table_args__ = (
+        # Places of one owner, in listing order
+        db.Index('ix_places_owner_id_created_at', 'owner_id', 'created_at'),
+    )
     title = db.Column(db.String(50), nullable=False)
     description = db.Column(db.String(1024), nullable=False)
-    price = db.Column(db.Float, nullable=False, default=0)
+    price = db.Column(db.Float, nullable=False, default=0, index=True)
     latitude = db.Column(db.Float, nullable=False)
     longitude = db.Column(db.Float, nullable=False)
+    geo_cell = db.Column(db.Integer, nullable=True, index=True)
     owner = db.Column(db.String(50), nullable=True)
     owner_id = db.Column(db.String(36), db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     reviews = db.Column(db.JSON, default=[])
@@ -5,6 +5,15 @@ from app.extensions import db
 
 class Review(BaseModel):
     __tablename__ = 'reviews'
+    __table_args__ = (
+        # Per-place listings, newest first or best rated first
+        db.Index('ix_reviews_place_id_created_at', 'place_id', 'created_at'),
+        db.Index('ix_reviews_place_id_rating', 'place_id', 'rating'),
+        # Account page listing of a user's reviews
+        db.Index('ix_reviews_user_id_created_at', 'user_id', 'created_at'),
+        # One review per user per place
+        db.Index('uq_reviews_user_id_place_id', 'user_id', 'place_id', unique=True),
+    )
     text = db.Column(db.String(1024), nullable=False)
     rating = db.Column(db.Integer, nullable=False)
     place_id = db.Column(db.String(), db.ForeignKey('places.id', ondelete='CASCADE') , nullable=False)
@@ -0,0 +1,278 @@
+# caching_repository.py
+
+import threading
+import time
+import weakref
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.cache.lru import LRUCache, bypass_local_caches
+from app.cache.single_flight import SingleFlight
+from app.cache.tiered import Codec
+from app.persistence.repository import Repository, DEFAULT_ORDER, DEFAULT_CHUNK_SIZE
+from app.persistence.unit_of_work import in_unit_of_work, on_unit_of_work_end
+
+# Caching repositories by model class, used to invalidate entries on flush
+_registry = weakref.WeakSet()
+_registry_lock = threading.Lock()
+
+
+class CachingRepository(Repository):
+    """
+    Read-through cache in front of another repository.
+
+    get(obj_id) and get_by_attribute() are served from a bounded LRU with a
+    TTL. Attribute lookups only remember the id they resolved to and are
+    checked again against the object, so dropping the id entry is enough to
+    invalidate them. Entries are dropped when the object is added, updated
+    or deleted through this repository, and when the ORM flushes a change
+    to an object of the cached model (which also covers cascades triggered
+    by other repositories). Concurrent misses for the same id share one
+    query.
+
+    Other worker processes learn about a change through shared_versions, a
+    store of tag versions shared by the workers (a SQLiteStore) in which the
+    facade bumps version_tag on every write to the model: at most every
+    check_interval seconds the version is read again, and everything is
+    forgotten once it moved. Without shared_versions, other workers only see
+    a change once the TTL expires. Write requests skip the cache entirely,
+    see init_app().
+
+    Ids that do not exist are remembered for negative_ttl seconds, so
+    repeated lookups of unknown ids stop reaching the database. Adding an
+    object with that id forgets it.
+    """
+
+    def __init__(self, repository, max_size=1024, ttl=60, negative_ttl=None, shared_versions=None,
+                 version_tag=None, check_interval=1.0, clock=time.monotonic):
+        self.repository = repository
+        self.model = getattr(repository, 'model', None)
+        self._by_id = LRUCache(max_size, ttl)
+        self._missing = LRUCache(max_size, ttl if negative_ttl is None else negative_ttl)
+        self._by_attribute = LRUCache(max_size, ttl)
+        self._attribute_names = set()
+        self._loads = SingleFlight()
+        self.shared_versions = shared_versions if version_tag else None
+        self.version_tag = version_tag
+        self.check_interval = check_interval
+        self._clock = clock
+        self._version_lock = threading.Lock()
+        self._version = None
+        self._checked_at = None
+        # Moved by clear(), a load that started before is not stored
+        self._generation = 0
+        with _registry_lock:
+            _registry.add(self)
+
+    def invalidate(self, obj_id, obj=None):
+        """Forget everything cached about obj_id, and the lookups obj now matches"""
+        lookups = []
+        if obj is not None:
+            # Read loaded values only, obj may be a deleted instance
+            values = getattr(obj, '__dict__', {})
+            lookups = [(attr_name, values[attr_name]) for attr_name in list(self._attribute_names)
+                       if attr_name in values]
+        self._forget(obj_id, lookups)
+        if in_unit_of_work():
+            # Until it ends, lookups may cache rows that are not committed yet or get rolled back
+            on_unit_of_work_end(lambda: self._forget(obj_id, lookups))
+
+    def _forget(self, obj_id, lookups):
+        self._by_id.delete(obj_id)
+        self._missing.delete(obj_id)
+        for key in lookups:
+            self._by_attribute.delete(key)
+
+    def clear(self):
+        with self._version_lock:
+            self._generation += 1
+        self._by_id.clear()
+        self._by_attribute.clear()
+        self._missing.clear()
+
+    def _sync(self):
+        """Forget everything once another worker wrote to the model, checked at most every check_interval"""
+        if self.shared_versions is None:
+            return
+        with self._version_lock:
+            now = self._clock()
+            if self._checked_at is not None and now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            version = self.shared_versions.tag_versions([self.version_tag])[self.version_tag]
+            moved = self._version is not None and version != self._version
+            self._version = version
+        if moved:
+            self.clear()
+
+    def stats(self):
+        return {'get': self._by_id.stats(), 'get_by_attribute': self._by_attribute.stats(),
+                'missing': self._missing.stats(), 'loads': self._loads.stats()}
+
+    def add(self, obj):
+        self.repository.add(obj)
+        self.invalidate(obj.id, obj)
+
+    def get(self, obj_id):
+        self._sync()
+        snapshot = self._by_id.get(obj_id)
+        if snapshot is not None:
+            return self.repository.restore(snapshot)
+        if self._missing.get(obj_id):
+            return None
+
+        loaded = []
+        generation = self._generation
+
+        def load():
+            obj = self.repository.get(obj_id)
+            loaded.append(obj)
+            if obj is None:
+                if generation == self._generation:
+                    # Also when a write request loaded it past an entry that is now known to be stale
+                    self._by_id.delete(obj_id)
+                    self._missing.set(obj_id, True)
+                return None
+            snapshot = self.repository.snapshot(obj)
+            if generation == self._generation:
+                self._missing.delete(obj_id)
+                self._by_id.set(obj_id, snapshot)
+            return snapshot
+
+        snapshot = self._loads.do(obj_id, load)
+        if loaded:
+            return loaded[0]
+        # Loaded by another thread, whose instance belongs to its own session
+        return self.repository.restore(snapshot) if snapshot is not None else None
+
+    def get_many(self, obj_ids):
+        return self.repository.get_many(obj_ids)
+
+    def get_all(self):
+        return self.repository.get_all()
+
+    def find(self, filters=(), relationships=(), order=()):
+        return self.repository.find(filters, relationships, order)
+
+    def get_all_rows(self, columns, filters=(), order=()):
+        return self.repository.get_all_rows(columns, filters, order)
+
+    def iter_rows(self, columns, filters=(), batch_size=1000):
+        return self.repository.iter_rows(columns, filters, batch_size)
+
+    def page_rows(self, columns, limit, cursor=None, filters=(), order=DEFAULT_ORDER):
+        return self.repository.page_rows(columns, limit, cursor, filters, order)
+
+    def get_version(self, filters=()):
+        return self.repository.get_version(filters)
+
+    def update(self, obj_id, data):
+        self.repository.update(obj_id, data)
+        self.invalidate(obj_id)
+
+    def delete(self, obj_id):
+        self.repository.delete(obj_id)
+        self.invalidate(obj_id)
+
+    def get_by_attribute(self, attr_name, attr_value):
+        self._sync()
+        key = (attr_name, attr_value)
+        obj_id = self._by_attribute.get(key)
+        if obj_id is not None:
+            obj = self.get(obj_id)
+            if obj is not None and getattr(obj, attr_name) == attr_value:
+                return obj
+            self._by_attribute.delete(key)
+
+        generation = self._generation
+        obj = self.repository.get_by_attribute(attr_name, attr_value)
+        if obj is not None and generation == self._generation:
+            self._attribute_names.add(attr_name)
+            self._by_attribute.set(key, obj.id)
+            self._by_id.set(obj.id, self.repository.snapshot(obj))
+        return obj
+
+    def exists(self, **attributes):
+        return self.repository.exists(**attributes)
+
+    def bulk_add(self, objs, chunk_size=DEFAULT_CHUNK_SIZE):
+        objs = self.repository.bulk_add(objs, chunk_size)
+        for obj in objs:
+            self.invalidate(obj.id, obj)
+        return objs
+
+    def bulk_update(self, updates, chunk_size=DEFAULT_CHUNK_SIZE):
+        updates = dict(updates)
+        self.repository.bulk_update(updates, chunk_size)
+        for obj_id in updates:
+            self.invalidate(obj_id)
+
+    def bulk_delete(self, obj_ids, chunk_size=DEFAULT_CHUNK_SIZE):
+        deleted = self.repository.bulk_delete(obj_ids, chunk_size)
+        # Bulk statements skip the flush events, the cascaded rows are forgotten here
+        for model, ids in deleted.items():
+            _invalidate_ids(model, ids)
+        return deleted
+
+    def snapshot(self, obj):
+        return self.repository.snapshot(obj)
+
+    def restore(self, snapshot):
+        return self.repository.restore(snapshot)
+
+
+class SnapshotCodec(Codec):
+    """Tiered cache codec for one object, kept as a repository snapshot and restored into the current session"""
+
+    def __init__(self, repository):
+        self.repository = repository
+
+    def dump(self, value):
+        return self.repository.snapshot(value)
+
+    def load(self, data):
+        return self.repository.restore(data)
+
+
+def init_app(app):
+    """Serve the requests that write (anything but GET, HEAD, OPTIONS) past the per-process caches"""
+    app.before_request(_begin_fresh_reads)
+    app.teardown_request(_end_fresh_reads)
+
+
+def _begin_fresh_reads():
+    # Existence and authorization checks of a write must not trust what this worker cached
+    # before another one deleted the row or changed its owner
+    if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        g.fresh_reads = bypass_local_caches()
+        g.fresh_reads.__enter__()
+
+
+def _end_fresh_reads(exc=None):
+    fresh_reads = g.pop('fresh_reads', None)
+    if fresh_reads is not None:
+        fresh_reads.__exit__(None, None, None)
+
+
+def _invalidate_ids(model, ids):
+    with _registry_lock:
+        repositories = list(_registry)
+    for repository in repositories:
+        if repository.model is not None and issubclass(model, repository.model):
+            for obj_id in ids:
+                repository.invalidate(obj_id)
+
+
+@event.listens_for(Session, 'after_flush')
+def _invalidate_flushed(session, flush_context):
+    changed = list(session.dirty) + list(session.deleted) + list(session.new)
+    if not changed:
+        return
+    with _registry_lock:
+        repositories = list(_registry)
+    for repository in repositories:
+        if repository.model is None:
+            continue
+        for obj in changed:
+            if isinstance(obj, repository.model):
+                repository.invalidate(obj.id, obj)
@@ -0,0 +1,155 @@
+# durable_log.py
+
+import glob
+import json
+import mmap
+import os
+import threading
+from datetime import datetime
+
+_SNAPSHOT = 'snapshot-{:08d}.ndjson'
+_SEGMENT = 'wal-{:08d}.ndjson'
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'$dt': value.isoformat()}
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def _decode(value):
+    if len(value) == 1 and '$dt' in value:
+        return datetime.fromisoformat(value['$dt'])
+    return value
+
+
+# Built once, json.dumps / json.loads build new ones on every call given options
+_encoder = json.JSONEncoder(default=_encode, separators=(',', ':'))
+_decoder = json.JSONDecoder(object_hook=_decode)
+
+
+def _dumps(record):
+    return _encoder.encode(record).encode('utf-8') + b'\n'
+
+
+def _loads(line):
+    return _decoder.decode(line.decode('utf-8'))
+
+
+def _number(path):
+    return int(os.path.basename(path).split('-')[1].split('.')[0])
+
+
+class DurableLog:
+    """
+    Write-ahead log and snapshots of an InMemoryRepository, kept in a directory.
+
+    Mutations are appended as NDJSON records, {"put": row} or {"delete": id},
+    to the current log segment wal-<n>. checkpoint(rows) starts segment n+1
+    and writes every row to snapshot-<n+1>, which therefore covers every
+    segment before n+1, then removes the older files. load() maps the
+    latest snapshot and replays the segments written after it; a record
+    torn by a crash in the middle of an append, up to its final newline,
+    is dropped.
+
+    Appends are flushed to the OS, so they survive a crash of the process;
+    fsync=True also syncs every append to disk.
+    """
+
+    def __init__(self, directory, fsync=False):
+        self.directory = directory
+        self.fsync = fsync
+        self.pending = 0
+        self._segment = None
+        self._file = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _files(self, pattern):
+        return sorted(glob.glob(os.path.join(self.directory, pattern)), key=_number)
+
+    def load(self):
+        """Yield the recorded operations in order, as ('put', row) or ('delete', id)"""
+        snapshots = self._files('snapshot-*.ndjson')
+        first_segment = 0
+        if snapshots:
+            first_segment = _number(snapshots[-1])
+            with open(snapshots[-1], 'rb') as snapshot:
+                if os.fstat(snapshot.fileno()).st_size:
+                    with mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        mapped.readline()  # header
+                        for line in iter(mapped.readline, b''):
+                            yield 'put', _loads(line)
+
+        segments = [path for path in self._files('wal-*.ndjson') if _number(path) >= first_segment]
+        for position, path in enumerate(segments):
+            valid_length = 0
+            with open(path, 'rb') as segment:
+                for line in segment:
+                    try:
+                        if not line.endswith(b'\n'):
+                            # The append stopped before its newline, even if the JSON is complete
+                            raise ValueError('Torn record')
+                        record = _loads(line)
+                    except ValueError:
+                        if position != len(segments) - 1:
+                            raise
+                        break
+                    valid_length += len(line)
+                    self.pending += 1
+                    yield ('put', record['put']) if 'put' in record else ('delete', record['delete'])
+            if valid_length != os.path.getsize(path):
+                # Torn last append, cut it so new records follow a complete line
+                os.truncate(path, valid_length)
+
+        self._open(max([first_segment] + [_number(path) for path in segments]))
+
+    def _open(self, segment):
+        if self._file is not None:
+            self._file.close()
+        self._segment = segment
+        self._file = open(os.path.join(self.directory, _SEGMENT.format(segment)), 'ab')
+
+    def _append(self, record):
+        with self._lock:
+            self._file.write(_dumps(record))
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.pending += 1
+
+    def put(self, row):
+        self._append({'put': row})
+
+    def delete(self, obj_id):
+        self._append({'delete': obj_id})
+
+    def checkpoint(self, rows):
+        """
+        Write rows, the state after every record appended so far, as the new
+        snapshot. No record may be appended until it returns.
+        """
+        with self._lock:
+            segment = self._segment + 1
+            self._open(segment)
+            path = os.path.join(self.directory, _SNAPSHOT.format(segment))
+            count = 0
+            with open(path + '.tmp', 'wb') as snapshot:
+                snapshot.write(_dumps({'segment': segment}))
+                for row in rows:
+                    snapshot.write(_dumps(row))
+                    count += 1
+                snapshot.flush()
+                os.fsync(snapshot.fileno())
+            os.replace(path + '.tmp', path)
+            for old in self._files('snapshot-*.ndjson') + self._files('wal-*.ndjson'):
+                if _number(old) < segment:
+                    os.remove(old)
+            self.pending = 0
+            return count
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -1,7 +1,123 @@
 # repository.py
 
+import base64
+import bisect
+import copy
+import json
 from abc import ABC, abstractmethod
+from datetime import datetime
+from operator import itemgetter
+from sqlalchemy import and_, or_, func, select, bindparam
+from sqlalchemy import inspect
+from sqlalchemy.orm import ONETOMANY, aliased, configure_mappers, joinedload, make_transient_to_detached
 from app.extensions import db
+from app.persistence.durable_log import DurableLog
+from app.persistence.rwlock import ReadWriteLock
+from app.persistence.unit_of_work import UnitOfWork
+
+
+# Sort orders are tuples of (attr_name, descending) pairs ending with the unique 'id'
+DEFAULT_ORDER = (('created_at', False), ('id', False))
+
+# Sort columns whose cursor values are stored as {'dt': isoformat}
+DATETIME_COLUMNS = ('created_at', 'updated_at')
+
+# Objects written per transaction by the bulk methods, per savepoint inside a unit of work
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def chunked(items, chunk_size):
+    items = list(items)
+    for start in range(0, len(items), chunk_size):
+        yield items[start:start + chunk_size]
+
+
+def encode_cursor(obj, order=DEFAULT_ORDER):
+    """Build an opaque cursor token pointing just after obj in the given sort order"""
+    return encode_cursor_values([getattr(obj, attr_name) for attr_name, _ in order])
+
+
+def encode_cursor_values(values):
+    """Build the cursor token of the sort values of the last item of a page"""
+    values = [{'dt': value.isoformat()} if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(values).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def _cursor_value(attr_name, value):
+    """Check a cursor value against the type of its sort column, raise ValueError if it does not match"""
+    if attr_name == 'id':
+        if not isinstance(value, str):
+            raise ValueError('Invalid cursor')
+        return value
+    if value is None:
+        return None
+    if attr_name in DATETIME_COLUMNS:
+        if not isinstance(value, dict) or not isinstance(value.get('dt'), str):
+            raise ValueError('Invalid cursor')
+        return datetime.fromisoformat(value['dt'])
+    # Other sort columns hold plain strings or numbers
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError('Invalid cursor')
+    return value
+
+
+def decode_cursor(cursor, order=DEFAULT_ORDER):
+    """Return the sort values stored in a cursor token, raise ValueError if malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(order):
+            raise ValueError('Invalid cursor')
+        return [_cursor_value(attr_name, value) for (attr_name, _), value in zip(order, values)]
+    except (TypeError, ValueError, KeyError, UnicodeError):
+        raise ValueError('Invalid cursor')
+
+
+def _sort_value(value):
+    # None sorts before any other value
+    return (value is not None, value)
+
+
+def _column_value(obj, column):
+    """Value of a projection column, 'relationship.attr' reads the related object of a many-to-one relationship"""
+    for attr_name in column.split('.'):
+        if obj is None:
+            return None
+        obj = getattr(obj, attr_name)
+    return obj
+
+
+def _related_ids(values):
+    return {getattr(value, 'id', value) for value in values or []}
+
+
+# Filters are (attr_name, operator, value) tuples, evaluated in Python by
+# InMemoryRepository and compiled to SQL by SQLAlchemyRepository.
+# 'has_all' / 'has_any' apply to relationships and compare the related ids.
+MEMORY_OPERATORS = {
+    'eq': lambda attr, value: attr == value,
+    'lte': lambda attr, value: attr is not None and attr <= value,
+    'gte': lambda attr, value: attr is not None and attr >= value,
+    'in': lambda attr, value: attr in value,
+    'has_all': lambda attr, value: set(value) <= _related_ids(attr),
+    'has_any': lambda attr, value: bool(set(value) & _related_ids(attr)),
+    'in_ranges': lambda attr, value: attr is not None and any(low <= attr <= high for low, high in value),
+}
+
+
+def _related_model(attr):
+    return attr.property.mapper.class_
+
+
+SQL_OPERATORS = {
+    'eq': lambda attr, value: attr == value,
+    'lte': lambda attr, value: attr <= value,
+    'gte': lambda attr, value: attr >= value,
+    'in': lambda attr, value: attr.in_(value),
+    'has_all': lambda attr, value: and_(*[attr.any(_related_model(attr).id == v) for v in value]),
+    'has_any': lambda attr, value: attr.any(_related_model(attr).id.in_(value)),
+    'in_ranges': lambda attr, value: or_(*[attr.between(low, high) for low, high in value]),
+}
 
 
 class Repository(ABC):
@@ -13,10 +129,34 @@ class Repository(ABC):
     def get(self, obj_id):
         pass
 
+    @abstractmethod
+    def get_many(self, obj_ids):
+        pass
+
     @abstractmethod
     def get_all(self):
         pass
 
+    @abstractmethod
+    def find(self, filters=(), relationships=(), order=()):
+        pass
+
+    @abstractmethod
+    def get_all_rows(self, columns, filters=(), order=()):
+        pass
+
+    @abstractmethod
+    def iter_rows(self, columns, filters=(), batch_size=1000):
+        pass
+
+    @abstractmethod
+    def page_rows(self, columns, limit, cursor=None, filters=(), order=DEFAULT_ORDER):
+        pass
+
+    @abstractmethod
+    def get_version(self, filters=()):
+        pass
+
     @abstractmethod
     def update(self, obj_id, data):
         pass
@@ -29,43 +169,368 @@ class Repository(ABC):
     def get_by_attribute(self, attr_name, attr_value):
         pass
 
+    @abstractmethod
+    def exists(self, **attributes):
+        pass
+
+    @abstractmethod
+    def bulk_add(self, objs, chunk_size=DEFAULT_CHUNK_SIZE):
+        pass
+
+    @abstractmethod
+    def bulk_update(self, updates, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Apply {obj_id: data} to the objects, ids that do not exist are skipped"""
+
+    @abstractmethod
+    def bulk_delete(self, obj_ids, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Delete the objects, return {model class: deleted ids} including the objects deleted by cascade"""
+
+    def snapshot(self, obj):
+        """Return a cacheable copy of obj, see restore()"""
+        return obj
+
+    def restore(self, snapshot):
+        """Rebuild an object from the value returned by snapshot()"""
+        return snapshot
+
 
 class InMemoryRepository(Repository):
-    def __init__(self):
+    """
+    Objects kept in a dict by id, with optional secondary indexes.
+
+    indexes names attributes looked up by equality (value -> ids),
+    sorted_indexes attributes also filtered by range (gte / lte /
+    in_ranges), kept as a sorted list of (value, id). Filters on an indexed
+    attribute only visit the matching objects. Indexes follow add(),
+    update() and delete(); an object changed in place without update() is
+    not reindexed.
+
+    A readers-writer lock lets many threads read while writes are
+    exclusive.
+
+    Given a path, the repository is durable: the column values of model
+    objects are written to a DurableLog there on every change, and read
+    back when the repository is created. A checkpoint is taken every
+    checkpoint_every changes, so a restart only replays the changes made
+    since.
+    """
+
+    def __init__(self, indexes=(), sorted_indexes=(), path=None, model=None, checkpoint_every=100000,
+                 fsync=False):
         self._storage = {}
+        # attr -> value -> ids, the inner dicts are insertion ordered sets
+        self._hash_indexes = {attr_name: {} for attr_name in indexes}
+        self._sorted_indexes = {attr_name: [] for attr_name in sorted_indexes}
+        # Values each object was indexed under, to unindex it after it changed
+        self._indexed_values = {}
+        self._lock = ReadWriteLock()
+        self.model = model
+        self.checkpoint_every = checkpoint_every
+        self._log = None
+        if path is not None:
+            if model is None:
+                raise ValueError('A durable repository needs the model to rebuild its objects')
+            self._columns = [column.key for column in inspect(model).column_attrs]
+            self._log = DurableLog(path, fsync)
+            self._recover()
 
-    def add(self, obj):
+    def _row(self, obj):
+        return {key: getattr(obj, key) for key in self._columns}
+
+    def _recover(self):
+        # Objects are built like the ORM builds loaded rows: without __init__ and attribute events
+        configure_mappers()
+        manager = inspect(self.model).class_manager
+        for operation, value in self._log.load():
+            if operation == 'put':
+                obj = manager.new_instance()
+                obj.__dict__.update(value)
+                self._storage[value['id']] = obj
+            else:
+                self._storage.pop(value, None)
+        self._rebuild_indexes()
+
+    def _rebuild_indexes(self):
+        """Index every stored object at once, cheaper than inserting them one by one"""
+        values = {attr_name: [] for attr_name in self._sorted_indexes}
+        for obj in self._storage.values():
+            self._indexed_values[obj.id] = {attr_name: getattr(obj, attr_name)
+                                            for attr_name in (*self._hash_indexes, *self._sorted_indexes)}
+        for obj_id, indexed in self._indexed_values.items():
+            for attr_name, index in self._hash_indexes.items():
+                index.setdefault(indexed[attr_name], {})[obj_id] = None
+            for attr_name in self._sorted_indexes:
+                values[attr_name].append((_sort_value(indexed[attr_name]), obj_id))
+        for attr_name, entries in values.items():
+            entries.sort()
+            self._sorted_indexes[attr_name] = entries
+
+    def checkpoint(self):
+        """Write every object to a new snapshot of the durable log, return how many"""
+        if self._log is None:
+            return 0
+        # Writers wait, readers go on
+        with self._lock.read():
+            return self._log.checkpoint(self._row(obj) for obj in self._storage.values())
+
+    def _maybe_checkpoint(self):
+        if self._log is not None and self._log.pending >= self.checkpoint_every:
+            self.checkpoint()
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+
+    def _index(self, obj):
+        values = {attr_name: getattr(obj, attr_name)
+                  for attr_name in (*self._hash_indexes, *self._sorted_indexes)}
+        for attr_name, index in self._hash_indexes.items():
+            index.setdefault(values[attr_name], {})[obj.id] = None
+        for attr_name, index in self._sorted_indexes.items():
+            bisect.insort(index, (_sort_value(values[attr_name]), obj.id))
+        self._indexed_values[obj.id] = values
+
+    def _unindex(self, obj_id):
+        values = self._indexed_values.pop(obj_id, None)
+        if values is None:
+            return
+        for attr_name, index in self._hash_indexes.items():
+            ids = index.get(values[attr_name])
+            ids.pop(obj_id, None)
+            if not ids:
+                del index[values[attr_name]]
+        for attr_name, index in self._sorted_indexes.items():
+            entry = (_sort_value(values[attr_name]), obj_id)
+            del index[bisect.bisect_left(index, entry)]
+
+    def _sorted_range(self, attr_name, low, high):
+        """Ids whose indexed value is between low and high (None for unbounded, None values excluded)"""
+        index = self._sorted_indexes[attr_name]
+        if low is None:
+            start = bisect.bisect_right(index, _sort_value(None), key=itemgetter(0))
+        else:
+            start = bisect.bisect_left(index, _sort_value(low), key=itemgetter(0))
+        stop = len(index) if high is None else bisect.bisect_right(index, _sort_value(high), key=itemgetter(0))
+        return [obj_id for _, obj_id in index[start:stop]]
+
+    def _indexed_ids(self, attr_name, operator, value):
+        """Ids matching one filter through an index, None when no index can answer it"""
+        if attr_name in self._hash_indexes and operator in ('eq', 'in'):
+            index = self._hash_indexes[attr_name]
+            values = [value] if operator == 'eq' else value
+            return [obj_id for v in values for obj_id in index.get(v, ())]
+        if attr_name in self._sorted_indexes:
+            if operator == 'eq' and value is not None:
+                return self._sorted_range(attr_name, value, value)
+            if operator == 'in_ranges':
+                return [obj_id for low, high in value for obj_id in self._sorted_range(attr_name, low, high)]
+        return None
+
+    def _candidate_ids(self, filters):
+        """The shortest list of ids an index gives for one of the filters, None when none is indexed"""
+        candidates = []
+        # gte / lte on the same sorted attribute make a single range
+        ranges = {}
+        for attr_name, operator, value in filters:
+            if attr_name in self._sorted_indexes and operator in ('gte', 'lte'):
+                low, high = ranges.get(attr_name, (None, None))
+                if operator == 'gte':
+                    low = value if low is None else max(low, value)
+                else:
+                    high = value if high is None else min(high, value)
+                ranges[attr_name] = (low, high)
+                continue
+            ids = self._indexed_ids(attr_name, operator, value)
+            if ids is not None:
+                candidates.append(ids)
+        candidates.extend(self._sorted_range(attr_name, low, high) for attr_name, (low, high) in ranges.items())
+        return min(candidates, key=len, default=None)
+
+    def _filtered(self, filters):
+        ids = self._candidate_ids(filters)
+        if ids is None:
+            objects = self._storage.values()
+        else:
+            objects = [self._storage[obj_id] for obj_id in dict.fromkeys(ids)]
+        # Every filter is still checked, cheap on the narrowed down objects
+        for attr_name, operator, value in filters:
+            predicate = MEMORY_OPERATORS[operator]
+            objects = [obj for obj in objects if predicate(getattr(obj, attr_name), value)]
+        return list(objects)
+
+    def _put(self, obj):
+        if self._log is not None:
+            self._log.put(self._row(obj))
+        self._unindex(obj.id)
         self._storage[obj.id] = obj
+        self._index(obj)
+
+    def add(self, obj):
+        with self._lock.write():
+            self._put(obj)
+        self._maybe_checkpoint()
+
+    def bulk_add(self, objs, chunk_size=DEFAULT_CHUNK_SIZE):
+        objs = list(objs)
+        # Readers get a turn between chunks
+        for chunk in chunked(objs, chunk_size):
+            with self._lock.write():
+                for obj in chunk:
+                    self._put(obj)
+        self._maybe_checkpoint()
+        return objs
 
     def get(self, obj_id):
-        obj = self._storage.get(obj_id)
-        return obj
+        with self._lock.read():
+            return self._storage.get(obj_id)
+
+    def get_many(self, obj_ids):
+        with self._lock.read():
+            found = [self._storage[obj_id] for obj_id in obj_ids if obj_id in self._storage]
+            missing = [obj_id for obj_id in obj_ids if obj_id not in self._storage]
+        return found, missing
 
     def get_all(self):
-        return list(self._storage.values())
+        with self._lock.read():
+            return list(self._storage.values())
 
-    def update(self, obj_id, data):
-        obj = self.get(obj_id)
-        if obj:
+    def _sorted(self, objects, order):
+        objects = list(objects)
+        for attr_name, descending in reversed(order):
+            objects.sort(key=lambda obj: _sort_value(getattr(obj, attr_name)), reverse=descending)
+        return objects
+
+    def find(self, filters=(), relationships=(), order=()):
+        with self._lock.read():
+            objects = self._filtered(filters)
+        return self._sorted(objects, order)
+
+    def get_all_rows(self, columns, filters=(), order=()):
+        with self._lock.read():
+            objects = self._filtered(filters)
+        if order:
+            objects = self._sorted(objects, order)
+        return [tuple(_column_value(obj, column) for column in columns) for obj in objects]
+
+    def iter_rows(self, columns, filters=(), batch_size=1000):
+        return iter(self.get_all_rows(columns, filters))
+
+    def page_rows(self, columns, limit, cursor=None, filters=(), order=DEFAULT_ORDER):
+        def comes_after(obj, cursor_values):
+            for (attr_name, descending), cursor_value in zip(order, cursor_values):
+                value, other = _sort_value(getattr(obj, attr_name)), _sort_value(cursor_value)
+                if value != other:
+                    return value < other if descending else value > other
+            return False
+
+        with self._lock.read():
+            objects = self._filtered(filters)
+        objects = self._sorted(objects, order)
+        if cursor:
+            cursor_values = decode_cursor(cursor, order)
+            try:
+                objects = [obj for obj in objects if comes_after(obj, cursor_values)]
+            except TypeError:
+                # A number where the column holds strings, or the reverse
+                raise ValueError('Invalid cursor')
+
+        items = objects[:limit]
+        next_cursor = encode_cursor(items[-1], order) if len(objects) > limit else None
+        return [tuple(_column_value(obj, column) for column in columns) for obj in items], next_cursor
+
+    def get_version(self, filters=()):
+        with self._lock.read():
+            objects = self._filtered(filters)
+        timestamps = [obj.updated_at for obj in objects if obj.updated_at]
+        return len(objects), max(timestamps) if timestamps else None
+
+    def _update(self, obj_id, data):
+        obj = self._storage.get(obj_id)
+        if not obj:
+            return
+        previous = self._row(obj) if self._log is not None else None
+        self._unindex(obj_id)
+        try:
             obj.update(data)
+            if self._log is not None:
+                self._log.put(self._row(obj))
+        except BaseException:
+            # Not logged, so not applied either
+            if previous is not None:
+                for key, value in previous.items():
+                    setattr(obj, key, value)
+            raise
+        finally:
+            self._index(obj)
+
+    def update(self, obj_id, data):
+        with self._lock.write():
+            self._update(obj_id, data)
+        self._maybe_checkpoint()
+
+    def bulk_update(self, updates, chunk_size=DEFAULT_CHUNK_SIZE):
+        for chunk in chunked(dict(updates).items(), chunk_size):
+            with self._lock.write():
+                for obj_id, data in chunk:
+                    self._update(obj_id, data)
+        self._maybe_checkpoint()
+
+    def _remove(self, obj_id):
+        obj = self._storage.get(obj_id)
+        if obj is None:
+            return None
+        if self._log is not None:
+            self._log.delete(obj_id)
+        self._unindex(obj_id)
+        del self._storage[obj_id]
+        return obj
 
     def delete(self, obj_id):
-        if obj_id in self._storage:
-            del self._storage[obj_id]
+        with self._lock.write():
+            self._remove(obj_id)
+        self._maybe_checkpoint()
+
+    def bulk_delete(self, obj_ids, chunk_size=DEFAULT_CHUNK_SIZE):
+        # Related objects are not cascaded, each object is only in its own repository
+        deleted = {}
+        for chunk in chunked(dict.fromkeys(obj_ids), chunk_size):
+            with self._lock.write():
+                for obj_id in chunk:
+                    obj = self._remove(obj_id)
+                    if obj is not None:
+                        deleted.setdefault(type(obj), []).append(obj_id)
+        self._maybe_checkpoint()
+        return deleted
 
     def get_by_attribute(self, attr_name, attr_value):
-        return next((obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value), None)
-    
+        with self._lock.read():
+            ids = self._indexed_ids(attr_name, 'eq', attr_value)
+            objects = self._storage.values() if ids is None else [self._storage[obj_id] for obj_id in ids]
+            return next((obj for obj in objects if getattr(obj, attr_name) == attr_value), None)
+
+    def exists(self, **attributes):
+        filters = [(name, 'eq', value) for name, value in attributes.items()]
+        with self._lock.read():
+            return bool(self._filtered(filters))
+
 class SQLAlchemyRepository(Repository):
     def __init__(self, model):
         self.model = model
 
     def add(self, obj):
-        db.session.add(obj)
-        db.session.commit()
+        with UnitOfWork():
+            db.session.add(obj)
 
     def get(self, obj_id):
         return self.model.query.get(obj_id)
+
+    def get_many(self, obj_ids):
+        """Fetch several objects with one IN (...) query, return them with the ids that were not found"""
+        obj_ids = list(obj_ids)
+        by_id = {obj.id: obj for obj in self.model.query.filter(self.model.id.in_(set(obj_ids))).all()} if obj_ids else {}
+        found = [by_id[obj_id] for obj_id in obj_ids if obj_id in by_id]
+        missing = [obj_id for obj_id in obj_ids if obj_id not in by_id]
+        return found, missing
     
     def get_user_by_mail(self, email):
         return self.model.query.filter_by(email=email).first()
@@ -73,18 +538,210 @@ class SQLAlchemyRepository(Repository):
     def get_all(self):
         return self.model.query.all()
 
+    def _query(self, filters=(), relationships=()):
+        query = self.model.query.options(*[joinedload(getattr(self.model, name)) for name in relationships])
+        for attr_name, operator, value in filters:
+            query = query.filter(SQL_OPERATORS[operator](getattr(self.model, attr_name), value))
+        return query
+
+    def _order_by(self, order):
+        columns = [getattr(self.model, attr_name) for attr_name, _ in order]
+        return [column.desc() if descending else column.asc() for column, (_, descending) in zip(columns, order)]
+
+    def find(self, filters=(), relationships=(), order=()):
+        """Return every object matching the filters, computed by the database"""
+        return self._query(filters, relationships).order_by(*self._order_by(order)).all()
+
+    def _row_query(self, columns, filters=()):
+        """
+        Query of the columns only. A 'relationship.attr' column is read
+        through an outer join of that many-to-one relationship, None when
+        there is no related row.
+        """
+        joined = {}
+        entities = []
+        for column in columns:
+            relationship, _, attr_name = column.rpartition('.')
+            if relationship and relationship not in joined:
+                joined[relationship] = aliased(_related_model(getattr(self.model, relationship)))
+            entities.append(getattr(joined[relationship] if relationship else self.model, attr_name))
+        query = db.session.query(*entities).select_from(self.model)
+        for relationship, alias in joined.items():
+            query = query.outerjoin(getattr(self.model, relationship).of_type(alias))
+        for attr_name, operator, value in filters:
+            query = query.filter(SQL_OPERATORS[operator](getattr(self.model, attr_name), value))
+        return query
+
+    def get_all_rows(self, columns, filters=(), order=()):
+        """Return plain tuples of the requested columns without building model instances"""
+        query = self._row_query(columns, filters).order_by(*self._order_by(order))
+        return [tuple(row) for row in query.all()]
+
+    def iter_rows(self, columns, filters=(), batch_size=1000):
+        """Like get_all_rows, but rows are fetched from the cursor batch_size at a time"""
+        for row in self._row_query(columns, filters).yield_per(batch_size):
+            yield tuple(row)
+
+    def _after_cursor(self, query, cursor, order):
+        if not cursor:
+            return query
+        cursor_values = decode_cursor(cursor, order)
+        # Keyset condition: (a, b, id) comes after (x, y, z) in lexicographic order
+        clauses = []
+        for i, (attr_name, descending) in enumerate(order):
+            column = getattr(self.model, attr_name)
+            equal = [getattr(self.model, name) == value for (name, _), value in zip(order[:i], cursor_values)]
+            step = column < cursor_values[i] if descending else column > cursor_values[i]
+            clauses.append(and_(*equal, step))
+        return query.filter(or_(*clauses))
+
+    def page_rows(self, columns, limit, cursor=None, filters=(), order=DEFAULT_ORDER):
+        """Return up to limit tuples of the requested columns in the given order and the cursor of the next page"""
+        # The sort columns are read after them to build the next cursor
+        query = self._row_query(list(columns) + [attr_name for attr_name, _ in order], filters)
+        rows = self._after_cursor(query, cursor, order).order_by(*self._order_by(order)).limit(limit + 1).all()
+
+        next_cursor = encode_cursor_values(rows[limit - 1][len(columns):]) if len(rows) > limit else None
+        return [tuple(row[:len(columns)]) for row in rows[:limit]], next_cursor
+
+    def get_version(self, filters=()):
+        """Return (row count, latest updated_at) of the matching rows, used to build collection ETags"""
+        query = db.session.query(func.count(self.model.id), func.max(self.model.updated_at))
+        for attr_name, operator, value in filters:
+            query = query.filter(SQL_OPERATORS[operator](getattr(self.model, attr_name), value))
+        count, updated_at = query.one()
+        return count, updated_at
+
     def update(self, obj_id, data):
         obj = self.get(obj_id)
         if obj:
-            for key, value in data.items():
-                setattr(obj, key, value)
-            db.session.commit()
+            with UnitOfWork():
+                for key, value in data.items():
+                    setattr(obj, key, value)
 
     def delete(self, obj_id):
         obj = self.get(obj_id)
         if obj:
-            db.session.delete(obj)
-            db.session.commit()
+            with UnitOfWork():
+                db.session.delete(obj)
 
     def get_by_attribute(self, attr_name, attr_value):
-        return self.model.query.filter(getattr(self.model, attr_name) == attr_value).first()
\ No newline at end of file
+        return self.model.query.filter(getattr(self.model, attr_name) == attr_value).first()
+
+    def snapshot(self, obj):
+        # ORM instances are bound to the session of the request that loaded them,
+        # so only their column values are kept
+        return {column.key: getattr(obj, column.key) for column in inspect(self.model).column_attrs}
+
+    def restore(self, snapshot):
+        """Attach a copy of the cached row to the current session without querying the database"""
+        obj = self.model(**copy.deepcopy(snapshot))
+        make_transient_to_detached(obj)
+        return db.session.merge(obj, load=False)
+
+    def exists(self, **attributes):
+        """Check for a matching row without loading it, answered from an index when one covers the attributes"""
+        return db.session.query(self.model.query.filter_by(**attributes).exists()).scalar()
+
+    def _insert_values(self, obj):
+        """Column values of obj for a Core INSERT, the Python side column defaults are applied to obj first"""
+        values = {}
+        for column_attr in inspect(self.model).column_attrs:
+            column = column_attr.columns[0]
+            value = getattr(obj, column_attr.key)
+            if value is None and column.default is not None:
+                if column.default.is_callable:
+                    value = column.default.arg(None)
+                elif column.default.is_scalar:
+                    value = copy.deepcopy(column.default.arg)
+                setattr(obj, column_attr.key, value)
+            values[column.key] = value
+        return values
+
+    def _link_rows(self, obj):
+        """Rows of the association tables for the many-to-many collections set on obj"""
+        mapper = inspect(self.model)
+        for relationship in mapper.relationships:
+            if relationship.secondary is None or not obj.__dict__.get(relationship.key):
+                continue
+            local = {link.key: getattr(obj, mapper.get_property_by_column(column).key)
+                     for column, link in relationship.synchronize_pairs}
+            for related in obj.__dict__[relationship.key]:
+                remote = {link.key: getattr(related, relationship.mapper.get_property_by_column(column).key)
+                          for column, link in relationship.secondary_synchronize_pairs}
+                yield relationship.secondary, {**local, **remote}
+
+    def bulk_add(self, objs, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Insert the objects with one executemany INSERT per table and one
+        transaction per chunk. The objects are not attached to the session.
+        """
+        objs = list(objs)
+        for chunk in chunked(objs, chunk_size):
+            rows = [self._insert_values(obj) for obj in chunk]
+            links = {}
+            for obj in chunk:
+                for table, row in self._link_rows(obj):
+                    links.setdefault(table, []).append(row)
+            with UnitOfWork():
+                db.session.execute(self.model.__table__.insert(), rows)
+                for table, link_rows in links.items():
+                    db.session.execute(table.insert(), link_rows)
+        return objs
+
+    def bulk_update(self, updates, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Apply {obj_id: data} with one executemany UPDATE per set of changed
+        columns and one transaction per chunk. Only columns can be changed.
+        """
+        table = self.model.__table__
+        columns = {column_attr.key: column_attr.columns[0].key for column_attr in inspect(self.model).column_attrs}
+        for chunk in chunked(dict(updates).items(), chunk_size):
+            now = datetime.utcnow()
+            groups = {}
+            for obj_id, data in chunk:
+                values = {key: value for key, value in data.items() if key not in ('id', 'created_at', 'updated_at')}
+                unknown = set(values) - set(columns)
+                if unknown:
+                    raise ValueError(f"Only columns can be bulk updated, not {', '.join(sorted(unknown))}")
+                row = {columns[key]: value for key, value in values.items()}
+                row['updated_at'] = now
+                groups.setdefault(tuple(sorted(row)), []).append({'_id': obj_id, **row})
+            with UnitOfWork():
+                for keys, rows in groups.items():
+                    statement = table.update().where(table.c.id == bindparam('_id')).values(
+                        {key: bindparam(key) for key in keys})
+                    db.session.execute(statement, rows)
+
+    def bulk_delete(self, obj_ids, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Delete the objects with DELETE ... WHERE id IN (...) and one
+        transaction per chunk. The rows the ORM cascades would delete
+        (delete-cascaded children, association rows) are deleted first.
+        """
+        deleted = {}
+        for chunk in chunked(dict.fromkeys(obj_ids), chunk_size):
+            with UnitOfWork():
+                _delete_rows(self.model, chunk, deleted, chunk_size)
+        return deleted
+
+
+def _delete_rows(model, ids, deleted, chunk_size):
+    """Delete the rows of model with these ids and what cascades from them, record the ids in deleted"""
+    table = model.__table__
+    ids = db.session.execute(select(table.c.id).where(table.c.id.in_(ids))).scalars().all()
+    if not ids:
+        return
+    for relationship in inspect(model).relationships:
+        if relationship.secondary is not None:
+            for _, link in relationship.synchronize_pairs:
+                db.session.execute(relationship.secondary.delete().where(link.in_(ids)))
+        elif relationship.direction is ONETOMANY and relationship.cascade.delete:
+            child = relationship.mapper.class_
+            for _, foreign_key in relationship.synchronize_pairs:
+                child_ids = db.session.execute(
+                    select(child.__table__.c.id).where(foreign_key.in_(ids))).scalars().all()
+                for child_chunk in chunked(child_ids, chunk_size):
+                    _delete_rows(child, child_chunk, deleted, chunk_size)
+    db.session.execute(table.delete().where(table.c.id.in_(ids)))
+    deleted.setdefault(model, []).extend(ids)
@@ -0,0 +1,141 @@
+# unit_of_work.py
+
+import functools
+from flask import g, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.extensions import db
+
+# Keys of the session's info dict
+_DEPTH = 'unit_of_work_depth'
+_ON_END = 'unit_of_work_on_end'
+
+
+class UnitOfWork:
+    """
+    One transaction around several repository writes.
+
+    The repositories run every write in a unit of work: on its own it
+    commits at once, like before. Inside another unit of work it becomes a
+    SAVEPOINT instead, so the writes are only flushed and the outermost
+    unit commits them all at the end, with a single commit. A nested unit
+    that fails rolls back to its savepoint and leaves the enclosing
+    transaction usable; the outermost one that fails rolls back everything.
+
+    Use it as a context manager, committing on a clean exit and rolling
+    back on an exception, or call begin() / commit() / rollback().
+    """
+
+    def __init__(self):
+        self._session = None
+        self._savepoint = None
+        self._open = False
+
+    def begin(self):
+        self._session = db.session()
+        depth = self._session.info.get(_DEPTH, 0)
+        if depth:
+            self._savepoint = self._session.begin_nested()
+        self._session.info[_DEPTH] = depth + 1
+        self._open = True
+        return self
+
+    def commit(self):
+        try:
+            if self._savepoint is not None:
+                self._savepoint.commit()
+            else:
+                self._session.commit()
+        except BaseException:
+            self.rollback()
+            raise
+        self._end()
+
+    def rollback(self):
+        if not self._open:
+            return
+        try:
+            if self._savepoint is not None:
+                # Also when a failed flush already deactivated it, the session stays unusable until then
+                self._savepoint.rollback()
+            else:
+                self._session.rollback()
+        finally:
+            self._end()
+
+    def _end(self):
+        if not self._open:
+            return
+        self._open = False
+        depth = self._session.info.get(_DEPTH, 1) - 1
+        self._session.info[_DEPTH] = depth
+        if not depth:
+            for callback in self._session.info.pop(_ON_END, []):
+                callback()
+
+    def __enter__(self):
+        return self.begin()
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+
+def transactional(func):
+    """Run func in a unit of work, so the writes it makes are committed together or not at all"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with UnitOfWork():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def in_unit_of_work():
+    """Whether the writes made now are only committed when an enclosing unit of work ends"""
+    return has_app_context() and db.session().info.get(_DEPTH, 0) > 0
+
+
+def on_unit_of_work_end(callback):
+    """Call callback once the outermost unit of work has committed or rolled back, at once if none is open"""
+    if in_unit_of_work():
+        db.session().info.setdefault(_ON_END, []).append(callback)
+    else:
+        callback()
+
+
+def init_app(app):
+    """Run every request in a unit of work, committed once if it succeeds, rolled back if it fails"""
+    app.before_request(_begin_request)
+    app.after_request(_end_request)
+    app.teardown_request(_abort_request)
+
+
+def _begin_request():
+    g.unit_of_work = UnitOfWork().begin()
+
+
+def _end_request(response):
+    unit_of_work = g.pop('unit_of_work', None)
+    if unit_of_work is not None:
+        if response.status_code < 400:
+            unit_of_work.commit()
+        else:
+            unit_of_work.rollback()
+    return response
+
+
+def _abort_request(exc=None):
+    # An exception skipped _end_request
+    unit_of_work = g.pop('unit_of_work', None)
+    if unit_of_work is not None:
+        unit_of_work.rollback()
+
+
+@event.listens_for(Engine, 'savepoint')
+def _begin_before_savepoint(conn, name):
+    # pysqlite only opens a transaction before DML, so a SAVEPOINT sent first
+    # would start one itself and releasing it would commit
+    if conn.dialect.name == 'sqlite' and not conn.connection.dbapi_connection.in_transaction:
+        conn.exec_driver_sql('BEGIN')
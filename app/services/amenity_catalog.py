@@ -0,0 +1,74 @@
+# amenity_catalog.py
+
+import json
+import threading
+import time
+from app.cache.shared_snapshot import SharedSnapshot
+from app.models.catalog_version import CatalogVersion
+
+CATALOG_NAME = 'amenities'
+
+
+class AmenityCatalog:
+    """
+    Amenity list shared by the workers through a memory-mapped snapshot.
+
+    The catalog's version lives in the database (catalog_versions). A worker
+    checks it at most every check_interval seconds, and maps the snapshot
+    again only when it moved; the first worker to see a new version
+    rebuilds the file from the database for the others.
+    """
+
+    def __init__(self, path, check_interval=1.0, clock=time.monotonic):
+        self.snapshot = SharedSnapshot(path)
+        self.check_interval = check_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._version = None
+        self._items = None
+        self._ids = frozenset()
+        self._checked_at = None
+        self.reloads = 0
+
+    def _fresh(self):
+        return (self._items is not None and self._checked_at is not None
+                and self._clock() - self._checked_at < self.check_interval)
+
+    def items(self, load_rows, recheck=False):
+        """
+        Return (version, [{'id', 'name'}, ...]) in the order of load_rows(),
+        which returns (id, name) rows from the database. recheck=True reads
+        the version even when it was checked less than check_interval ago.
+        """
+        with self._lock:
+            if self._fresh() and not recheck:
+                return self._version, self._items
+            version = CatalogVersion.current(CATALOG_NAME)
+            if version is None:
+                # Never written, start counting so workers agree on a version
+                CatalogVersion.bump(CATALOG_NAME)
+                version = CatalogVersion.current(CATALOG_NAME)
+            self._checked_at = self._clock()
+            if version != self._version:
+                mapped_version, payload = self.snapshot.read()
+                if mapped_version != version:
+                    payload = json.dumps([list(row) for row in load_rows()]).encode('utf-8')
+                    self.snapshot.write(version, payload)
+                self._items = [{'id': amenity_id, 'name': name} for amenity_id, name in json.loads(payload)]
+                self._ids = frozenset(item['id'] for item in self._items)
+                self._version = version
+                self.reloads += 1
+            return self._version, self._items
+
+    def version(self, load_rows):
+        return self.items(load_rows)[0]
+
+    def ids(self, load_rows, recheck=False):
+        self.items(load_rows, recheck)
+        return self._ids
+
+    def bump(self):
+        """Record a write to the amenities, every worker reloads on its next check"""
+        CatalogVersion.bump(CATALOG_NAME)
+        with self._lock:
+            self._checked_at = None
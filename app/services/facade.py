@@ -1,74 +1,402 @@
 # facade.py
 
-from app.persistence.repository import SQLAlchemyRepository
+import threading
+import time
+from flask import current_app, g, has_app_context
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
+from app.persistence.repository import SQLAlchemyRepository, DEFAULT_ORDER, DEFAULT_CHUNK_SIZE
+from app.persistence.caching_repository import CachingRepository, SnapshotCodec
+from app.persistence.unit_of_work import transactional, in_unit_of_work, on_unit_of_work_end
+from app.cache.bloom import BloomFilter
+from app.cache.tiered import cached
 from app.models.user import User
 from app.models.place import Place
 from app.models.review import Review
 from app.models.amenity import Amenity
+from app.services.geo import geo_cell, bbox_filters, radius_bbox, nearest
+
+# Sort orders available for review listings
+REVIEW_SORTS = {
+    'recent': (('created_at', True), ('id', True)),
+    'rating': (('rating', True), ('created_at', True), ('id', True)),
+}
+
+# Columns of the listing rows, plain tuples built without ORM instances.
+# 'relationship.attr' columns come from the related row, None without one.
+USER_ROW = ('id', 'first_name', 'last_name', 'email')
+AMENITY_ROW = ('id', 'name')
+PLACE_ROW = ('id', 'title', 'description', 'price', 'latitude', 'longitude', 'owner_id', 'amenities')
+PLACE_WITH_OWNER_ROW = PLACE_ROW + tuple(f'place_owner.{column}' for column in USER_ROW)
+REVIEW_ROW = ('id', 'text', 'rating', 'user_id', 'place_id')
+REVIEW_WITH_PLACE_ROW = REVIEW_ROW + ('place.title',)
+
+
+class DuplicateReviewError(ValueError):
+    """Raised when a user reviews the same place twice"""
+
+
+class DuplicateEmailError(ValueError):
+    """Raised when an email is already registered to another user"""
+
+
+def _place_listing_tags(*args, **kwargs):
+    # Listings embed the owners and can be filtered by amenity
+    return ['places', 'users', 'amenities']
+
+
+def _in_background(target, *args):
+    threading.Thread(target=target, args=args, daemon=True).start()
+
 
 class HBnBFacade:
-    def __init__(self):
-        self.user_repo = SQLAlchemyRepository(User)
-        self.place_repo = SQLAlchemyRepository(Place)
-        self.review_repo = SQLAlchemyRepository(Review)
-        self.amenity_repo = SQLAlchemyRepository(Amenity)
+    def __init__(self, repository_cache=None, response_cache=None, email_filter=None, amenity_catalog=None,
+                 tiered_cache=None):
+        repository_cache = repository_cache or {}
+        self.response_cache = response_cache
+        self.tiered_cache = tiered_cache
+        self.amenity_catalog = amenity_catalog
+        self.email_filter_settings = email_filter
+        self._emails = None
+        self._pending_emails = None
+        self._emails_lock = threading.Lock()
+        # Starts the email filter rebuilds, tests swap it for a synchronous call
+        self.run_in_background = _in_background
+        self.user_repo = self._make_repository(User, repository_cache.get('user'), 'users')
+        self.place_repo = self._make_repository(Place, repository_cache.get('place'), 'places')
+        self.review_repo = self._make_repository(Review, repository_cache.get('review'), 'reviews')
+        self.amenity_repo = self._make_repository(Amenity, repository_cache.get('amenity'), 'amenities')
+        self.cache_codecs = {
+            'user': SnapshotCodec(self.user_repo),
+            'place': SnapshotCodec(self.place_repo),
+            'review': SnapshotCodec(self.review_repo),
+            'amenity': SnapshotCodec(self.amenity_repo),
+        }
+
+    def _make_repository(self, model, cache_settings, tag):
+        repository = SQLAlchemyRepository(model)
+        if cache_settings:
+            # Every write to the model bumps tag in the shared stores, see _invalidate()
+            shared_versions = self.response_cache
+            if shared_versions is None and self.tiered_cache is not None:
+                shared_versions = self.tiered_cache.l2
+            return CachingRepository(repository, shared_versions=shared_versions, version_tag=tag, **cache_settings)
+        return repository
+
+    def _identity_map(self):
+        """Objects already looked up during the current request, keyed by (kind, key)"""
+        if not has_app_context():
+            return None
+        if 'hbnb_identity_map' not in g:
+            g.hbnb_identity_map = {}
+        return g.hbnb_identity_map
+
+    def _lookup(self, kind, key, loader):
+        identity_map = self._identity_map()
+        if identity_map is None:
+            return loader(key)
+        if (kind, key) not in identity_map:
+            identity_map[(kind, key)] = loader(key)
+        return identity_map[(kind, key)]
+
+    def clear_identity_map(self, exc=None):
+        """Forget the request's lookups, called at teardown and after every write"""
+        if has_app_context():
+            g.pop('hbnb_identity_map', None)
+
+    def _invalidate(self, *tags):
+        """Drop the cached responses and data built from the written data, in every worker"""
+        self._drop_tags(tags)
+        if in_unit_of_work():
+            # Until it ends, readers may cache the rows it has not committed yet or rolls back
+            on_unit_of_work_end(lambda: self._drop_tags(tags))
+
+    def _drop_tags(self, tags):
+        if self.response_cache is not None:
+            self.response_cache.invalidate(tags)
+        if self.tiered_cache is not None:
+            self.tiered_cache.invalidate(tags)
+
+    def cache_stats(self):
+        """Hit, miss and eviction counters of the repository caches, and the tiered cache hit ratios"""
+        repositories = {'user': self.user_repo, 'place': self.place_repo,
+                        'review': self.review_repo, 'amenity': self.amenity_repo}
+        stats = {name: repo.stats() for name, repo in repositories.items() if isinstance(repo, CachingRepository)}
+        if self.tiered_cache is not None:
+            stats['tiered'] = self.tiered_cache.stats()
+        return stats
 
     # User methods
-    def create_user(self, user_data):
+    @staticmethod
+    def _check_user(user_data):
         if not isinstance(user_data.get('first_name'), str) or not (1 <= len(user_data.get('first_name', '')) <= 50):
             raise ValueError('First_name must be a string between 1 and 50 characters')
         if not isinstance(user_data.get('last_name'), str) or not (1 <= len(user_data.get('last_name', '')) <= 50):
             raise ValueError('Last_name must be a string between 1 and 50 characters')
-        
+
+    @transactional
+    def create_user(self, user_data):
+        self._check_user(user_data)
+
         user = User(**user_data)
         user.hash_password(user_data["password"])
 
-        self.user_repo.add(user)
+        try:
+            self.user_repo.add(user)
+        except IntegrityError:
+            # The unique email index caught a registration the availability check missed
+            raise DuplicateEmailError('Email already registered')
+        self.clear_identity_map()
+        self._remember_email(user.email)
         return user
 
     def get_user(self, user_id):
+        return self._lookup('user', user_id, self._load_user)
+
+    @cached('user', tags=lambda user_id: [f'user:{user_id}'], codec='user')
+    def _load_user(self, user_id):
         return self.user_repo.get(user_id)
-    
-    def get_all_users(self):
-        return self.user_repo.get_all()
+
+    def get_user_rows(self):
+        return self.user_repo.get_all_rows(USER_ROW)
+
+    def get_user_rows_page(self, limit, cursor=None):
+        return self.user_repo.page_rows(USER_ROW, limit, cursor)
+
+    def get_users_version(self):
+        return self.user_repo.get_version()
 
     def get_user_by_email(self, email):
-        return self.user_repo.get_by_attribute('email', email)
+        user = self._lookup('user_email', email, lambda key: self.user_repo.get_by_attribute('email', key))
+        identity_map = self._identity_map()
+        if user is not None and identity_map is not None:
+            identity_map.setdefault(('user', user.id), user)
+        return user
     
+    def is_email_available(self, email):
+        """Check no user has this email, without a query when the Bloom filter has never seen it"""
+        emails = self._email_filter()
+        if emails is not None and email not in emails:
+            return True
+        return self.get_user_by_email(email) is None
+
+    def _email_filter(self):
+        """The Bloom filter of registered emails, built on first use and rebuilt in the background when old"""
+        if not self.email_filter_settings:
+            return None
+        with self._emails_lock:
+            if self._emails is None:
+                self._emails = self._build_email_filter()
+                return self._emails
+            emails = self._emails
+            rebuild = (time.monotonic() - emails.built_at > self.email_filter_settings['rebuild_interval']
+                       and self._pending_emails is None)
+            if rebuild:
+                self._pending_emails = []
+        if rebuild:
+            # Deleted emails only leave the filter when it is rebuilt
+            self.run_in_background(self._rebuild_email_filter, current_app._get_current_object())
+        return emails
+
+    def _build_email_filter(self):
+        settings = self.email_filter_settings
+        count, _ = self.user_repo.get_version()
+        emails = BloomFilter(max(settings['capacity'], 2 * count), settings['error_rate'])
+        for (email,) in self.user_repo.iter_rows(['email']):
+            emails.add(email)
+        return emails
+
+    def _rebuild_email_filter(self, app):
+        try:
+            with app.app_context():
+                emails = self._build_email_filter()
+            with self._emails_lock:
+                # Emails registered while the rows were being streamed
+                for email in self._pending_emails:
+                    emails.add(email)
+                self._emails = emails
+        except Exception:
+            app.logger.exception('Rebuilding the email filter failed')
+        finally:
+            with self._emails_lock:
+                self._pending_emails = None
+
+    def _remember_email(self, email):
+        with self._emails_lock:
+            if self._emails is not None:
+                self._emails.add(email)
+            if self._pending_emails is not None:
+                self._pending_emails.append(email)
+
+    @transactional
     def update_user(self, user_id, user_data):
-        self.user_repo.update(user_id, user_data)
+        try:
+            self.user_repo.update(user_id, user_data)
+        except IntegrityError:
+            raise DuplicateEmailError('Email already registered')
+        self.clear_identity_map()
+        if user_data.get('email'):
+            self._remember_email(user_data['email'])
+        self._invalidate('users', f'user:{user_id}')
         updated_user = self.get_user(user_id)
         return updated_user
     
+    @transactional
     def delete_user(self, user_id):
         print(f"Deleting User: {user_id} ")
+        place_ids = [place_id for (place_id,) in self.place_repo.get_all_rows(['id'], [('owner_id', 'eq', user_id)])]
+        reviews = self.review_repo.get_all_rows(['id', 'place_id'], [('user_id', 'eq', user_id)])
         self.user_repo.delete(user_id)
+        self.clear_identity_map()
+        # Their places and reviews went with them
+        self._invalidate('users', f'user:{user_id}', 'places', 'reviews',
+                         *self._place_tags(place_ids + [place_id for _, place_id in reviews]),
+                         *[f'review:{review_id}' for review_id, _ in reviews])
+
+    def bulk_create_users(self, users_data, chunk_size=DEFAULT_CHUNK_SIZE):
+        users = []
+        for user_data in users_data:
+            self._check_user(user_data)
+            user = User(**user_data)
+            user.hash_password(user_data["password"])
+            users.append(user)
+        try:
+            self.user_repo.bulk_add(users, chunk_size)
+        except IntegrityError:
+            raise DuplicateEmailError('Email already registered')
+        self.clear_identity_map()
+        for user in users:
+            self._remember_email(user.email)
+        self._invalidate('users')
+        return users
+
+    def bulk_update_users(self, updates, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Apply {user_id: user_data}, like update_user the passwords must already be hashed"""
+        try:
+            self.user_repo.bulk_update(updates, chunk_size)
+        except IntegrityError:
+            raise DuplicateEmailError('Email already registered')
+        self.clear_identity_map()
+        for user_data in updates.values():
+            if user_data.get('email'):
+                self._remember_email(user_data['email'])
+        self._invalidate('users', *[f'user:{user_id}' for user_id in updates])
+
+    def bulk_delete_users(self, user_ids, chunk_size=DEFAULT_CHUNK_SIZE):
+        user_ids = list(user_ids)
+        reviews = self.review_repo.get_all_rows(['id', 'place_id'], [('user_id', 'in', user_ids)])
+        deleted = self.user_repo.bulk_delete(user_ids, chunk_size)
+        self.clear_identity_map()
+        # Their places and reviews went with them
+        self._invalidate('users', *[f'user:{user_id}' for user_id in deleted.get(User, [])], 'places', 'reviews',
+                         *self._place_tags(deleted.get(Place, []) + [place_id for _, place_id in reviews]),
+                         *[f'review:{review_id}' for review_id in deleted.get(Review, [])])
+        return deleted.get(User, [])
 
     # Amenity methods
-    def create_amenity(self, amenity_data):
+    @staticmethod
+    def _check_amenity(amenity_data):
         if not isinstance(amenity_data.get('name'), str) or not (1 <= len(amenity_data.get("name", "")) <= 50):
             raise ValueError('Name must be between 1 and 50 characters')
-        
+
+    @transactional
+    def create_amenity(self, amenity_data):
+        self._check_amenity(amenity_data)
+
         amenity = Amenity(**amenity_data)
         self.amenity_repo.add(amenity)
+        self.clear_identity_map()
+        self._amenities_changed()
         return amenity
 
     def get_amenity(self, amenity_id):
+        return self._lookup('amenity', amenity_id, self._load_amenity)
+
+    @cached('amenity', tags=lambda amenity_id: ['amenities'], codec='amenity')
+    def _load_amenity(self, amenity_id):
         return self.amenity_repo.get(amenity_id)
 
-    def get_all_amenities(self):
-        return self.amenity_repo.get_all()
+    def get_amenities(self, amenity_ids):
+        """Return the amenities with the given ids and the list of ids that do not exist"""
+        return self.amenity_repo.get_many(amenity_ids)
+
+    def get_missing_amenity_ids(self, amenity_ids):
+        """Return the ids that are not amenities, only querying the ids the shared catalog does not know"""
+        if self.amenity_catalog is not None:
+            # Version checked now, an amenity another worker just deleted must not be attached
+            known = self.amenity_catalog.ids(self._amenity_rows, recheck=True)
+            amenity_ids = [amenity_id for amenity_id in amenity_ids if amenity_id not in known]
+            if not amenity_ids:
+                return []
+        _, missing_ids = self.amenity_repo.get_many(amenity_ids)
+        return missing_ids
+
+    def _amenity_rows(self):
+        return self.amenity_repo.get_all_rows(['id', 'name'], order=DEFAULT_ORDER)
+
+    def get_amenity_catalog_version(self):
+        if self.amenity_catalog is not None:
+            return self.amenity_catalog.version(self._amenity_rows)
+        return self.amenity_repo.get_version()
+
+    def get_amenity_catalog(self):
+        """Return every amenity as an {'id', 'name'} dict, from the shared snapshot when enabled"""
+        if self.amenity_catalog is not None:
+            return self.amenity_catalog.items(self._amenity_rows)[1]
+        return [{'id': amenity_id, 'name': name} for amenity_id, name in self._amenity_rows()]
+
+    def _amenities_changed(self):
+        self._invalidate('amenities')
+        if self.amenity_catalog is not None:
+            self.amenity_catalog.bump()
+
+    def get_amenity_rows_page(self, limit, cursor=None):
+        return self.amenity_repo.page_rows(AMENITY_ROW, limit, cursor)
 
+    def get_amenities_version(self):
+        return self.amenity_repo.get_version()
+
+    @transactional
     def update_amenity(self, amenity_id, amenity_data):
         self.amenity_repo.update(amenity_id, amenity_data)
+        self.clear_identity_map()
+        self._amenities_changed()
 
+    @transactional
     def delete_amenity(self, amenity_id):
         print(f"Deliting Amenity: {amenity_id} ")
         self.amenity_repo.delete(amenity_id)
+        self.clear_identity_map()
+        # Places listing it lose it
+        self._amenities_changed()
+        self._invalidate('places')
+
+    def bulk_create_amenities(self, amenities_data, chunk_size=DEFAULT_CHUNK_SIZE):
+        for amenity_data in amenities_data:
+            self._check_amenity(amenity_data)
+        amenities = self.amenity_repo.bulk_add([Amenity(**amenity_data) for amenity_data in amenities_data],
+                                               chunk_size)
+        self.clear_identity_map()
+        self._amenities_changed()
+        return amenities
+
+    def bulk_update_amenities(self, updates, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.amenity_repo.bulk_update(updates, chunk_size)
+        self.clear_identity_map()
+        self._amenities_changed()
+
+    def bulk_delete_amenities(self, amenity_ids, chunk_size=DEFAULT_CHUNK_SIZE):
+        deleted = self.amenity_repo.bulk_delete(amenity_ids, chunk_size)
+        self.clear_identity_map()
+        # Places listing them lose them
+        self._amenities_changed()
+        self._invalidate('places')
+        return deleted.get(Amenity, [])
 
 
     # Place methods
-    def create_place(self, place_data):
+    @staticmethod
+    def _check_place(place_data):
         if not isinstance(place_data.get('price'), (int, float)) or not (1 <= place_data.get("price") <= 1000000):
             raise ValueError('Price must be a number')
         if not isinstance(place_data.get('latitude'), (int, float)) or not (-90 <= place_data.get("latitude") <= 90):
@@ -80,60 +408,309 @@ class HBnBFacade:
         if not isinstance(place_data.get('description'), str) or not (1 <= len(place_data.get("description", "")) <= 500):
             raise ValueError('Description must be between 1 and 500 characters')
 
+    @transactional
+    def create_place(self, place_data):
+        self._check_place(place_data)
+
         place = Place(
             title=place_data['title'],
             description=place_data.get('description', ''),
             price=place_data['price'],
             latitude=place_data['latitude'],
             longitude=place_data['longitude'],
+            geo_cell=geo_cell(place_data['latitude'], place_data['longitude']),
             owner_id=place_data['owner_id'],
-            amenities= place_data['amenities']
+            amenities= place_data['amenities'],
         )
         self.place_repo.add(place)
+        # Linked once the place is in the session: the savepoint opened by add() flushes the
+        # amenities first, and their backref to a place outside the session would be dropped
+        place.amenities_obj = self._get_amenity_objects(place_data['amenities'])
+        self.clear_identity_map()
+        self._invalidate('places')
         return place
 
     def get_place(self, place_id):
+        return self._lookup('place', place_id, self._load_place)
+
+    @cached('place', tags=lambda place_id: [f'place:{place_id}'], codec='place')
+    def _load_place(self, place_id):
         return self.place_repo.get(place_id)
 
-    def get_all_places(self):
-        return self.place_repo.get_all()
+    @cached('place_rows', tags=_place_listing_tags)
+    def get_place_rows(self, criteria=None):
+        """Rows of PLACE_WITH_OWNER_ROW columns of the places matching the search criteria"""
+        return self.place_repo.get_all_rows(PLACE_WITH_OWNER_ROW, self._place_filters(criteria))
+
+    @cached('place_rows_page', tags=_place_listing_tags)
+    def get_place_rows_page(self, limit, cursor=None, criteria=None):
+        return self.place_repo.page_rows(PLACE_WITH_OWNER_ROW, limit, cursor, self._place_filters(criteria))
+
+    def get_places_version(self, criteria=None):
+        return self.place_repo.get_version(self._place_filters(criteria))
+
+    def _place_filters(self, criteria):
+        """Translate the place search criteria into repository filters"""
+        criteria = criteria or {}
+        filters = []
+        if criteria.get('min_price') is not None:
+            filters.append(('price', 'gte', criteria['min_price']))
+        if criteria.get('max_price') is not None:
+            filters.append(('price', 'lte', criteria['max_price']))
+        if criteria.get('owner_id'):
+            filters.append(('owner_id', 'eq', criteria['owner_id']))
+        if criteria.get('amenities'):
+            operator = 'has_any' if criteria.get('amenities_match') == 'any' else 'has_all'
+            filters.append(('amenities_obj', operator, list(criteria['amenities'])))
+        return filters
+
+    def _get_amenity_objects(self, amenity_ids):
+        amenities, _ = self.get_amenities(amenity_ids or [])
+        return amenities
 
+    def get_place_rows_by_owner(self, owner_id):
+        return self.place_repo.get_all_rows(PLACE_ROW, [('owner_id', 'eq', owner_id)], DEFAULT_ORDER)
+
+    def get_place_rows_by_owner_page(self, owner_id, limit, cursor=None):
+        return self.place_repo.page_rows(PLACE_ROW, limit, cursor, [('owner_id', 'eq', owner_id)])
+
+    def get_places_by_owner_version(self, owner_id):
+        return self.place_repo.get_version([('owner_id', 'eq', owner_id)])
+
+    def search_place_rows_in_bbox(self, bbox, limit, cursor=None):
+        return self.place_repo.page_rows(PLACE_WITH_OWNER_ROW, limit, cursor, bbox_filters(*bbox))
+
+    def search_places_near(self, latitude, longitude, radius_km, limit):
+        """Return the closest places within radius_km as (place, distance_km) pairs"""
+        candidates = self.place_repo.get_all_rows(
+            ('id', 'latitude', 'longitude'), bbox_filters(*radius_bbox(latitude, longitude, radius_km)))
+        ranked = nearest(candidates, latitude, longitude, radius_km, limit)
+        if not ranked:
+            return []
+
+        places = {place.id: place for place in self.place_repo.find(
+            [('id', 'in', [place_id for place_id, _ in ranked])], relationships=('place_owner',))}
+        return [(places[place_id], distance) for place_id, distance in ranked if place_id in places]
+
+    @transactional
     def update_place(self, place_id, place_data):
+        if 'amenities' in place_data:
+            place_data = dict(place_data, amenities_obj=self._get_amenity_objects(place_data['amenities']))
+        if 'latitude' in place_data or 'longitude' in place_data:
+            place = self.get_place(place_id)
+            latitude = place_data.get('latitude', place.latitude if place else None)
+            longitude = place_data.get('longitude', place.longitude if place else None)
+            if isinstance(latitude, (int, float)) and isinstance(longitude, (int, float)):
+                place_data = dict(place_data, geo_cell=geo_cell(latitude, longitude))
         self.place_repo.update(place_id, place_data)
+        self.clear_identity_map()
+        self._invalidate('places', f'place:{place_id}')
         updated_place = self.get_place(place_id)
         return updated_place
 
+    @transactional
     def delete_place(self, place_id):
         print(f"Deleting Place: {place_id}")
+        review_ids = [review_id for (review_id,)
+                      in self.review_repo.get_all_rows(['id'], [('place_id', 'eq', place_id)])]
         self.place_repo.delete(place_id)
+        self.clear_identity_map()
+        # Its reviews went with it
+        self._invalidate('places', *self._place_tags([place_id]),
+                         *[f'review:{review_id}' for review_id in review_ids])
+
+    def bulk_create_places(self, places_data, chunk_size=DEFAULT_CHUNK_SIZE):
+        for place_data in places_data:
+            self._check_place(place_data)
+        # One query for the amenities of every place
+        amenities, _ = self.get_amenities(list(dict.fromkeys(
+            amenity_id for place_data in places_data for amenity_id in place_data.get('amenities') or [])))
+        amenities = {amenity.id: amenity for amenity in amenities}
+        places = []
+        for place_data in places_data:
+            place = Place(
+                title=place_data['title'],
+                description=place_data.get('description', ''),
+                price=place_data['price'],
+                latitude=place_data['latitude'],
+                longitude=place_data['longitude'],
+                geo_cell=geo_cell(place_data['latitude'], place_data['longitude']),
+                owner_id=place_data['owner_id'],
+                amenities=place_data.get('amenities') or [],
+            )
+            # Set without the backref events, the amenities' own collections are not loaded
+            set_committed_value(place, 'amenities_obj', [amenities[amenity_id] for amenity_id
+                                                         in place.amenities if amenity_id in amenities])
+            places.append(place)
+        self.place_repo.bulk_add(places, chunk_size)
+        self.clear_identity_map()
+        self._invalidate('places')
+        return places
+
+    def bulk_update_places(self, updates, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Apply {place_id: place_data}, the amenities of a place can only be changed by update_place"""
+        if any('amenities' in place_data for place_data in updates.values()):
+            raise ValueError('Amenities cannot be bulk updated')
+        updates = {place_id: dict(place_data) for place_id, place_data in updates.items()}
+        moved = [place_id for place_id, place_data in updates.items()
+                 if 'latitude' in place_data or 'longitude' in place_data]
+        if moved:
+            positions = {place_id: (latitude, longitude) for place_id, latitude, longitude
+                         in self.place_repo.get_all_rows(['id', 'latitude', 'longitude'], [('id', 'in', moved)])}
+            for place_id in moved:
+                place_data = updates[place_id]
+                latitude, longitude = positions.get(place_id, (None, None))
+                latitude = place_data.get('latitude', latitude)
+                longitude = place_data.get('longitude', longitude)
+                if isinstance(latitude, (int, float)) and isinstance(longitude, (int, float)):
+                    place_data['geo_cell'] = geo_cell(latitude, longitude)
+        self.place_repo.bulk_update(updates, chunk_size)
+        self.clear_identity_map()
+        self._invalidate('places', *[f'place:{place_id}' for place_id in updates])
+
+    def bulk_delete_places(self, place_ids, chunk_size=DEFAULT_CHUNK_SIZE):
+        deleted = self.place_repo.bulk_delete(place_ids, chunk_size)
+        self.clear_identity_map()
+        # Their reviews went with them
+        self._invalidate('places', 'reviews', *self._place_tags(deleted.get(Place, [])),
+                         *[f'review:{review_id}' for review_id in deleted.get(Review, [])])
+        return deleted.get(Place, [])
+
+    @staticmethod
+    def _place_tags(place_ids):
+        """Tags of a place and of its reviews"""
+        return [tag for place_id in dict.fromkeys(place_ids)
+                for tag in (f'place:{place_id}', f'place_reviews:{place_id}')]
 
     # Review methods
+    @staticmethod
+    def _check_review(review_data):
+        if not isinstance(review_data.get('rating'), int) or not (1 <= review_data['rating'] <= 5):
+            raise ValueError('Rating must be an integer between 1 and 5')
+        if not isinstance(review_data.get('text'), str) or not (1 <= len(review_data.get("text", "")) <= 500):
+            raise ValueError('Text must be between 1 and 500 characters')
+
+    @transactional
     def create_review(self, review_data):
         if not self.get_user(review_data.get('user_id')):
             raise ValueError('User does not exist')
         if not self.get_place(review_data.get('place_id')):
             raise ValueError('Place does not exist')
-        if not isinstance(review_data.get('rating'), int) or not (1 <= review_data['rating'] <= 5):
-            raise ValueError('Rating must be an integer between 1 and 5')
-        if not isinstance(review_data.get('text'), str) or not (1 <= len(review_data.get("text", "")) <= 500):
-            raise ValueError('Text must be between 1 and 500 characters')
+        self._check_review(review_data)
 
         review = Review(**review_data)
-        self.review_repo.add(review)
+        try:
+            self.review_repo.add(review)
+            self.clear_identity_map()
+        except IntegrityError:
+            # The unique (user_id, place_id) index caught a concurrent duplicate
+            raise DuplicateReviewError('You already reviewed this place.')
+        self._invalidate('reviews', f'place_reviews:{review.place_id}')
         return review
 
+    def review_exists(self, user_id, place_id):
+        return self.review_repo.exists(user_id=user_id, place_id=place_id)
+
     def get_review(self, review_id):
+        return self._lookup('review', review_id, self._load_review)
+
+    @cached('review', tags=lambda review_id: [f'review:{review_id}'], codec='review')
+    def _load_review(self, review_id):
         return self.review_repo.get(review_id)
 
-    def get_all_reviews(self):
-        return self.review_repo.get_all()
+    def get_review_rows(self):
+        return self.review_repo.get_all_rows(REVIEW_ROW)
+
+    def get_review_rows_page(self, limit, cursor=None):
+        return self.review_repo.page_rows(REVIEW_ROW, limit, cursor)
+
+    def get_reviews_version(self):
+        return self.review_repo.get_version()
+
+    def get_reviews_by_place_version(self, place_id):
+        return self.review_repo.get_version([('place_id', 'eq', place_id)])
 
-    def get_reviews_by_place(self, place_id):
-        return [review for review in self.review_repo.get_all() if review.place_id == place_id]
+    def get_reviews_by_user_version(self, user_id):
+        return self.review_repo.get_version([('user_id', 'eq', user_id)])
 
+    @cached('place_review_rows', tags=lambda place_id, *args, **kwargs: [f'place_reviews:{place_id}'])
+    def get_review_rows_by_place(self, place_id, sort='recent'):
+        return self.review_repo.get_all_rows(REVIEW_ROW, [('place_id', 'eq', place_id)], self.review_order(sort))
+
+    @cached('place_review_rows_page', tags=lambda place_id, *args, **kwargs: [f'place_reviews:{place_id}'])
+    def get_review_rows_by_place_page(self, place_id, limit, cursor=None, sort='recent'):
+        return self.review_repo.page_rows(REVIEW_ROW, limit, cursor, [('place_id', 'eq', place_id)],
+                                          self.review_order(sort))
+
+    def get_review_rows_by_user(self, user_id):
+        """Rows of REVIEW_WITH_PLACE_ROW columns, newest first"""
+        return self.review_repo.get_all_rows(REVIEW_WITH_PLACE_ROW, [('user_id', 'eq', user_id)],
+                                             REVIEW_SORTS['recent'])
+
+    def get_review_rows_by_user_page(self, user_id, limit, cursor=None):
+        return self.review_repo.page_rows(REVIEW_WITH_PLACE_ROW, limit, cursor, [('user_id', 'eq', user_id)],
+                                          REVIEW_SORTS['recent'])
+
+    def review_order(self, sort):
+        """Sort order of a review listing, raise ValueError for an unknown sort"""
+        if sort not in REVIEW_SORTS:
+            raise ValueError(f"Sort must be one of: {', '.join(REVIEW_SORTS)}")
+        return REVIEW_SORTS[sort]
+
+    @transactional
     def update_review(self, review_id, review_data):
+        review = self.get_review(review_id)
+        place_ids = {review.place_id if review else None, review_data.get('place_id')}
         self.review_repo.update(review_id, review_data)
+        self.clear_identity_map()
+        self._invalidate('reviews', f'review:{review_id}',
+                         *[f'place_reviews:{place_id}' for place_id in place_ids if place_id])
 
+    @transactional
     def delete_review(self, review_id):
         print(f"Deleting Review: {review_id}")
-        self.review_repo.delete(review_id)
\ No newline at end of file
+        review = self.get_review(review_id)
+        place_id = review.place_id if review else None
+        self.review_repo.delete(review_id)
+        self.clear_identity_map()
+        self._invalidate('reviews', f'review:{review_id}', f'place_reviews:{place_id}')
+
+    def bulk_create_reviews(self, reviews_data, chunk_size=DEFAULT_CHUNK_SIZE):
+        _, missing_users = self.user_repo.get_many(
+            list(dict.fromkeys(review_data.get('user_id') for review_data in reviews_data)))
+        if missing_users:
+            raise ValueError('User does not exist')
+        _, missing_places = self.place_repo.get_many(
+            list(dict.fromkeys(review_data.get('place_id') for review_data in reviews_data)))
+        if missing_places:
+            raise ValueError('Place does not exist')
+        for review_data in reviews_data:
+            self._check_review(review_data)
+
+        try:
+            reviews = self.review_repo.bulk_add([Review(**review_data) for review_data in reviews_data], chunk_size)
+        except IntegrityError:
+            raise DuplicateReviewError('You already reviewed this place.')
+        self.clear_identity_map()
+        self._invalidate('reviews', *[f'place_reviews:{place_id}'
+                                      for place_id in dict.fromkeys(review.place_id for review in reviews)])
+        return reviews
+
+    def bulk_update_reviews(self, updates, chunk_size=DEFAULT_CHUNK_SIZE):
+        place_ids = [place_id for _, place_id in self.review_repo.get_all_rows(
+            ['id', 'place_id'], [('id', 'in', list(updates))])]
+        place_ids += [review_data['place_id'] for review_data in updates.values() if review_data.get('place_id')]
+        self.review_repo.bulk_update(updates, chunk_size)
+        self.clear_identity_map()
+        self._invalidate('reviews', *[f'review:{review_id}' for review_id in updates],
+                         *[f'place_reviews:{place_id}' for place_id in dict.fromkeys(place_ids)])
+
+    def bulk_delete_reviews(self, review_ids, chunk_size=DEFAULT_CHUNK_SIZE):
+        review_ids = list(review_ids)
+        place_ids = [place_id for _, place_id in self.review_repo.get_all_rows(
+            ['id', 'place_id'], [('id', 'in', review_ids)])]
+        deleted = self.review_repo.bulk_delete(review_ids, chunk_size)
+        self.clear_identity_map()
+        self._invalidate('reviews', *[f'review:{review_id}' for review_id in deleted.get(Review, [])],
+                         *[f'place_reviews:{place_id}' for place_id in dict.fromkeys(place_ids)])
+        return deleted.get(Review, [])
@@ -0,0 +1,111 @@
+# geo.py
+
+"""
+Grid based spatial key for places.
+
+The globe is cut in square cells of GEO_CELL_DEGREES. Cells are numbered
+row by row starting from the south west corner, so all the cells of one
+latitude row form a contiguous range of integers that a B-tree index on
+Place.geo_cell can scan directly.
+"""
+
+import math
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+GEO_CELL_DEGREES = 0.1
+GEO_COLUMNS = int(round(360 / GEO_CELL_DEGREES))
+GEO_ROWS = int(round(180 / GEO_CELL_DEGREES))
+
+# Above this many latitude rows a single coarse range is cheaper than one range per row
+MAX_ROW_RANGES = 64
+
+
+def _row(latitude):
+    return min(int((latitude + 90) / GEO_CELL_DEGREES), GEO_ROWS - 1)
+
+
+def _column(longitude):
+    return min(int((longitude + 180) / GEO_CELL_DEGREES), GEO_COLUMNS - 1)
+
+
+def geo_cell(latitude, longitude):
+    """Return the grid cell containing the given coordinates"""
+    return _row(latitude) * GEO_COLUMNS + _column(longitude)
+
+
+def parse_bbox(value):
+    """Parse a 'min_lon,min_lat,max_lon,max_lat' string, raise ValueError if invalid"""
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in value.split(','))
+    except (AttributeError, ValueError):
+        raise ValueError('bbox must be min_lon,min_lat,max_lon,max_lat')
+    if not (-180 <= min_lon <= max_lon <= 180):
+        raise ValueError('bbox longitudes must be between -180 and 180 with min_lon <= max_lon')
+    if not (-90 <= min_lat <= max_lat <= 90):
+        raise ValueError('bbox latitudes must be between -90 and 90 with min_lat <= max_lat')
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def bbox_cell_ranges(min_lon, min_lat, max_lon, max_lat):
+    """Return the (first, last) geo_cell ranges covering a bounding box"""
+    first_row, last_row = _row(min_lat), _row(max_lat)
+    first_column, last_column = _column(min_lon), _column(max_lon)
+
+    if last_row - first_row + 1 > MAX_ROW_RANGES:
+        # Superset of the box, the exact coordinate filter trims it afterwards
+        return [(first_row * GEO_COLUMNS + first_column, last_row * GEO_COLUMNS + last_column)]
+
+    return [(row * GEO_COLUMNS + first_column, row * GEO_COLUMNS + last_column)
+            for row in range(first_row, last_row + 1)]
+
+
+def bbox_filters(min_lon, min_lat, max_lon, max_lat):
+    """Build the repository filters selecting the places inside a bounding box"""
+    return [
+        ('geo_cell', 'in_ranges', bbox_cell_ranges(min_lon, min_lat, max_lon, max_lat)),
+        ('latitude', 'gte', min_lat),
+        ('latitude', 'lte', max_lat),
+        ('longitude', 'gte', min_lon),
+        ('longitude', 'lte', max_lon),
+    ]
+
+
+def radius_bbox(latitude, longitude, radius_km):
+    """Return the bounding box enclosing a circle, widened to all longitudes near the poles or the antimeridian"""
+    lat_delta = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = max(latitude - lat_delta, -90.0), min(latitude + lat_delta, 90.0)
+
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if cos_lat <= 1e-9:
+        return -180.0, min_lat, 180.0, max_lat
+    lon_delta = radius_km / (KM_PER_DEGREE * cos_lat)
+    min_lon, max_lon = longitude - lon_delta, longitude + lon_delta
+    if min_lon < -180 or max_lon > 180:
+        min_lon, max_lon = -180.0, 180.0
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def haversine_km(latitude, longitude, latitudes, longitudes):
+    """Great circle distances from one point to arrays of points, computed in a single pass"""
+    lat1, lon1 = np.radians(latitude), np.radians(longitude)
+    lat2, lon2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def nearest(rows, latitude, longitude, radius_km, limit):
+    """Rank (id, latitude, longitude) rows by distance, return the closest (id, distance_km) pairs within the radius"""
+    if not rows:
+        return []
+    table = np.array(rows, dtype=object)
+    ids = table[:, 0]
+    distances = haversine_km(latitude, longitude, table[:, 1].astype(float), table[:, 2].astype(float))
+
+    inside = np.flatnonzero(distances <= radius_km)
+    if len(inside) > limit:
+        inside = inside[np.argpartition(distances[inside], limit - 1)[:limit]]
+    order = inside[np.argsort(distances[inside], kind='stable')]
+    return [(ids[i], float(distances[i])) for i in order]
@@ -61,7 +61,8 @@ document.addEventListener('DOMContentLoaded', function () {
             const newReview = await response.json();
             console.log('Review submitted:', newReview);
 
-            fetchReviews();
+            // The list and its paging belong to fetch_place_details.js
+            window.reloadReviews();
 
             // Clear the form
             reviewText.value = '';
@@ -71,67 +72,4 @@ document.addEventListener('DOMContentLoaded', function () {
             console.error('Error submitting review:', error);
         }
     });
-
-    async function fetchReviews() {
-        const token = getCookie('jwt_token');
-
-        try {
-            const response = await fetch(`/api/v1/reviews/places/${placeId}/reviews`, {
-                method: 'GET',
-                headers: {
-                    'Authorization': `Bearer ${token}`
-                }
-            });
-
-            console.log('Reviews response status:', response.status);  // Debugging log
-
-            if (!response.ok) {
-                console.error('Failed to fetch reviews');
-                return;
-            }
-
-            const reviews = await response.json();
-            console.log('Reviews:', reviews); // Debugging log
-            renderReviews(reviews);
-
-        } catch (error) {
-            console.error('Error fetching reviews:', error);
-        }
-    }
-
-    function renderReviews(reviews) {
-        const reviewListSection = document.getElementById('review-list');
-        reviewListSection.innerHTML = '';
-        if (reviews.length === 0) {
-            const noReviews = document.createElement('p');
-            noReviews.textContent = 'No reviews available for this place.';
-            reviewListSection.appendChild(noReviews);
-        } else {
-            reviews.forEach(review => {
-                const reviewCard = document.createElement('div');
-                reviewCard.classList.add('review-card');
-
-                // const placeName = document.createElement('p');
-                // reviewerName.innerHTML = `<strong>${review.place_name}</strong>`;
-
-                const reviewerName = document.createElement("p");
-                reviewerName.innerHTML = `<strong>${review.user_id}</strong>`;
-
-                const reviewText = document.createElement('p');
-                reviewText.textContent = review.text;
-
-                const reviewRating = document.createElement('p');
-                reviewRating.innerHTML = `<strong>Rating:</strong> ${'★'.repeat(review.rating)}${'☆'.repeat(5 - review.rating)}`;
-                
-                // reviewCard.appendChild(placeName);
-                reviewCard.appendChild(reviewerName);
-                reviewCard.appendChild(reviewText);
-                reviewCard.appendChild(reviewRating);
-
-                reviewListSection.appendChild(reviewCard);
-            });
-        }
-    }
-
-    fetchReviews();
 });
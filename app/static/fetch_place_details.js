@@ -85,6 +85,18 @@ document.addEventListener('DOMContentLoaded', function () {
         placeDetailsSection.appendChild(placeCard);
     }
 
+    const REVIEWS_PAGE_SIZE = 50;
+
+    // Button loading the next page of reviews, shown while the API returns a next_cursor
+    const loadMoreReviewsButton = document.createElement('button');
+    loadMoreReviewsButton.textContent = 'Show more reviews';
+    loadMoreReviewsButton.classList.add('details-button');
+    loadMoreReviewsButton.style.display = 'none';
+    reviewListSection.after(loadMoreReviewsButton);
+
+    let reviews = [];
+    let nextReviewsCursor = null;
+
     // Function to render reviews
     function renderReviews(reviews) {
         reviewListSection.innerHTML = '';
@@ -98,7 +110,9 @@ document.addEventListener('DOMContentLoaded', function () {
                 reviewCard.classList.add('review-card');
 
                 const reviewerName = document.createElement('p');
-                reviewerName.innerHTML = `<strong>${review.place_name}</strong>`;
+                const reviewer = document.createElement('strong');
+                reviewer.textContent = review.user_id;
+                reviewerName.appendChild(reviewer);
 
                 const reviewText = document.createElement('p');
                 reviewText.textContent = review.text;
@@ -115,8 +129,8 @@ document.addEventListener('DOMContentLoaded', function () {
         }
     }
 
-    // Function to fetch reviews
-    async function fetchReviews() {
+    // Function to fetch one page of reviews, newest first
+    async function fetchReviews(cursor) {
         const token = getCookie('jwt_token');
         const placeId = getQueryParam('id');
 
@@ -126,7 +140,11 @@ document.addEventListener('DOMContentLoaded', function () {
         }
 
         try {
-            const response = await fetch(`/api/v1/reviews/places/${placeId}/reviews`, {
+            const params = new URLSearchParams({ limit: REVIEWS_PAGE_SIZE, sort: 'recent' });
+            if (cursor) {
+                params.set('cursor', cursor);
+            }
+            const response = await fetch(`/api/v1/reviews/places/${placeId}/reviews?${params}`, {
                 method: 'GET',
                 headers: token ? { 'Authorization': `Bearer ${token}` } : {}
             });
@@ -138,7 +156,10 @@ document.addEventListener('DOMContentLoaded', function () {
                 return;
             }
 
-            const reviews = await response.json();
+            const page = await response.json();
+            reviews = reviews.concat(page.items);
+            nextReviewsCursor = page.next_cursor;
+            loadMoreReviewsButton.style.display = nextReviewsCursor ? '' : 'none';
             console.log('Reviews:', reviews);  // Log the reviews data
             renderReviews(reviews);
 
@@ -147,6 +168,17 @@ document.addEventListener('DOMContentLoaded', function () {
         }
     }
 
+    loadMoreReviewsButton.addEventListener('click', function () {
+        fetchReviews(nextReviewsCursor);
+    });
+
+    // Drop the loaded reviews and fetch the first page again, used by add_review.js
+    function reloadReviews() {
+        reviews = [];
+        nextReviewsCursor = null;
+        fetchReviews();
+    }
+
     // Check if the user is authenticated and show the review form if true
     function checkAuthentication() {
         const token = getCookie('jwt_token');
@@ -161,4 +193,7 @@ document.addEventListener('DOMContentLoaded', function () {
     fetchPlaceDetails();
     fetchReviews();
     checkAuthentication();
+
+    // Expose the reloadReviews function globally
+    window.reloadReviews = reloadReviews;
 });
@@ -1,11 +1,13 @@
 document.addEventListener('DOMContentLoaded', function () {
     const priceFilter = document.getElementById('price-filter');
 
+    // Filtering happens on the server so only matching places are downloaded
     priceFilter.addEventListener('change', function () {
-        const selectedPrice = Number(priceFilter.value);
-        const filteredPlaces = window.allPlaces.filter(place => {
-            return selectedPrice === '' || place.price <= selectedPrice;
-        });
-        window.renderPlaces(filteredPlaces);
+        if (priceFilter.value === '') {
+            delete window.placeFilters.max_price;
+        } else {
+            window.placeFilters.max_price = Number(priceFilter.value);
+        }
+        window.reloadPlaces();
     });
 });
@@ -4,6 +4,11 @@ document.addEventListener('DOMContentLoaded', function () {
     // Store places globally so they can be accessed by filter_by_country.js
     window.allPlaces = [];
 
+    const PAGE_SIZE = 50;
+
+    // Server side filters applied to every page, set by filter_by_price.js
+    window.placeFilters = {};
+
     // Function to get a cookie by name
     function getCookie(name) {
         const value = `; ${document.cookie}`;
@@ -11,11 +16,24 @@ document.addEventListener('DOMContentLoaded', function () {
         if (parts.length === 2) return parts.pop().split(';').shift();
     }
 
-    // Function to fetch places
-    async function fetchPlaces() {
+    // Button loading the next page of places, shown while the API returns a next_cursor
+    const loadMoreButton = document.createElement('button');
+    loadMoreButton.textContent = 'Show more places';
+    loadMoreButton.classList.add('details-button');
+    loadMoreButton.style.display = 'none';
+    placesList.after(loadMoreButton);
+
+    let nextCursor = null;
+
+    // Function to fetch one page of places
+    async function fetchPlaces(cursor) {
 
         try {
-            const response = await fetch('/api/v1/places/', {
+            const params = new URLSearchParams({ limit: PAGE_SIZE, ...window.placeFilters });
+            if (cursor) {
+                params.set('cursor', cursor);
+            }
+            const response = await fetch(`/api/v1/places/?${params}`, {
                 method: 'GET'
             });
 
@@ -24,9 +42,11 @@ document.addEventListener('DOMContentLoaded', function () {
                 return;
             }
 
-            const places = await response.json();
-            window.allPlaces = places; // Store the fetched places globally
-            renderPlaces(places);
+            const page = await response.json();
+            window.allPlaces = window.allPlaces.concat(page.items); // Store the fetched places globally
+            nextCursor = page.next_cursor;
+            loadMoreButton.style.display = nextCursor ? '' : 'none';
+            renderPlaces(window.allPlaces);
 
         } catch (error) {
             console.error('Error fetching places:', error);
@@ -72,8 +92,20 @@ document.addEventListener('DOMContentLoaded', function () {
         });
     }
 
+    loadMoreButton.addEventListener('click', function () {
+        fetchPlaces(nextCursor);
+    });
+
+    // Drop the loaded places and fetch the first page again with the current filters
+    function reloadPlaces() {
+        window.allPlaces = [];
+        nextCursor = null;
+        fetchPlaces();
+    }
+
     fetchPlaces();
 
-    // Expose the renderPlaces function globally
+    // Expose the renderPlaces and reloadPlaces functions globally
     window.renderPlaces = renderPlaces;
+    window.reloadPlaces = reloadPlaces;
 });
@@ -53,8 +53,11 @@ document.addEventListener("DOMContentLoaded", function () {
           const reviewCard = document.createElement("div");
           reviewCard.classList.add("review-card");
 
+          // The place title is user input, set as text so it is never parsed as HTML
           const reviewerName = document.createElement("p");
-          reviewerName.innerHTML = `<strong>${review.id}</strong>`;
+          const placeName = document.createElement("strong");
+          placeName.textContent = review.place_name;
+          reviewerName.appendChild(placeName);
 
           const reviewText = document.createElement("p");
           reviewText.textContent = review.text;
@@ -99,24 +102,36 @@ document.addEventListener("DOMContentLoaded", function () {
     }
   }
 
-  // Function to fetch reviews
+  // Function to fetch the reviews of the logged in user, page by page
   async function fetchReviews() {
     const token = getCookie("jwt_token");
+    const userId = getCookie("user_id");
 
     try {
-      const response = await fetch(`/api/v1/reviews`, {
-        method: "GET",
-        headers: token ? { Authorization: `Bearer ${token}` } : {},
-      });
+      const reviews = [];
+      let cursor = null;
+      do {
+        const params = new URLSearchParams({ limit: 100 });
+        if (cursor) {
+          params.set("cursor", cursor);
+        }
+        const response = await fetch(`/api/v1/users/${userId}/reviews?${params}`, {
+          method: "GET",
+          headers: token ? { Authorization: `Bearer ${token}` } : {},
+        });
 
-      console.log("Reviews response status:", response.status); // Debug log
+        console.log("Reviews response status:", response.status); // Debug log
 
-      if (!response.ok) {
-        console.error("Failed to fetch reviews");
-        return;
-      }
+        if (!response.ok) {
+          console.error("Failed to fetch reviews");
+          return;
+        }
+
+        const page = await response.json();
+        reviews.push(...page.items);
+        cursor = page.next_cursor;
+      } while (cursor);
 
-      const reviews = await response.json();
       console.log("Reviews:", reviews);
       renderReviews(reviews);
     } catch (error) {
@@ -0,0 +1,72 @@
+"""
+Recovery benchmark of the durable InMemoryRepository.
+
+Fills a durable repository of users and updates half of them, takes a
+checkpoint, applies a tail of updates, then measures how long a restart
+takes: from the snapshot plus the tail, and from the whole log (no
+checkpoint ever taken).
+
+Usage: python -m app.tests.benchmarks.bench_durable_recovery [number_of_users] [tail_length]
+"""
+
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+from app.models.user import User
+from app.persistence.repository import InMemoryRepository
+
+
+def size_mb(directory):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)) / 2 ** 20
+
+
+def fill(path, count, checkpoint):
+    repo = InMemoryRepository(indexes=('email',), path=path, model=User, checkpoint_every=count * 2)
+    start = time.perf_counter()
+    for i in range(count):
+        repo.add(User(id=f"{i:032d}", first_name="Bench", last_name="User", email=f"user{i}@example.com",
+                      password="x" * 60, is_admin=False))
+    elapsed = time.perf_counter() - start
+    print(f"  {count} adds logged in {elapsed:.1f} s ({count / elapsed:.0f}/s)")
+    for i in range(0, count, 2):
+        repo.update(f"{i:032d}", {'last_name': 'Churned'})
+    if checkpoint:
+        start = time.perf_counter()
+        repo.checkpoint()
+        print(f"  checkpoint written in {time.perf_counter() - start:.1f} s")
+    return repo
+
+
+def recover(path):
+    gc.collect()
+    start = time.perf_counter()
+    repo = InMemoryRepository(indexes=('email',), path=path, model=User)
+    elapsed = time.perf_counter() - start
+    objects = len(repo.get_all())
+    repo.close()
+    return objects, elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    tail = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+
+    for checkpoint in (True, False):
+        path = tempfile.mkdtemp()
+        print(f"{'snapshot + tail' if checkpoint else 'log only'}:")
+        repo = fill(path, count, checkpoint)
+        for i in range(tail):
+            repo.update(f"{i:032d}", {'first_name': 'Updated'})
+        repo.close()
+        del repo
+
+        objects, elapsed = recover(path)
+        print(f"  recovered {objects} objects in {elapsed:.1f} s, {size_mb(path):.0f} MB on disk\n")
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark of the place listing read paths.
+
+Builds the GET /api/v1/places body for every place two ways: from Place
+instances with their owner joined in (ORM hydration, identity map, change
+tracking), and from the PLACE_WITH_OWNER_ROW column tuples the route now
+uses. Reports the latency and the peak memory allocated while building the
+list, for the whole listing and for a page.
+
+Usage: python -m app.tests.benchmarks.bench_listing_rows [number_of_places]
+"""
+
+import gc
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from sqlalchemy.orm import joinedload
+from app import create_app
+from app.api.v1.routes_places import serialize_place, serialize_place_row
+from app.extensions import db
+from app.models.place import Place
+from app.models.user import User
+
+RUNS = 5
+PAGE = 100
+
+
+def seed(count):
+    owners = [{'id': str(uuid.uuid4()), 'first_name': 'Bench', 'last_name': f'Owner {i}',
+               'email': f'owner{i}@example.com', 'password': 'x', 'is_admin': False}
+              for i in range(max(count // 10, 1))]
+    db.session.execute(User.__table__.insert(), owners)
+
+    rows = []
+    for i in range(count):
+        rows.append({
+            'id': str(uuid.uuid4()), 'title': f'Place {i}', 'description': 'Benchmark place',
+            'price': float(random.randint(10, 1000)), 'latitude': 0.0, 'longitude': 0.0,
+            'owner_id': random.choice(owners)['id'], 'amenities': []
+        })
+        if len(rows) == 10000:
+            db.session.execute(Place.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(Place.__table__.insert(), rows)
+    db.session.commit()
+
+
+def objects(facade):
+    return [serialize_place(place) for place in facade.place_repo.find(relationships=('place_owner',))]
+
+
+def rows(facade):
+    return [serialize_place_row(row) for row in facade.get_place_rows({})]
+
+
+def objects_page(facade):
+    places = (Place.query.options(joinedload(Place.place_owner))
+              .order_by(Place.created_at, Place.id).limit(PAGE).all())
+    return [serialize_place(place) for place in places]
+
+
+def rows_page(facade):
+    return [serialize_place_row(row) for row in facade.get_place_rows_page(PAGE, None, {})[0]]
+
+
+def measure(build, facade, runs):
+    """Milliseconds per call, then the peak MB allocated by one call"""
+    start = time.perf_counter()
+    for _ in range(runs):
+        build(facade)
+        db.session.remove()
+    elapsed = (time.perf_counter() - start) / runs * 1000
+
+    gc.collect()
+    tracemalloc.start()
+    build(facade)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.session.remove()
+    return elapsed, peak / 2 ** 20
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    random.seed(1)
+    app = create_app("config.TestingConfig")
+    with app.app_context():
+        db.create_all()
+        print(f"Seeding {count} places...")
+        seed(count)
+        facade = app.extensions['FACADE']
+
+        print(f"{'listing':>22} {'ms':>10} {'peak MB':>10}")
+        for name, build, runs in (('objects, all', objects, RUNS), ('rows, all', rows, RUNS),
+                                  (f'objects, page of {PAGE}', objects_page, RUNS * 20),
+                                  (f'rows, page of {PAGE}', rows_page, RUNS * 20)):
+            elapsed, peak = measure(build, facade, runs)
+            print(f"{name:>22} {elapsed:>10.1f} {peak:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark of the InMemoryRepository secondary indexes.
+
+Runs the same lookups against a repository without indexes (the linear
+scan) and one with hash indexes on email / owner_id and a sorted index on
+price, then measures read throughput from several threads while a writer
+keeps updating places.
+
+Usage: python -m app.tests.benchmarks.bench_memory_indexes [number_of_places]
+"""
+
+import random
+import sys
+import threading
+import time
+from app.models.place import Place
+from app.models.user import User
+from app.persistence.repository import InMemoryRepository
+
+LOOKUPS = 200
+THREADS = (1, 4, 16)
+
+
+def seed(count):
+    users = [User(id=f"user{i}", first_name="Bench", last_name="User", email=f"user{i}@example.com")
+             for i in range(max(count // 10, 1))]
+    places = [Place(id=f"place{i}", title=f"Place {i}", description="Benchmark place",
+                    price=float(random.randint(10, 1000)), latitude=0.0, longitude=0.0,
+                    owner_id=random.choice(users).id) for i in range(count)]
+    return users, places
+
+
+def build(users, places, indexed):
+    user_repo = InMemoryRepository(indexes=('email',) if indexed else ())
+    place_repo = InMemoryRepository(indexes=('owner_id',) if indexed else (),
+                                    sorted_indexes=('price',) if indexed else ())
+    for user in users:
+        user_repo.add(user)
+    for place in places:
+        place_repo.add(place)
+    return user_repo, place_repo
+
+
+def timed(call):
+    start = time.perf_counter()
+    for _ in range(LOOKUPS):
+        call()
+    return (time.perf_counter() - start) / LOOKUPS * 1e6
+
+
+def lookups(users, user_repo, place_repo):
+    return {
+        'get_by_attribute(email)': timed(
+            lambda: user_repo.get_by_attribute('email', random.choice(users).email)),
+        'find(owner_id eq)': timed(
+            lambda: place_repo.find([('owner_id', 'eq', random.choice(users).id)])),
+        'find(price range)': timed(
+            lambda: place_repo.find([('price', 'gte', 500.0), ('price', 'lte', 510.0)])),
+    }
+
+
+def throughput(users, place_repo, places, threads, seconds=1.0):
+    """Reads per second from threads readers while one writer keeps updating prices"""
+    stop = threading.Event()
+    reads = [0] * threads
+
+    def read(slot):
+        while not stop.is_set():
+            place_repo.find([('owner_id', 'eq', random.choice(users).id)])
+            reads[slot] += 1
+
+    def write():
+        while not stop.is_set():
+            place_repo.update(random.choice(places).id, {'price': float(random.randint(10, 1000))})
+
+    workers = [threading.Thread(target=read, args=(slot,)) for slot in range(threads)]
+    workers.append(threading.Thread(target=write))
+    for thread in workers:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in workers:
+        thread.join()
+    return sum(reads) / seconds
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    random.seed(1)
+    users, places = seed(count)
+
+    results = {}
+    for indexed in (False, True):
+        user_repo, place_repo = build(users, places, indexed)
+        results[indexed] = (lookups(users, user_repo, place_repo), place_repo)
+
+    print(f"{count} places, {len(users)} users, microseconds per call")
+    print(f"{'lookup':>26} {'scan':>10} {'indexed':>10} {'speedup':>8}")
+    for name, scan in results[False][0].items():
+        indexed = results[True][0][name]
+        print(f"{name:>26} {scan:>10.1f} {indexed:>10.1f} {scan / indexed:>7.0f}x")
+
+    print(f"\n{'reader threads':>14} {'reads/s':>10}  (indexed, one concurrent writer)")
+    for threads in THREADS:
+        print(f"{threads:>14} {throughput(users, results[True][1], places, threads):>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
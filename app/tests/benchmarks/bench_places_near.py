@@ -0,0 +1,87 @@
+"""
+Benchmark of the "closest stays" query.
+
+Compares the previous approach (load every place and compute the distance
+in a Python loop) with the geo_cell prefilter and vectorized ranking.
+
+Usage: python -m app.tests.benchmarks.bench_places_near [number_of_places]
+"""
+
+import math
+import random
+import sys
+import time
+import uuid
+from app import create_app
+from app.extensions import db
+from app.models.place import Place
+from app.models.user import User
+from app.services.geo import geo_cell, EARTH_RADIUS_KM
+
+QUERIES = 20
+RADIUS_KM = 25
+LIMIT = 20
+
+
+def seed(count):
+    owner = User(first_name="Bench", last_name="Owner", email="bench@example.com", password="x")
+    db.session.add(owner)
+    db.session.commit()
+
+    rows = []
+    for i in range(count):
+        latitude, longitude = random.uniform(-60, 70), random.uniform(-180, 180)
+        rows.append({
+            'id': str(uuid.uuid4()), 'title': f'Place {i}', 'description': 'Benchmark place',
+            'price': 100.0, 'latitude': latitude, 'longitude': longitude,
+            'geo_cell': geo_cell(latitude, longitude), 'owner_id': owner.id, 'amenities': []
+        })
+        if len(rows) == 10000:
+            db.session.execute(Place.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(Place.__table__.insert(), rows)
+    db.session.commit()
+
+
+def scan_near(latitude, longitude, radius_km, limit):
+    """The previous approach: every Place is hydrated and measured one by one"""
+    results = []
+    for place in Place.query.all():
+        lat1, lat2 = math.radians(latitude), math.radians(place.latitude)
+        a = (math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2)
+             * math.sin(math.radians(place.longitude - longitude) / 2) ** 2)
+        distance = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+        if distance <= radius_km:
+            results.append((place, distance))
+    results.sort(key=lambda result: result[1])
+    return results[:limit]
+
+
+def timed(function, points):
+    start = time.perf_counter()
+    for latitude, longitude in points:
+        db.session.expunge_all()
+        function(latitude, longitude, RADIUS_KM, LIMIT)
+    return (time.perf_counter() - start) / len(points) * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    app = create_app("config.TestingConfig")
+    with app.app_context():
+        db.create_all()
+        print(f"Seeding {count} places...")
+        seed(count)
+
+        facade = app.extensions['FACADE']
+        points = [(random.uniform(-60, 70), random.uniform(-180, 180)) for _ in range(QUERIES)]
+
+        indexed = timed(facade.search_places_near, points)
+        scan = timed(scan_near, points[:2])
+        print(f"full scan        : {scan:10.2f} ms/query")
+        print(f"geo_cell + numpy : {indexed:10.2f} ms/query")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Stress benchmark of cache misses under concurrency.
+
+Cold-cache requests for one popular place and its reviews are fired from
+an increasing number of threads at the same moment, with and without the
+single-flight layer, and the SELECT statements reaching the database are
+counted.
+
+Usage: python -m app.tests.benchmarks.bench_single_flight [number_of_reviews]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from sqlalchemy import event
+from app import create_app
+from app.api.v1 import response_cache
+from app.cache.single_flight import SingleFlight
+from app.extensions import db
+from app.models.review import Review
+from app.persistence.caching_repository import CachingRepository
+from config import TestingConfig
+
+CONCURRENCY = (1, 4, 16, 64)
+
+
+class Unshared:
+    """Every caller runs its own load, as before the single-flight layer"""
+
+    def do(self, key, load):
+        return load()
+
+
+def seed(facade, count):
+    owner = facade.create_user({"first_name": "Bench", "last_name": "Owner",
+                                "email": "owner@example.com", "password": "password123"})
+    place = facade.create_place({"title": "Popular", "description": "Everybody wants it", "price": 100.0,
+                                 "latitude": 45.0, "longitude": 2.0, "owner_id": owner.id, "amenities": []})
+    users = [{'id': str(uuid.uuid4()), 'first_name': 'Bench', 'last_name': 'Reviewer',
+              'email': f'reviewer{i}@example.com', 'password': 'x', 'is_admin': False} for i in range(count)]
+    db.session.execute(facade.user_repo.model.__table__.insert(), users)
+    db.session.execute(Review.__table__.insert(), [
+        {'id': str(uuid.uuid4()), 'text': f'Review {i}', 'rating': i % 5 + 1,
+         'user_id': user['id'], 'place_id': place.id} for i, user in enumerate(users)])
+    db.session.commit()
+    return place.id
+
+
+def stampede(app, urls, threads):
+    """Fire every url from every thread at once, return the SELECT count and the wall time"""
+    selects = []
+    lock = threading.Lock()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('SELECT'):
+            with lock:
+                selects.append(statement)
+
+    barrier = threading.Barrier(threads)
+
+    def worker():
+        client = app.test_client()
+        barrier.wait()
+        for url in urls:
+            assert client.get(url).status_code == 200
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    event.listen(db.engine, "before_cursor_execute", record)
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    event.remove(db.engine, "before_cursor_execute", record)
+    return len(selects), elapsed * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    directory = tempfile.mkdtemp()
+
+    class BenchConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        RESPONSE_CACHE = {'path': os.path.join(directory, 'responses.sqlite3'), 'ttl': 300}
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        facade = app.extensions['FACADE']
+        place_id = seed(facade, count)
+        store = app.extensions['RESPONSE_CACHE']
+        repositories = [repo for repo in vars(facade).values() if isinstance(repo, CachingRepository)]
+        urls = [f'/api/v1/places/{place_id}', f'/api/v1/reviews/places/{place_id}/reviews']
+
+        print(f"{'threads':>8} {'mode':>14} {'SELECTs':>8} {'wall ms':>9}")
+        for threads in CONCURRENCY:
+            for mode, flight in (('no coalescing', Unshared), ('single-flight', SingleFlight)):
+                # Expired popular entry: every cache tier starts cold
+                store.clear()
+                response_cache._loads = flight()
+                for repo in repositories:
+                    repo.clear()
+                    repo._loads = flight()
+                db.session.remove()
+                selects, elapsed = stampede(app, urls, threads)
+                print(f"{threads:>8} {mode:>14} {selects:>8} {elapsed:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
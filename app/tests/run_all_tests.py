@@ -6,14 +6,26 @@ from app.tests.tests_models import test_review_class
 
 from app.tests.tests_repository import test_memory_repo
 from app.tests.tests_repository import test_SQLalchemy_repo
+from app.tests.tests_repository import test_caching_repo
+from app.tests.tests_repository import test_unit_of_work
+from app.tests.tests_repository import test_migrations
 
 from app.tests.tests_facade import test_facade
+from app.tests.tests_facade import test_identity_map
+from app.tests.tests_facade import test_tiered_cache
+from app.tests.tests_facade import test_bulk_writes
 
 from app.tests.tests_endpoints.test_login_endpoints import TestAuthEndpoints
 from app.tests.tests_endpoints.test_user_endpoints import TestUserEndpoints
 from app.tests.tests_endpoints.test_place_endpoints import TestPlaceEndpoints
 from app.tests.tests_endpoints.test_amenity_endpoints import TestAmenityEndpoints
 from app.tests.tests_endpoints.test_review_endpoints import TestReviewEndpoints
+from app.tests.tests_endpoints.test_place_queries import TestPlaceListQueries
+from app.tests.tests_endpoints.test_review_queries import TestReviewQueries
+from app.tests.tests_endpoints.test_conditional_get import TestConditionalGet
+from app.tests.tests_endpoints.test_response_cache import TestSQLiteStore, TestResponseCache, TestStaleWhileRevalidate
+from app.tests.tests_endpoints.test_email_availability import TestBloomFilter, TestEmailAvailability
+from app.tests.tests_endpoints.test_amenity_catalog import TestSharedSnapshot, TestAmenityCatalog
 
 
 if __name__ == '__main__':
@@ -0,0 +1,138 @@
+import os
+import tempfile
+import unittest
+from sqlalchemy import event
+from app import create_app
+from app.cache.shared_snapshot import SharedSnapshot
+from app.extensions import db
+from config import TestingConfig
+
+
+class TestSharedSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.snapshot = SharedSnapshot(os.path.join(self.directory.name, 'catalog.bin'))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        """Test a written payload is read back with its version"""
+        self.snapshot.write("3-abc", b'[["1", "Wifi"]]')
+        self.snapshot.write("4-def", b'[]')
+
+        # Assertions
+        self.assertEqual(self.snapshot.read(), ("4-def", b'[]'))
+
+    def test_missing_file(self):
+        """Test reading before the first write"""
+        self.assertEqual(self.snapshot.read(), (None, None))
+
+
+class TestAmenityCatalog(unittest.TestCase):
+    def setUp(self):
+        """Set up two workers sharing one database file and one catalog snapshot"""
+        self.directory = tempfile.TemporaryDirectory()
+        directory = self.directory.name
+
+        class CatalogConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(directory, 'hbnb.db')}"
+            AMENITY_CATALOG = {'path': os.path.join(directory, 'amenity_catalog.bin'), 'check_interval': 0}
+
+        self.workers = [create_app(CatalogConfig), create_app(CatalogConfig)]
+        with self.workers[0].app_context():
+            db.create_all()
+            self.wifi = self.workers[0].extensions['FACADE'].create_amenity({"name": "Wifi"}).id
+
+    def tearDown(self):
+        """Tear down the database and the snapshot"""
+        for worker in self.workers:
+            with worker.app_context():
+                db.session.remove()
+                db.engine.dispose()
+        self.directory.cleanup()
+
+    def _list(self, worker):
+        """GET the amenity list on a worker, return the names and the amenity queries it ran"""
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with worker.app_context():
+            event.listen(db.engine, "before_cursor_execute", record)
+            try:
+                response = worker.test_client().get('/api/v1/amenities/')
+            finally:
+                event.remove(db.engine, "before_cursor_execute", record)
+        self.assertEqual(response.status_code, 200)
+        return [item['name'] for item in response.get_json()], [s for s in statements if 'FROM amenities' in s]
+
+    def test_workers_share_snapshot(self):
+        """Test only the first worker to see a version loads the amenities"""
+        first_names, first_queries = self._list(self.workers[0])
+        second_names, second_queries = self._list(self.workers[1])
+
+        # Assertions
+        self.assertEqual(first_names, ["Wifi"])
+        self.assertEqual(second_names, ["Wifi"])
+        self.assertEqual(len(first_queries), 1)
+        self.assertEqual(second_queries, [])
+
+    def test_write_bumps_version(self):
+        """Test a write on one worker is seen by the other"""
+        self._list(self.workers[0])
+        self._list(self.workers[1])
+        with self.workers[0].app_context():
+            self.workers[0].extensions['FACADE'].create_amenity({"name": "Pool"})
+
+        names, queries = self._list(self.workers[1])
+        _, other_queries = self._list(self.workers[0])
+
+        # Assertions
+        self.assertEqual(names, ["Wifi", "Pool"])
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(other_queries, [])
+
+    def test_validation_uses_catalog(self):
+        """Test known amenity ids are validated without querying the amenities"""
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        worker = self.workers[1]
+        with worker.app_context():
+            facade = worker.extensions['FACADE']
+            facade.get_amenity_catalog()
+            event.listen(db.engine, "before_cursor_execute", record)
+            try:
+                known = facade.get_missing_amenity_ids([self.wifi])
+                unknown = facade.get_missing_amenity_ids([self.wifi, "unknown"])
+            finally:
+                event.remove(db.engine, "before_cursor_execute", record)
+
+        # Assertions
+        self.assertEqual(known, [])
+        self.assertEqual(unknown, ["unknown"])
+        self.assertEqual(len([s for s in statements if 'FROM amenities' in s]), 1)
+
+    def test_validation_sees_other_worker_delete(self):
+        """Test an amenity deleted by another worker is refused before the catalog's next periodic check"""
+        worker = self.workers[1]
+        with worker.app_context():
+            facade = worker.extensions['FACADE']
+            facade.amenity_catalog.check_interval = 60
+            self.assertEqual(facade.get_missing_amenity_ids([self.wifi]), [])
+        with self.workers[0].app_context():
+            self.workers[0].extensions['FACADE'].delete_amenity(self.wifi)
+
+        with worker.app_context():
+            missing = worker.extensions['FACADE'].get_missing_amenity_ids([self.wifi])
+
+        # Assertions
+        self.assertEqual(missing, [self.wifi])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+import unittest
+from app import create_app
+from app.extensions import db
+
+
+class TestConditionalGet(unittest.TestCase):
+    def setUp(self):
+        """Set up the app on an in-memory database with one place and one amenity"""
+        self.app = create_app("config.TestingConfig")
+        self.client = self.app.test_client()
+
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.facade = self.app.extensions['FACADE']
+        self.owner = self.facade.create_user({
+            "first_name": "Owner", "last_name": "Test",
+            "email": "owner@example.com", "password": "password123"
+        })
+        self.amenity = self.facade.create_amenity({"name": "Wifi"})
+        self.place = self.facade.create_place({
+            "title": "Cabin", "description": "A small cabin", "price": 80.0,
+            "latitude": 45.0, "longitude": 2.0, "owner_id": self.owner.id, "amenities": []
+        })
+        self.owner_id, self.place_id = self.owner.id, self.place.id
+
+    def tearDown(self):
+        """Tear down the test database"""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _revalidate(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first.headers['ETag'].startswith('"'))
+        return first, self.client.get(url, headers={'If-None-Match': first.headers['ETag']})
+
+    def test_read_endpoints_return_304(self):
+        """Test every read endpoint answers a matching If-None-Match with an empty 304"""
+        urls = [
+            '/api/v1/places/', '/api/v1/places/?limit=10', f'/api/v1/places/{self.place_id}',
+            '/api/v1/places/search?bbox=0,40,5,50', '/api/v1/places/near?lat=45&lon=2&radius_km=10',
+            '/api/v1/amenities/', f'/api/v1/amenities/{self.amenity.id}',
+            '/api/v1/users/', f'/api/v1/users/{self.owner_id}',
+            f'/api/v1/users/{self.owner_id}/places', f'/api/v1/users/{self.owner_id}/reviews',
+            '/api/v1/reviews/', f'/api/v1/reviews/places/{self.place_id}/reviews?limit=5',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                first, second = self._revalidate(url)
+
+                # Assertions
+                self.assertEqual(second.status_code, 304)
+                self.assertEqual(second.data, b'')
+                self.assertEqual(second.headers['ETag'], first.headers['ETag'])
+
+    def test_etag_depends_on_query_string(self):
+        """Test two pages of the same collection have different ETags"""
+        first = self.client.get('/api/v1/places/?limit=1')
+        second = self.client.get('/api/v1/places/?limit=2')
+
+        # Assertions
+        self.assertNotEqual(first.headers['ETag'], second.headers['ETag'])
+
+    def test_update_changes_etag(self):
+        """Test a modified place is sent again in full"""
+        url = f'/api/v1/places/{self.place_id}'
+        first = self.client.get(url)
+        list_etag = self.client.get('/api/v1/places/').headers['ETag']
+
+        self.facade.update_place(self.place_id, {"price": 95.0})
+        second = self.client.get(url, headers={'If-None-Match': first.headers['ETag']})
+        listing = self.client.get('/api/v1/places/', headers={'If-None-Match': list_etag})
+
+        # Assertions
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.get_json()['price'], 95.0)
+        self.assertEqual(listing.status_code, 200)
+
+    def test_owner_update_changes_place_etags(self):
+        """Test renaming an owner invalidates the places that embed it"""
+        url = f'/api/v1/places/{self.place_id}'
+        etag = self.client.get(url).headers['ETag']
+
+        self.facade.update_user(self.owner_id, {"first_name": "Renamed"})
+        response = self.client.get(url, headers={'If-None-Match': etag})
+
+        # Assertions
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['owner']['first_name'], 'Renamed')
+
+    def test_new_item_changes_collection_etag(self):
+        """Test adding an amenity changes the amenity list ETag"""
+        etag = self.client.get('/api/v1/amenities/').headers['ETag']
+        self.facade.create_amenity({"name": "Pool"})
+
+        response = self.client.get('/api/v1/amenities/', headers={'If-None-Match': etag})
+
+        # Assertions
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()), 2)
+
+    def test_if_modified_since(self):
+        """Test Last-Modified is honoured when no ETag is sent"""
+        url = f'/api/v1/amenities/{self.amenity.id}'
+        last_modified = self.client.get(url).headers['Last-Modified']
+
+        response = self.client.get(url, headers={'If-Modified-Since': last_modified})
+        stale = self.client.get(url, headers={'If-Modified-Since': 'Mon, 01 Jan 2001 00:00:00 GMT'})
+
+        # Assertions
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(stale.status_code, 200)
+
+    def test_invalid_arguments_not_modified(self):
+        """Test invalid pagination or sort arguments get a 400 even when the client copy matches any ETag"""
+        urls = [
+            '/api/v1/places/?limit=0', '/api/v1/amenities/?limit=abc', '/api/v1/users/?limit=0',
+            '/api/v1/reviews/?limit=0', '/api/v1/reviews/?cursor=not-a-cursor',
+            f'/api/v1/users/{self.owner_id}/places?limit=0', f'/api/v1/users/{self.owner_id}/reviews?limit=0',
+            f'/api/v1/reviews/places/{self.place_id}/reviews?sort=unknown',
+            f'/api/v1/reviews/places/{self.place_id}/reviews?limit=0',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url, headers={'If-None-Match': '*'})
+
+                # Assertions
+                self.assertEqual(response.status_code, 400)
+
+    def test_collection_without_last_modified(self):
+        """Test collections only send an ETag, a delete does not move max(updated_at)"""
+        other = self.facade.create_amenity({"name": "Pool"})
+        first = self.client.get('/api/v1/amenities/?limit=10')
+
+        self.facade.delete_amenity(other.id)
+        response = self.client.get('/api/v1/amenities/?limit=10',
+                                   headers={'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+
+        # Assertions
+        self.assertNotIn('Last-Modified', first.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()['items']), 1)
+
+    def test_not_modified_skips_loading(self):
+        """Test a 304 on a collection only runs the version query"""
+        from sqlalchemy import event
+
+        etag = self.client.get('/api/v1/amenities/').headers['ETag']
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            response = self.client.get('/api/v1/amenities/', headers={'If-None-Match': etag})
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        # Assertions
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(statements), 1)
+        self.assertIn('max(amenities.updated_at)', statements[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
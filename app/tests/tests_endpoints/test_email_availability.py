@@ -0,0 +1,122 @@
+import unittest
+from sqlalchemy import event
+from app import create_app
+from app.cache.bloom import BloomFilter
+from app.extensions import db
+
+
+class TestBloomFilter(unittest.TestCase):
+    def test_no_false_negatives(self):
+        """Test every added value is reported as present"""
+        emails = BloomFilter(1000, 0.01)
+        values = [f"user{i}@example.com" for i in range(1000)]
+        for value in values:
+            emails.add(value)
+
+        # Assertions
+        self.assertTrue(all(value in emails for value in values))
+        self.assertEqual(emails.count, 1000)
+
+    def test_false_positive_rate(self):
+        """Test the false positive rate stays close to the requested one"""
+        emails = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            emails.add(f"user{i}@example.com")
+
+        false_positives = sum(f"other{i}@example.com" in emails for i in range(10000))
+
+        # Assertions
+        self.assertLess(false_positives / 10000, 0.03)
+
+
+class TestEmailAvailability(unittest.TestCase):
+    def setUp(self):
+        """Set up the app on an in-memory database with one registered user"""
+        self.app = create_app("config.TestingConfig")
+        self.client = self.app.test_client()
+
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.facade = self.app.extensions['FACADE']
+        self.user = self.facade.create_user({
+            "first_name": "Alice", "last_name": "Doe",
+            "email": "alice@example.com", "password": "password123"
+        })
+        self.statements = []
+        event.listen(db.engine, "before_cursor_execute", self._record)
+
+    def tearDown(self):
+        """Tear down the test database"""
+        event.remove(db.engine, "before_cursor_execute", self._record)
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def _available(self, email):
+        response = self.client.get('/api/v1/users/email-available', query_string={'email': email})
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()['available']
+
+    def test_unknown_email_skips_database(self):
+        """Test an email the filter never saw is available without a query"""
+        self._available("warmup@example.com")
+        self.statements = []
+
+        # Assertions
+        self.assertTrue(self._available("nobody@example.com"))
+        self.assertEqual(self.statements, [])
+
+    def test_registered_email(self):
+        """Test registered emails, including ones added after the filter was built, are taken"""
+        self.assertFalse(self._available("alice@example.com"))
+        self.facade.create_user({
+            "first_name": "Bob", "last_name": "Smith",
+            "email": "bob@example.com", "password": "password123"
+        })
+        self.facade.update_user(self.user.id, {"email": "alicia@example.com"})
+
+        # Assertions
+        self.assertFalse(self._available("bob@example.com"))
+        self.assertFalse(self._available("alicia@example.com"))
+        # Still in the filter until the next rebuild, the database has the last word
+        self.assertTrue(self._available("alice@example.com"))
+
+    def test_missing_email(self):
+        """Test the email parameter is required"""
+        response = self.client.get('/api/v1/users/email-available')
+
+        # Assertions
+        self.assertEqual(response.status_code, 400)
+
+    def test_duplicate_caught_by_unique_index(self):
+        """Test a duplicate that passed the availability check is still refused"""
+        from app.services.facade import DuplicateEmailError
+
+        with self.assertRaises(DuplicateEmailError):
+            self.facade.create_user({
+                "first_name": "Alice", "last_name": "Again",
+                "email": "alice@example.com", "password": "password123"
+            })
+
+    def test_rebuild_drops_deleted_emails(self):
+        """Test the periodic rebuild forgets deleted users"""
+        old_filter = self.facade._email_filter()
+        self.facade.delete_user(self.user.id)
+        self.facade.email_filter_settings = dict(self.facade.email_filter_settings, rebuild_interval=0)
+        # Rebuild on the calling thread instead of a background one
+        self.facade.run_in_background = lambda target, *args: target(*args)
+        self.facade.is_email_available("someone@example.com")
+
+        # Assertions
+        self.assertIn("alice@example.com", old_filter)
+        self.assertIsNot(self.facade._emails, old_filter)
+        self.assertNotIn("alice@example.com", self.facade._emails)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,228 @@
+import base64
+import json
+import unittest
+from sqlalchemy import event
+from app import create_app
+from app.extensions import db
+
+
+class TestPlaceListQueries(unittest.TestCase):
+    def setUp(self):
+        """Set up the app on an in-memory database with one owner"""
+        self.app = create_app("config.TestingConfig")
+        self.client = self.app.test_client()
+
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.facade = self.app.extensions['FACADE']
+        self.statements = []
+        self.created = 0
+
+    def tearDown(self):
+        """Tear down the test database"""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _create_places(self, count, price=100.0, amenities=(), latitude=45.0, longitude=2.0):
+        for i in range(self.created, self.created + count):
+            owner = self.facade.create_user({
+                "first_name": f"Owner{i}",
+                "last_name": "Test",
+                "email": f"owner{i}@example.com",
+                "password": "password123"
+            })
+            self.facade.create_place({
+                "title": f"Place {i}",
+                "description": "A test place",
+                "price": price,
+                "latitude": latitude,
+                "longitude": longitude,
+                "owner_id": owner.id,
+                "amenities": list(amenities)
+            })
+        self.created += count
+
+    def _count_statements(self, url):
+        def record(conn, cursor, statement, parameters, context, executemany):
+            self.statements.append(statement)
+
+        self.statements = []
+        db.session.expire_all()
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            response = self.client.get(url)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        self.assertEqual(response.status_code, 200)
+        return len(self.statements), response.get_json()
+
+    def test_get_all_places_includes_owner(self):
+        """Test the owner is attached to every listed place"""
+        self._create_places(2)
+        _, data = self._count_statements('/api/v1/places/')
+
+        self.assertEqual(len(data), 2)
+        for place in data:
+            self.assertIsNotNone(place['owner'])
+            self.assertEqual(place['owner']['id'], place['owner_id'])
+
+    def test_get_all_places_query_count_is_constant(self):
+        """Test listing places does not issue one query per owner"""
+        self._create_places(1)
+        few_queries, _ = self._count_statements('/api/v1/places/')
+
+        self._create_places(10)
+        many_queries, data = self._count_statements('/api/v1/places/')
+
+        self.assertEqual(len(data), 11)
+        self.assertEqual(few_queries, many_queries)
+
+    def test_get_places_paginated(self):
+        """Test following next_cursor returns every place exactly once"""
+        self._create_places(3)
+
+        seen = []
+        url = '/api/v1/places/?limit=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.get_json()
+            self.assertLessEqual(len(data['items']), 2)
+            seen.extend(place['id'] for place in data['items'])
+            url = f"/api/v1/places/?limit=2&cursor={data['next_cursor']}" if data['next_cursor'] else None
+
+        self.assertEqual(len(seen), 3)
+        self.assertEqual(len(set(seen)), 3)
+
+    def test_get_places_cursor_of_wrong_types(self):
+        """Test a cursor whose values do not match the sort columns is answered with a 400"""
+        self._create_places(2)
+        cursor = base64.urlsafe_b64encode(json.dumps([["x"], "y"]).encode()).decode()
+
+        response = self.client.get(f'/api/v1/places/?limit=1&cursor={cursor}')
+
+        # Assertions
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_places_filtered(self):
+        """Test price and amenity filters are applied on the server"""
+        pool = self.facade.create_amenity({"name": "Pool"})
+        wifi = self.facade.create_amenity({"name": "Wi-Fi"})
+        self._create_places(1, price=50.0, amenities=[pool.id])
+        self._create_places(1, price=150.0, amenities=[pool.id, wifi.id])
+        self._create_places(1, price=250.0, amenities=[wifi.id])
+
+        def titles(url):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            return sorted(place['title'] for place in response.get_json())
+
+        self.assertEqual(titles('/api/v1/places/?max_price=200'), ['Place 0', 'Place 1'])
+        self.assertEqual(titles('/api/v1/places/?min_price=100&max_price=200'), ['Place 1'])
+        self.assertEqual(titles(f'/api/v1/places/?amenities={pool.id},{wifi.id}'), ['Place 1'])
+        self.assertEqual(titles(f'/api/v1/places/?amenities={pool.id},{wifi.id}&amenities_match=any'),
+                         ['Place 0', 'Place 1', 'Place 2'])
+
+        response = self.client.get('/api/v1/places/?max_price=cheap')
+        self.assertEqual(response.status_code, 400)
+
+    def test_search_places_in_bbox(self):
+        """Test the bounding box search only returns places inside the box"""
+        self._create_places(1, latitude=48.8566, longitude=2.3522)
+        self._create_places(1, latitude=48.9, longitude=2.2)
+        self._create_places(1, latitude=40.7128, longitude=-74.0060)
+
+        response = self.client.get('/api/v1/places/search?bbox=2.0,48.5,2.5,49.0')
+        self.assertEqual(response.status_code, 200)
+        titles = sorted(place['title'] for place in response.get_json()['items'])
+        self.assertEqual(titles, ['Place 0', 'Place 1'])
+
+        response = self.client.get('/api/v1/places/search?bbox=-180,-90,180,90')
+        self.assertEqual(len(response.get_json()['items']), 3)
+
+        response = self.client.get('/api/v1/places/search?bbox=3,48,2,49')
+        self.assertEqual(response.status_code, 400)
+
+    def test_places_near(self):
+        """Test the radius search returns close places sorted by distance"""
+        self._create_places(1, latitude=48.9, longitude=2.2)
+        self._create_places(1, latitude=48.8566, longitude=2.3522)
+        self._create_places(1, latitude=40.7128, longitude=-74.0060)
+
+        response = self.client.get('/api/v1/places/near?lat=48.8566&lon=2.3522&radius_km=50')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual([place['title'] for place in data], ['Place 1', 'Place 0'])
+        self.assertLess(data[0]['distance_km'], data[1]['distance_km'])
+
+        response = self.client.get('/api/v1/places/near?lat=48.8566&lon=2.3522&radius_km=50&limit=1')
+        self.assertEqual(len(response.get_json()), 1)
+
+        response = self.client.get('/api/v1/places/near?lat=100&lon=2&radius_km=50')
+        self.assertEqual(response.status_code, 400)
+
+    def test_bbox_search_uses_geo_cell_index(self):
+        """Test the bounding box query is answered through the geo_cell index"""
+        from app.models.place import Place
+        from app.services.geo import bbox_filters
+        from app.persistence.repository import SQL_OPERATORS
+
+        query = Place.query
+        for attr_name, operator, value in bbox_filters(2.0, 48.5, 2.5, 49.0):
+            query = query.filter(SQL_OPERATORS[operator](getattr(Place, attr_name), value))
+        statement = str(query.statement.compile(compile_kwargs={"literal_binds": True}))
+        plan = db.session.execute(db.text(f"EXPLAIN QUERY PLAN {statement}")).fetchall()
+
+        self.assertTrue(any('USING INDEX ix_places_geo_cell' in str(row) for row in plan))
+
+    def test_get_user_places(self):
+        """Test listing only the places of one owner"""
+        self._create_places(3)
+        owner = self.facade.get_user_by_email("owner1@example.com")
+
+        response = self.client.get(f'/api/v1/users/{owner.id}/places?limit=5')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual([place['title'] for place in data['items']], ['Place 1'])
+        self.assertIsNone(data['next_cursor'])
+
+        response = self.client.get('/api/v1/users/unknown/places')
+        self.assertEqual(response.status_code, 404)
+
+    def test_create_place_reports_unknown_amenity(self):
+        """Test the amenity list is validated at once and the unknown id is reported"""
+        pool = self.facade.create_amenity({"name": "Pool"})
+        self._create_places(1)
+        owner = self.facade.get_user_by_email("owner0@example.com")
+        login = self.client.post('/api/v1/auth/login', json={
+            "email": "owner0@example.com", "password": "password123"})
+        headers = {"Authorization": f"Bearer {login.get_json()['access_token']}"}
+
+        payload = {
+            "title": "New Place",
+            "description": "A new place",
+            "price": 80.0,
+            "latitude": 45.0,
+            "longitude": 2.0,
+            "owner_id": owner.id,
+            "amenities": [pool.id, "unknown-amenity"]
+        }
+        response = self.client.post('/api/v1/places/', json=payload, headers=headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("unknown-amenity", response.get_json()['error'])
+
+        payload["amenities"] = [pool.id]
+        response = self.client.post('/api/v1/places/', json=payload, headers=headers)
+        self.assertEqual(response.status_code, 201)
+
+    def test_get_places_invalid_limit(self):
+        """Test an out of range limit is rejected"""
+        response = self.client.get('/api/v1/places/?limit=0')
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,385 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from app import create_app
+from app.cache.sqlite_store import SQLiteStore
+from app.extensions import db
+from config import TestingConfig
+
+
+class TestSQLiteStore(unittest.TestCase):
+    def setUp(self):
+        """Set up a store in a temporary file driven by a fake clock"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'store.sqlite3')
+        self.now = 0
+        self.store = SQLiteStore(self.path, clock=lambda: self.now)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_ttl(self):
+        """Test entries expire after the ttl"""
+        self.store.set("a", b"1", ttl=10)
+        self.assertEqual(self.store.get("a"), b"1")
+        self.now = 11
+
+        # Assertions
+        self.assertIsNone(self.store.get("a"))
+
+    def test_invalidate_by_tag(self):
+        """Test invalidating a tag only drops the entries carrying it"""
+        self.store.set("a", b"1", ttl=10, tags=["places", "place:1"])
+        self.store.set("b", b"2", ttl=10, tags=["amenities"])
+        self.store.invalidate(["place:1"])
+
+        # Assertions
+        self.assertIsNone(self.store.get("a"))
+        self.assertEqual(self.store.get("b"), b"2")
+
+    def test_stale_after(self):
+        """Test entries with a soft ttl stay readable as stale, and invalidating them keeps them"""
+        self.store.set("a", b"1", ttl=10, tags=["places"], stale_after=2)
+        self.store.set("b", b"2", ttl=10, tags=["places"], stale_after=2)
+        self.now = 3
+        self.store.invalidate(["places"])
+        self.now = 1
+
+        # Assertions
+        self.assertEqual(self.store.lookup("a"), (b"1", True))
+        self.assertIsNone(self.store.get("b"))
+        self.now = 11
+        self.assertEqual(self.store.lookup("a"), (None, False))
+
+    def test_stale_set_refused(self):
+        """Test a value computed before an invalidation is not stored"""
+        versions = self.store.tag_versions(["places"])
+        self.store.invalidate(["places"])
+
+        # Assertions
+        self.assertFalse(self.store.set("a", b"old", ttl=10, tags=["places"], versions=versions))
+        self.assertIsNone(self.store.get("a"))
+
+    def test_purge_expired(self):
+        """Test every purge_every writes the expired entries are deleted from the file"""
+        store = SQLiteStore(self.path, clock=lambda: self.now, purge_every=2)
+        store.set("a", b"1", ttl=1, tags=["places"])
+        self.now = 2
+        store.set("b", b"2", ttl=10, tags=["places"])
+
+        # Assertions
+        self.assertEqual(store.stats()['size'], 1)
+        self.assertEqual(store.get("b"), b"2")
+
+    def test_max_entries(self):
+        """Test past max_entries the entries closest to expiring are evicted"""
+        store = SQLiteStore(self.path, clock=lambda: self.now, max_entries=2, purge_every=1)
+        store.set("a", b"1", ttl=30)
+        store.set("b", b"2", ttl=10)
+        store.set("c", b"3", ttl=20)
+
+        # Assertions
+        self.assertEqual(store.stats()['size'], 2)
+        self.assertEqual(store.stats()['evictions'], 1)
+        self.assertIsNone(store.get("b"))
+        self.assertEqual(store.get("a"), b"1")
+
+    def test_invalidate_from_another_process(self):
+        """Test an invalidation made by another process is seen by this one"""
+        self.store.set("a", b"1", ttl=10, tags=["places"])
+        script = ("import sys; from app.cache.sqlite_store import SQLiteStore; "
+                  "SQLiteStore(sys.argv[1]).invalidate(['places'])")
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+        subprocess.run([sys.executable, "-c", script, self.path], check=True, cwd=root)
+
+        # Assertions
+        self.assertIsNone(self.store.get("a"))
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        """Set up the app with a response cache in a temporary file"""
+        self.directory = tempfile.TemporaryDirectory()
+
+        class ResponseCacheConfig(TestingConfig):
+            RESPONSE_CACHE = {'path': os.path.join(self.directory.name, 'responses.sqlite3'), 'ttl': 300}
+
+        self.app = create_app(ResponseCacheConfig)
+        self.client = self.app.test_client()
+
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.facade = self.app.extensions['FACADE']
+        self.owner = self.facade.create_user({
+            "first_name": "Owner", "last_name": "Test",
+            "email": "owner@example.com", "password": "password123"
+        })
+        self.place = self.facade.create_place({
+            "title": "Cabin", "description": "A small cabin", "price": 80.0,
+            "latitude": 45.0, "longitude": 2.0, "owner_id": self.owner.id, "amenities": []
+        })
+        self.owner_id, self.place_id = self.owner.id, self.place.id
+
+    def tearDown(self):
+        """Tear down the test database and the cache file"""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        self.directory.cleanup()
+
+    def _get_twice(self, url):
+        first = self.client.get(url)
+        second = self.client.get(url)
+        self.assertEqual(first.headers['X-Cache'], 'MISS')
+        return first, second
+
+    def test_hit_serves_same_bytes(self):
+        """Test the second request is served from the cache with the same body and validators"""
+        for url in ['/api/v1/places/', f'/api/v1/places/{self.place_id}', '/api/v1/amenities/',
+                    f'/api/v1/reviews/places/{self.place_id}/reviews?limit=5']:
+            with self.subTest(url=url):
+                first, second = self._get_twice(url)
+
+                # Assertions
+                self.assertEqual(second.headers['X-Cache'], 'HIT')
+                self.assertEqual(second.data, first.data)
+                self.assertEqual(second.headers['ETag'], first.headers['ETag'])
+
+    def test_hit_skips_database(self):
+        """Test a cached response does not query the database"""
+        from sqlalchemy import event
+
+        self.client.get('/api/v1/places/')
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            response = self.client.get('/api/v1/places/')
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        # Assertions
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(statements, [])
+
+    def test_query_order_shares_entry(self):
+        """Test the same query arguments in another order hit the same entry"""
+        self.client.get('/api/v1/places/?min_price=10&max_price=100')
+        response = self.client.get('/api/v1/places/?max_price=100&min_price=10')
+
+        # Assertions
+        self.assertEqual(response.headers['X-Cache'], 'HIT')
+
+    def test_unknown_arguments_not_cached(self):
+        """Test a request carrying an argument the view does not accept is served without adding an entry"""
+        store = self.app.extensions['RESPONSE_CACHE']
+        responses = [self.client.get(f'/api/v1/places/?junk={i}') for i in range(3)]
+        detail = self.client.get(f'/api/v1/places/{self.place_id}?junk=1')
+
+        # Assertions
+        self.assertEqual([response.status_code for response in responses], [200, 200, 200])
+        self.assertNotIn('X-Cache', responses[0].headers)
+        self.assertEqual(detail.status_code, 200)
+        self.assertEqual(store.stats()['size'], 0)
+
+    def test_cached_304(self):
+        """Test a cached entry answers If-None-Match with a 304"""
+        first, _ = self._get_twice('/api/v1/amenities/')
+        response = self.client.get('/api/v1/amenities/', headers={'If-None-Match': first.headers['ETag']})
+
+        # Assertions
+        self.assertEqual(response.status_code, 304)
+
+    def test_conditional_miss_stores_body(self):
+        """Test a conditional request missing the cache answers 304 and still stores the full body"""
+        first = self.client.get('/api/v1/amenities/')
+        self.app.extensions['RESPONSE_CACHE'].invalidate(['amenities'])
+        conditional = self.client.get('/api/v1/amenities/', headers={'If-None-Match': first.headers['ETag']})
+        plain = self.client.get('/api/v1/amenities/')
+
+        # Assertions
+        self.assertEqual(conditional.status_code, 304)
+        self.assertEqual(conditional.headers['X-Cache'], 'MISS')
+        self.assertEqual(plain.headers['X-Cache'], 'HIT')
+        self.assertEqual(plain.data, first.data)
+
+    def test_place_writes_invalidate(self):
+        """Test updating a place drops the listing and the detail"""
+        self._get_twice('/api/v1/places/')
+        self._get_twice(f'/api/v1/places/{self.place_id}')
+
+        self.facade.update_place(self.place_id, {"price": 95.0})
+        listing = self.client.get('/api/v1/places/')
+        detail = self.client.get(f'/api/v1/places/{self.place_id}')
+
+        # Assertions
+        self.assertEqual(listing.headers['X-Cache'], 'MISS')
+        self.assertEqual(listing.get_json()[0]['price'], 95.0)
+        self.assertEqual(detail.get_json()['price'], 95.0)
+
+    def test_amenity_write_invalidates(self):
+        """Test creating an amenity drops the amenity list but not the places"""
+        self._get_twice('/api/v1/amenities/')
+        self._get_twice('/api/v1/places/')
+
+        self.facade.create_amenity({"name": "Pool"})
+
+        # Assertions
+        self.assertEqual(len(self.client.get('/api/v1/amenities/').get_json()), 1)
+        self.assertEqual(self.client.get('/api/v1/places/').headers['X-Cache'], 'HIT')
+
+    def test_amenity_delete_invalidates_places(self):
+        """Test deleting an amenity drops the place listings filtered on it"""
+        amenity = self.facade.create_amenity({"name": "Pool"})
+        self.facade.update_place(self.place_id, {"amenities": [amenity.id]})
+        url = f'/api/v1/places/?amenities={amenity.id}'
+        first, _ = self._get_twice(url)
+        self._get_twice('/api/v1/places/')
+
+        self.facade.delete_amenity(amenity.id)
+        filtered = self.client.get(url)
+        listing = self.client.get('/api/v1/places/')
+
+        # Assertions
+        self.assertEqual(len(first.get_json()), 1)
+        self.assertEqual(filtered.headers['X-Cache'], 'MISS')
+        self.assertEqual(filtered.get_json(), [])
+        self.assertEqual(listing.headers['X-Cache'], 'MISS')
+
+    def test_review_write_invalidates(self):
+        """Test creating a review drops the reviews of its place"""
+        url = f'/api/v1/reviews/places/{self.place_id}/reviews'
+        self._get_twice(url)
+        reviewer = self.facade.create_user({
+            "first_name": "Reviewer", "last_name": "Test",
+            "email": "reviewer@example.com", "password": "password123"
+        })
+
+        self.facade.create_review({"text": "Lovely", "rating": 5, "user_id": reviewer.id, "place_id": self.place_id})
+        response = self.client.get(url)
+
+        # Assertions
+        self.assertEqual(response.headers['X-Cache'], 'MISS')
+        self.assertEqual([review['text'] for review in response.get_json()], ['Lovely'])
+
+    def test_rebuilt_past_repository_cache(self):
+        """Test an entry dropped by another worker's write is not rebuilt from this worker's repository cache"""
+        from sqlalchemy import text
+
+        self._get_twice(f'/api/v1/places/{self.place_id}')
+        # Another worker updates the place: only its commit and the tag bump reach this process
+        with db.engine.begin() as conn:
+            conn.execute(text("UPDATE places SET price = 95.0 WHERE id = :id"), {'id': self.place_id})
+        SQLiteStore(os.path.join(self.directory.name, 'responses.sqlite3')).invalidate([f'place:{self.place_id}'])
+        response = self.client.get(f'/api/v1/places/{self.place_id}')
+
+        # Assertions
+        self.assertEqual(response.headers['X-Cache'], 'MISS')
+        self.assertEqual(response.get_json()['price'], 95.0)
+
+    def test_errors_not_cached(self):
+        """Test a 404 is not stored"""
+        self.client.get('/api/v1/places/unknown')
+        response = self.client.get('/api/v1/places/unknown')
+
+        # Assertions
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('X-Cache', response.headers)
+
+
+class TestStaleWhileRevalidate(unittest.TestCase):
+    def setUp(self):
+        """Set up the app with a stale-while-revalidate policy on the place listing"""
+        self.directory = tempfile.TemporaryDirectory()
+
+        class RevalidateConfig(TestingConfig):
+            RESPONSE_CACHE = {
+                'path': os.path.join(self.directory.name, 'responses.sqlite3'),
+                'ttl': 300,
+                'endpoints': {'place_list': {'soft_ttl': 0.3, 'hard_ttl': 0.6}}
+            }
+
+        self.app = create_app(RevalidateConfig)
+        self.client = self.app.test_client()
+
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.facade = self.app.extensions['FACADE']
+        owner = self.facade.create_user({
+            "first_name": "Owner", "last_name": "Test",
+            "email": "owner@example.com", "password": "password123"
+        })
+        self.place_id = self.facade.create_place({
+            "title": "Cabin", "description": "A small cabin", "price": 80.0,
+            "latitude": 45.0, "longitude": 2.0, "owner_id": owner.id, "amenities": []
+        }).id
+
+    def tearDown(self):
+        """Tear down the test database and the cache file"""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        self.directory.cleanup()
+
+    def _wait_for_price(self, price):
+        deadline = time.monotonic() + 2
+        while time.monotonic() < deadline:
+            response = self.client.get('/api/v1/places/')
+            if response.get_json()[0]['price'] == price:
+                return response
+            time.sleep(0.02)
+        self.fail(f'price {price} never served')
+
+    def test_write_serves_stale_then_refreshes(self):
+        """Test the listing is served stale right after a write and refreshed in the background"""
+        self.assertEqual(self.client.get('/api/v1/places/').headers['X-Cache'], 'MISS')
+
+        self.facade.update_place(self.place_id, {"price": 95.0})
+        stale = self.client.get('/api/v1/places/')
+        fresh = self._wait_for_price(95.0)
+
+        # Assertions
+        self.assertEqual(stale.headers['X-Cache'], 'STALE')
+        self.assertEqual(stale.get_json()[0]['price'], 80.0)
+        self.assertEqual(fresh.headers['X-Cache'], 'HIT')
+
+    def test_soft_ttl(self):
+        """Test an entry older than the soft ttl is served stale"""
+        self.client.get('/api/v1/places/')
+        time.sleep(0.35)
+
+        # Assertions
+        self.assertEqual(self.client.get('/api/v1/places/').headers['X-Cache'], 'STALE')
+
+    def test_hard_ttl(self):
+        """Test an entry older than the hard ttl is rebuilt before answering"""
+        self.client.get('/api/v1/places/')
+        time.sleep(0.65)
+
+        # Assertions
+        self.assertEqual(self.client.get('/api/v1/places/').headers['X-Cache'], 'MISS')
+
+    def test_other_endpoints_not_affected(self):
+        """Test endpoints without a policy are still dropped on write"""
+        url = f'/api/v1/places/{self.place_id}'
+        self.client.get(url)
+        self.facade.update_place(self.place_id, {"price": 95.0})
+        response = self.client.get(url)
+
+        # Assertions
+        self.assertEqual(response.headers['X-Cache'], 'MISS')
+        self.assertEqual(response.get_json()['price'], 95.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
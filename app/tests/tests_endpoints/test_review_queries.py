@@ -0,0 +1,159 @@
+import unittest
+from app import create_app
+from app.extensions import db
+
+
+class TestReviewQueries(unittest.TestCase):
+    def setUp(self):
+        """Set up the app on an in-memory database with one place and its reviewers"""
+        self.app = create_app("config.TestingConfig")
+        self.client = self.app.test_client()
+
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.facade = self.app.extensions['FACADE']
+        self.owner = self._create_user("owner")
+        self.place = self.facade.create_place({
+            "title": "Reviewed Place",
+            "description": "A place with many reviews",
+            "price": 100.0,
+            "latitude": 45.0,
+            "longitude": 2.0,
+            "owner_id": self.owner.id,
+            "amenities": []
+        })
+
+    def tearDown(self):
+        """Tear down the test database"""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _create_user(self, name):
+        return self.facade.create_user({
+            "first_name": name.capitalize(),
+            "last_name": "Test",
+            "email": f"{name}@example.com",
+            "password": "password123"
+        })
+
+    def _create_reviews(self, ratings):
+        reviews = []
+        for i, rating in enumerate(ratings):
+            reviewer = self._create_user(f"reviewer{i}")
+            reviews.append(self.facade.create_review({
+                "text": f"Review {i}",
+                "rating": rating,
+                "user_id": reviewer.id,
+                "place_id": self.place.id
+            }))
+        return reviews
+
+    def _walk(self, url):
+        texts = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.get_json()
+            texts.extend(review['text'] for review in data['items'])
+            url = f"{url.split('&cursor=')[0]}&cursor={data['next_cursor']}" if data['next_cursor'] else None
+        return texts
+
+    def test_place_reviews_sorted_by_rating(self):
+        """Test paging through the reviews of a place, best rated first"""
+        self._create_reviews([3, 5, 1, 4])
+        url = f'/api/v1/reviews/places/{self.place.id}/reviews?limit=3&sort=rating'
+
+        self.assertEqual(self._walk(url), ['Review 1', 'Review 3', 'Review 0', 'Review 2'])
+
+    def test_place_reviews_sorted_by_date(self):
+        """Test paging through the reviews of a place, newest first"""
+        reviews = self._create_reviews([3, 5, 1])
+        url = f'/api/v1/reviews/places/{self.place.id}/reviews?limit=2&sort=recent'
+
+        expected = [review.text for review in sorted(reviews, key=lambda r: (r.created_at, r.id), reverse=True)]
+        self.assertEqual(self._walk(url), expected)
+
+    def test_place_reviews_invalid_sort(self):
+        """Test an unknown sort order is rejected"""
+        response = self.client.get(f'/api/v1/reviews/places/{self.place.id}/reviews?sort=oldest')
+        self.assertEqual(response.status_code, 400)
+
+    def test_duplicate_review_rejected(self):
+        """Test a second review of the same place by the same user is refused with 403"""
+        review = self._create_reviews([4])[0]
+        self.assertTrue(self.facade.review_exists(review.user_id, self.place.id))
+        self.assertFalse(self.facade.review_exists(self.owner.id, self.place.id))
+
+        login = self.client.post('/api/v1/auth/login', json={
+            "email": "reviewer0@example.com", "password": "password123"})
+        token = login.get_json()["access_token"]
+        response = self.client.post('/api/v1/reviews/', json={
+            "text": "Again",
+            "rating": 5,
+            "user_id": review.user_id,
+            "place_id": self.place.id
+        }, headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, 403)
+
+    def test_duplicate_review_caught_by_unique_index(self):
+        """Test the unique index rejects a duplicate that skipped the existence check"""
+        from app.services.facade import DuplicateReviewError
+
+        review = self._create_reviews([4])[0]
+        with self.assertRaises(DuplicateReviewError):
+            self.facade.create_review({
+                "text": "Again",
+                "rating": 5,
+                "user_id": review.user_id,
+                "place_id": self.place.id
+            })
+        self.assertEqual(len(self.facade.get_review_rows_by_place(self.place.id)), 1)
+
+    def test_user_reviews(self):
+        """Test listing a user's reviews with the place title in one query"""
+        from sqlalchemy import event
+
+        review = self._create_reviews([4])[0]
+        review_id, user_id = review.id, review.user_id
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        db.session.expire_all()
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            response = self.client.get(f'/api/v1/users/{user_id}/reviews?limit=10')
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        self.assertEqual(response.status_code, 200)
+        items = response.get_json()['items']
+        self.assertEqual([item['id'] for item in items], [review_id])
+        self.assertEqual(items[0]['place_name'], 'Reviewed Place')
+        # The reviews and their places come from a single joined query, besides the ETag version queries
+        statements = [statement for statement in statements if 'count(' not in statement]
+        review_queries = [statement for statement in statements if 'FROM reviews' in statement]
+        self.assertEqual(len(review_queries), 1)
+        self.assertIn('JOIN places', review_queries[0])
+        self.assertFalse(any('FROM places' in statement for statement in statements))
+
+        response = self.client.get('/api/v1/users/unknown/reviews')
+        self.assertEqual(response.status_code, 404)
+
+    def test_place_reviews_use_index(self):
+        """Test the per-place review query is answered through an index"""
+        from app.models.review import Review
+
+        query = Review.query.filter(Review.place_id == self.place.id).order_by(Review.rating.desc())
+        statement = str(query.statement.compile(compile_kwargs={"literal_binds": True}))
+        plan = db.session.execute(db.text(f"EXPLAIN QUERY PLAN {statement}")).fetchall()
+
+        self.assertTrue(any('USING INDEX ix_reviews_place_id' in str(row) for row in plan))
+
+
+if __name__ == "__main__":
+    unittest.main()
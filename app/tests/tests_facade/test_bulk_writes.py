@@ -0,0 +1,150 @@
+import unittest
+from sqlalchemy import event
+from app import create_app
+from app.extensions import db
+from app.services.facade import DuplicateEmailError, DuplicateReviewError
+from config import TestingConfig
+
+
+class TestBulkWrites(unittest.TestCase):
+    def setUp(self):
+        """Set up the app on an in-memory database with two amenities"""
+        self.app = create_app(TestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.facade = self.app.extensions['FACADE']
+        self.amenities = self.facade.bulk_create_amenities([{"name": "Wifi"}, {"name": "Pool"}])
+
+    def tearDown(self):
+        """Tear down the test database"""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _users(self, count):
+        return self.facade.bulk_create_users([{
+            "first_name": "User", "last_name": str(i),
+            "email": f"user{i}@example.com", "password": "password123"
+        } for i in range(count)], chunk_size=2)
+
+    def _places(self, owners):
+        return self.facade.bulk_create_places([{
+            "title": f"Place {i}", "description": "A place", "price": 50.0 + i,
+            "latitude": 45.0, "longitude": 2.0, "owner_id": owner.id,
+            "amenities": [amenity.id for amenity in self.amenities]
+        } for i, owner in enumerate(owners)])
+
+    def test_create(self):
+        """Test bulk created users log in and places list their amenities"""
+        users = self._users(3)
+        places = self._places(users)
+        db.session.remove()
+
+        # Assertions
+        self.assertTrue(self.facade.get_user_by_email("user2@example.com").verify_password("password123"))
+        self.assertFalse(self.facade.is_email_available("user0@example.com"))
+        place = self.facade.get_place(places[0].id)
+        self.assertEqual({amenity.name for amenity in place.amenities_obj}, {"Wifi", "Pool"})
+        self.assertIsNotNone(place.geo_cell)
+        self.assertEqual(len(self.facade.get_place_rows_by_owner(users[1].id)), 1)
+
+    def test_create_validates(self):
+        """Test one invalid entry rejects the whole batch before anything is written"""
+        with self.assertRaises(ValueError):
+            self.facade.bulk_create_users([
+                {"first_name": "Ok", "last_name": "User", "email": "ok@example.com", "password": "x"},
+                {"first_name": "", "last_name": "User", "email": "bad@example.com", "password": "x"},
+            ])
+        with self.assertRaises(DuplicateEmailError):
+            self.facade.bulk_create_users([
+                {"first_name": "A", "last_name": "User", "email": "same@example.com", "password": "x"},
+                {"first_name": "B", "last_name": "User", "email": "same@example.com", "password": "x"},
+            ])
+
+        # Assertions
+        self.assertEqual(self.facade.get_user_rows(), [])
+
+    def test_update_seen_through_caches(self):
+        """Test bulk updates are visible to getters that were cached before"""
+        users = self._users(2)
+        places = self._places(users)
+        self.facade.get_place(places[0].id)
+        self.facade.get_user(users[0].id)
+        db.session.remove()
+
+        self.facade.bulk_update_places({places[0].id: {"price": 99.0, "latitude": -10.0}})
+        self.facade.bulk_update_users({users[0].id: {"first_name": "Renamed"}})
+        db.session.remove()
+
+        # Assertions
+        place = self.facade.get_place(places[0].id)
+        self.assertEqual(place.price, 99.0)
+        self.assertNotEqual(place.geo_cell, places[1].geo_cell)
+        self.assertEqual(self.facade.get_user(users[0].id).first_name, "Renamed")
+        with self.assertRaises(ValueError):
+            self.facade.bulk_update_places({places[0].id: {"amenities": []}})
+
+    def test_reviews(self):
+        """Test bulk reviews check their users and places and reject duplicates"""
+        users = self._users(3)
+        places = self._places(users[:1])
+        reviews = self.facade.bulk_create_reviews([
+            {"text": "Nice", "rating": 5, "user_id": user.id, "place_id": places[0].id} for user in users[1:]])
+        self.facade.bulk_update_reviews({reviews[0].id: {"rating": 3}})
+
+        # Assertions
+        self.assertEqual(sorted(row[2] for row in self.facade.get_review_rows_by_place(places[0].id)), [3, 5])
+        with self.assertRaises(ValueError):
+            self.facade.bulk_create_reviews(
+                [{"text": "Nice", "rating": 5, "user_id": "404", "place_id": places[0].id}])
+        with self.assertRaises(DuplicateReviewError):
+            self.facade.bulk_create_reviews(
+                [{"text": "Again", "rating": 4, "user_id": users[1].id, "place_id": places[0].id}])
+
+    def test_delete_cascades(self):
+        """Test bulk deleting users deletes their places and reviews, cached or not"""
+        users = self._users(3)
+        places = self._places(users[:2])
+        self.facade.bulk_create_reviews([
+            {"text": "Nice", "rating": 5, "user_id": users[2].id, "place_id": place.id} for place in places])
+        self.facade.get_place(places[0].id)
+        self.facade.get_review_rows_by_place(places[1].id)
+
+        deleted = self.facade.bulk_delete_users([users[0].id, users[2].id])
+        db.session.remove()
+
+        # Assertions
+        self.assertEqual(sorted(deleted), sorted([users[0].id, users[2].id]))
+        self.assertIsNone(self.facade.get_place(places[0].id))
+        self.assertEqual(self.facade.get_review_rows_by_place(places[1].id), [])
+        self.assertEqual(self.facade.bulk_delete_places([places[1].id]), [places[1].id])
+        self.assertEqual(self.facade.get_place_rows(), [])
+
+    def test_chunks_are_transactions(self):
+        """Test each chunk commits once with one INSERT per table"""
+        users = self._users(1)
+        statements, commits = [], []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement.split()[0])
+
+        def commit(conn):
+            commits.append(conn)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        event.listen(db.engine, "commit", commit)
+        try:
+            self._places(users * 10)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+            event.remove(db.engine, "commit", commit)
+
+        # Assertions
+        self.assertEqual(len(commits), 1)
+        self.assertEqual(statements.count('INSERT'), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+from sqlalchemy import event
+from app import create_app
+from app.extensions import db
+from config import TestingConfig
+
+
+class NoCacheConfig(TestingConfig):
+    # Only the request-scoped identity map, so every miss is visible as a query
+    REPOSITORY_CACHE = {}
+
+
+class TestIdentityMap(unittest.TestCase):
+    def setUp(self):
+        """Set up the app on an in-memory database with a place and a reviewer"""
+        self.app = create_app(NoCacheConfig)
+        self.client = self.app.test_client()
+
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.facade = self.app.extensions['FACADE']
+        self.owner = self.facade.create_user({
+            "first_name": "Owner", "last_name": "Test",
+            "email": "owner@example.com", "password": "password123"
+        })
+        self.reviewer = self.facade.create_user({
+            "first_name": "Reviewer", "last_name": "Test",
+            "email": "reviewer@example.com", "password": "password123"
+        })
+        self.place = self.facade.create_place({
+            "title": "Cabin", "description": "A small cabin", "price": 80.0,
+            "latitude": 45.0, "longitude": 2.0, "owner_id": self.owner.id, "amenities": []
+        })
+        self.place_id, self.reviewer_id = self.place.id, self.reviewer.id
+
+        self.statements = []
+        event.listen(db.engine, "before_cursor_execute", self._record)
+
+    def tearDown(self):
+        """Tear down the test database"""
+        event.remove(db.engine, "before_cursor_execute", self._record)
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def _selects(self, table):
+        return [s for s in self.statements if s.startswith('SELECT') and f'FROM {table}' in s]
+
+    def test_repeated_lookups_cost_one_query(self):
+        """Test the same id or email is only loaded once per request"""
+        with self.app.test_request_context():
+            db.session.expire_all()
+            self.statements = []
+            first = self.facade.get_user_by_email("reviewer@example.com")
+            second = self.facade.get_user_by_email("reviewer@example.com")
+            by_id = self.facade.get_user(self.reviewer_id)
+
+            # Assertions
+            self.assertIs(first, second)
+            self.assertIs(first, by_id)
+            self.assertEqual(len(self._selects('users')), 1)
+
+    def test_repeated_misses_cost_one_query(self):
+        """Test an unknown id is only looked up once per request"""
+        with self.app.test_request_context():
+            self.statements = []
+            self.assertIsNone(self.facade.get_place("unknown"))
+            self.assertIsNone(self.facade.get_place("unknown"))
+
+            # Assertions
+            self.assertEqual(len(self._selects('places')), 1)
+
+    def test_write_clears_identity_map(self):
+        """Test a lookup after a write sees the new data"""
+        with self.app.test_request_context():
+            self.facade.get_place(self.place_id)
+            self.facade.delete_place(self.place_id)
+
+            # Assertions
+            self.assertIsNone(self.facade.get_place(self.place_id))
+
+    def test_review_post_loads_place_and_user_once(self):
+        """Test ReviewList.post and create_review share their lookups"""
+        login = self.client.post('/api/v1/auth/login', json={
+            "email": "reviewer@example.com", "password": "password123"})
+        token = login.get_json()["access_token"]
+        db.session.expire_all()
+        self.statements = []
+
+        response = self.client.post('/api/v1/reviews/', json={
+            "text": "Lovely", "rating": 5, "user_id": self.reviewer_id, "place_id": self.place_id
+        }, headers={"Authorization": f"Bearer {token}"})
+
+        # Assertions
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(self._selects('places')), 1)
+        self.assertEqual(len(self._selects('users')), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
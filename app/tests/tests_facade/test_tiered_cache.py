@@ -0,0 +1,249 @@
+import os
+import tempfile
+import unittest
+from sqlalchemy import event, text
+from app import create_app
+from app.cache.sqlite_store import SQLiteStore
+from app.cache.tiered import TieredCache
+from app.extensions import db
+from app.services.facade import PLACE_WITH_OWNER_ROW
+from config import TestingConfig
+
+
+class TestTieredCache(unittest.TestCase):
+    def setUp(self):
+        """Set up two workers' caches sharing one L2 file, driven by a fake clock"""
+        self.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(self.directory.name, 'tiered.sqlite3')
+        self.now = 0
+        self.caches = [TieredCache(SQLiteStore(path), l1_ttl=5, ttl=60, clock=lambda: self.now)
+                       for _ in range(2)]
+        self.loads = 0
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _load(self, value='value'):
+        def load():
+            self.loads += 1
+            return value
+        return load
+
+    def test_tiers(self):
+        """Test a value loaded by one worker is served from its L1 and from L2 to the other"""
+        first, second = self.caches
+        first.get_or_load('ns', 'a', self._load(), tags=['t'])
+        first.get_or_load('ns', 'a', self._load(), tags=['t'])
+        value = second.get_or_load('ns', 'a', self._load(), tags=['t'])
+
+        # Assertions
+        self.assertEqual(value, 'value')
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(first.stats()['namespaces']['ns']['l1_hits'], 1)
+        self.assertEqual(second.stats()['namespaces']['ns']['l2_hits'], 1)
+        self.assertEqual(first.stats()['namespaces']['ns']['l1_hit_ratio'], 0.5)
+
+    def test_namespaces(self):
+        """Test the same key in two namespaces holds two values"""
+        first = self.caches[0]
+        first.get_or_load('users', 'a', self._load('user'))
+
+        # Assertions
+        self.assertEqual(first.get_or_load('places', 'a', self._load('place')), 'place')
+
+    def test_invalidate(self):
+        """Test invalidating a tag drops it from L1 and L2, other workers' L1 lag until l1_ttl"""
+        first, second = self.caches
+        first.get_or_load('ns', 'a', self._load('old'), tags=['t'])
+        second.get_or_load('ns', 'a', self._load('old'), tags=['t'])
+        first.invalidate(['t'])
+
+        # Assertions
+        self.assertEqual(first.get_or_load('ns', 'a', self._load('new'), tags=['t']), 'new')
+        self.assertEqual(second.get_or_load('ns', 'a', self._load('new'), tags=['t']), 'old')
+        self.now = 6
+        self.assertEqual(second.get_or_load('ns', 'a', self._load('newer'), tags=['t']), 'new')
+
+    def test_stale_load_not_stored(self):
+        """Test a value loaded while its tag was invalidated is returned but not cached"""
+        first = self.caches[0]
+
+        def load():
+            first.invalidate(['t'])
+            return 'stale'
+
+        # Assertions
+        self.assertEqual(first.get_or_load('ns', 'a', load, tags=['t']), 'stale')
+        self.assertEqual(first.get_or_load('ns', 'a', self._load('fresh'), tags=['t']), 'fresh')
+
+    def test_none_not_cached(self):
+        """Test a missing value is loaded again"""
+        first = self.caches[0]
+        first.get_or_load('ns', 'a', self._load(None))
+        first.get_or_load('ns', 'a', self._load(None))
+
+        # Assertions
+        self.assertEqual(self.loads, 2)
+
+
+class TestFacadeTieredCache(unittest.TestCase):
+    def setUp(self):
+        """Set up two workers sharing one database file and one tiered cache file"""
+        self.directory = tempfile.TemporaryDirectory()
+        directory = self.directory.name
+
+        class TieredConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(directory, 'hbnb.db')}"
+            # Only the tiered cache, so every miss is visible as a query
+            REPOSITORY_CACHE = {}
+            TIERED_CACHE = {'path': os.path.join(directory, 'tiered.sqlite3'), 'l1_ttl': 5, 'ttl': 300}
+
+        self.workers = [create_app(TieredConfig), create_app(TieredConfig)]
+        with self.workers[0].app_context():
+            db.create_all()
+            facade = self.workers[0].extensions['FACADE']
+            owner = facade.create_user({
+                "first_name": "Owner", "last_name": "Test",
+                "email": "owner@example.com", "password": "password123"
+            })
+            self.owner_id = owner.id
+            self.place_id = facade.create_place({
+                "title": "Cabin", "description": "A small cabin", "price": 80.0,
+                "latitude": 45.0, "longitude": 2.0, "owner_id": owner.id, "amenities": []
+            }).id
+
+    def tearDown(self):
+        """Tear down the database and the cache file"""
+        for worker in self.workers:
+            with worker.app_context():
+                db.session.remove()
+                db.engine.dispose()
+        self.directory.cleanup()
+
+    def _request(self, worker, call):
+        """Run call(facade) in a fresh request of a worker, return its result and the SELECTs it ran"""
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('SELECT'):
+                statements.append(statement)
+
+        with worker.test_request_context():
+            event.listen(db.engine, "before_cursor_execute", record)
+            try:
+                result = call(worker.extensions['FACADE'])
+            finally:
+                event.remove(db.engine, "before_cursor_execute", record)
+                db.session.remove()
+        return result, statements
+
+    def test_getter_served_from_both_tiers(self):
+        """Test get_place only queries once across two requests and two workers"""
+        _, first = self._request(self.workers[0], lambda facade: facade.get_place(self.place_id).title)
+        title, second = self._request(self.workers[0], lambda facade: facade.get_place(self.place_id).title)
+        _, other = self._request(self.workers[1], lambda facade: facade.get_place(self.place_id).title)
+
+        # Assertions
+        self.assertEqual(title, "Cabin")
+        self.assertEqual(len(first), 1)
+        self.assertEqual(second, [])
+        self.assertEqual(other, [])
+        stats = self.workers[1].extensions['FACADE'].cache_stats()['tiered']['namespaces']['place']
+        self.assertEqual(stats['l2_hit_ratio'], 1.0)
+
+    def test_listing_served_from_cache(self):
+        """Test a cached place listing, owners included, is served without a query"""
+        def owners(facade):
+            return [row[PLACE_WITH_OWNER_ROW.index('place_owner.first_name')] for row in facade.get_place_rows({})]
+
+        self._request(self.workers[0], owners)
+        names, statements = self._request(self.workers[0], owners)
+
+        # Assertions
+        self.assertEqual(names, ["Owner"])
+        self.assertEqual(statements, [])
+
+    def test_write_invalidates_every_worker(self):
+        """Test a place update is seen by the worker that wrote it and, through L2, by the other"""
+        def price(facade):
+            return facade.get_place(self.place_id).price
+
+        self._request(self.workers[0], price)
+        self._request(self.workers[0], lambda facade: facade.update_place(self.place_id, {"price": 95.0}))
+
+        # Assertions
+        self.assertEqual(self._request(self.workers[0], price)[0], 95.0)
+        self.assertEqual(self._request(self.workers[1], price)[0], 95.0)
+
+    def test_cascade_invalidates(self):
+        """Test deleting a user drops the cached places they owned and the reviews they wrote"""
+        def review(facade):
+            reviewer = facade.create_user({
+                "first_name": "Reviewer", "last_name": "Test",
+                "email": "reviewer@example.com", "password": "password123"
+            })
+            facade.create_review({"text": "Lovely", "rating": 5, "user_id": reviewer.id, "place_id": self.place_id})
+            return reviewer.id
+
+        reviewer_id, _ = self._request(self.workers[0], review)
+        self._request(self.workers[0], lambda facade: facade.get_place(self.place_id))
+        self._request(self.workers[0], lambda facade: facade.get_review_rows_by_place(self.place_id))
+        self._request(self.workers[0], lambda facade: facade.delete_user(reviewer_id))
+        reviews, _ = self._request(self.workers[0], lambda facade: facade.get_review_rows_by_place(self.place_id))
+        self._request(self.workers[0], lambda facade: facade.delete_user(self.owner_id))
+
+        # Assertions
+        self.assertEqual(reviews, [])
+        self.assertIsNone(self._request(self.workers[0], lambda facade: facade.get_place(self.place_id))[0])
+
+
+class TestTieredCacheOverRepositoryCache(unittest.TestCase):
+    def setUp(self):
+        """Set up a worker with its repository cache and an L1 that always misses, and a user"""
+        self.directory = tempfile.TemporaryDirectory()
+        directory = self.directory.name
+        self.l2_path = os.path.join(directory, 'tiered.sqlite3')
+
+        class TieredConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(directory, 'hbnb.db')}"
+            REPOSITORY_CACHE = {'user': {'max_size': 16, 'ttl': 300}}
+            TIERED_CACHE = {'path': os.path.join(directory, 'tiered.sqlite3'), 'l1_ttl': 0, 'ttl': 300}
+
+        self.app = create_app(TieredConfig)
+        with self.app.app_context():
+            db.create_all()
+            self.user_id = self.app.extensions['FACADE'].create_user({
+                "first_name": "Before", "last_name": "Test",
+                "email": "user@example.com", "password": "password123"
+            }).id
+
+    def tearDown(self):
+        """Tear down the database and the cache file"""
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        self.directory.cleanup()
+
+    def _first_name(self):
+        with self.app.test_request_context():
+            try:
+                return self.app.extensions['FACADE'].get_user(self.user_id).first_name
+            finally:
+                db.session.remove()
+
+    def test_other_worker_write(self):
+        """Test L2 is refilled from the database, not from a repository cache another worker's write missed"""
+        self.assertEqual(self._first_name(), "Before")
+
+        # Another worker renames the user: no flush in this process, only its commit and the L2 tag bump
+        with self.app.app_context():
+            with db.engine.begin() as conn:
+                conn.execute(text("UPDATE users SET first_name = 'After' WHERE id = :id"), {'id': self.user_id})
+        TieredCache(SQLiteStore(self.l2_path)).invalidate(['users', f'user:{self.user_id}'])
+
+        # Assertions
+        self.assertEqual(self._first_name(), "After")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,13 @@
+import base64
+import json
 import unittest
 from flask import Flask
+from sqlalchemy.exc import IntegrityError
 from app.extensions import db
+from app.models.amenity import Amenity
+from app.models.association_tables import place_amenity
+from app.models.place import Place
+from app.models.review import Review
 from app.models.user import User
 from app.persistence.repository import SQLAlchemyRepository
 
@@ -59,6 +66,14 @@ class TestSQLAlchemyRepository(unittest.TestCase):
         self.assertEqual(retrieved_user.first_name, "Alice")
         self.assertEqual(retrieved_user.email, "alice@example.com")
 
+    def test_get_many(self):
+        """Test fetching several objects at once and reporting the missing ids"""
+        found, missing = self.repo.get_many(["2", "3", "1"])
+
+        # Assertions
+        self.assertEqual([user.id for user in found], ["2", "1"])
+        self.assertEqual(missing, ["3"])
+
     def test_get_all(self):
         """Test retrieving all objects"""
         all_users = self.repo.get_all()
@@ -85,6 +100,58 @@ class TestSQLAlchemyRepository(unittest.TestCase):
         # Assertions
         self.assertIsNone(deleted_user)
 
+    def test_bulk_add(self):
+        """Test inserting objects in chunks, with their column defaults"""
+        users = [User(id=str(i), first_name="User", last_name=str(i), email=f"user{i}@example.com",
+                      password="password") for i in range(3, 8)]
+        self.repo.bulk_add(users, chunk_size=2)
+        db.session.remove()
+
+        # Assertions
+        self.assertEqual(len(self.repo.get_all()), 7)
+        self.assertIsNotNone(self.repo.get("7").created_at)
+        self.assertFalse(self.repo.get("7").is_admin)
+
+    def test_bulk_add_rolls_back_chunk(self):
+        """Test a chunk with a duplicate email is not inserted, the chunks before it are"""
+        users = [User(id="3", first_name="Carol", last_name="Doe", email="carol@example.com", password="x"),
+                 User(id="4", first_name="Dave", last_name="Doe", email="alice@example.com", password="x")]
+        with self.assertRaises(IntegrityError):
+            self.repo.bulk_add(users, chunk_size=1)
+
+        # Assertions
+        self.assertIsNotNone(self.repo.get("3"))
+        self.assertIsNone(self.repo.get("4"))
+
+    def test_bulk_update(self):
+        """Test updating objects with different columns changed"""
+        self.repo.bulk_update({"1": {"first_name": "Alicia"}, "2": {"last_name": "Smythe", "is_admin": True}})
+        db.session.remove()
+
+        # Assertions
+        self.assertEqual(self.repo.get("1").first_name, "Alicia")
+        self.assertEqual(self.repo.get("2").last_name, "Smythe")
+        self.assertTrue(self.repo.get("2").is_admin)
+        with self.assertRaises(ValueError):
+            self.repo.bulk_update({"1": {"places": []}})
+
+    def test_bulk_delete_cascades(self):
+        """Test deleting users deletes their places, the places' reviews and amenity links"""
+        amenity = Amenity(id="a1", name="Wifi")
+        db.session.add(amenity)
+        place = Place(id="p1", title="Cabin", description="Small", price=10.0,
+                      latitude=1.0, longitude=1.0, owner_id="1", amenities_obj=[amenity])
+        db.session.add(place)
+        db.session.add(Review(id="r1", text="Nice", rating=5, user_id="2", place_id="p1"))
+        db.session.commit()
+
+        deleted = self.repo.bulk_delete(["1", "404"])
+
+        # Assertions
+        self.assertEqual(deleted, {Review: ["r1"], Place: ["p1"], User: ["1"]})
+        self.assertEqual(db.session.execute(place_amenity.select()).all(), [])
+        self.assertIsNotNone(self.repo.get("2"))
+
     def test_get_by_attribute(self):
         """Test retrieving an object by an attribute"""
         retrieved_user = self.repo.get_by_attribute("email", "bob@example.com")
@@ -93,6 +160,84 @@ class TestSQLAlchemyRepository(unittest.TestCase):
         self.assertIsNotNone(retrieved_user)
         self.assertEqual(retrieved_user.first_name, "Bob")
 
+    def test_page(self):
+        """Test walking the objects page by page with cursors"""
+        first_page, cursor = self.repo.page_rows(["id"], 1)
+        self.assertEqual(len(first_page), 1)
+        self.assertIsNotNone(cursor)
+
+        second_page, cursor = self.repo.page_rows(["id"], 1, cursor)
+        self.assertEqual(len(second_page), 1)
+        self.assertIsNone(cursor)
+
+        # Assertions
+        ids = {first_page[0][0], second_page[0][0]}
+        self.assertEqual(ids, {self.user1.id, self.user2.id})
+
+    def test_find(self):
+        """Test filters are applied by the database"""
+        users = self.repo.find([("last_name", "eq", "Smith")])
+
+        # Assertions
+        self.assertEqual([user.id for user in users], [self.user2.id])
+        self.assertEqual(len(self.repo.find([("id", "in", ["1", "2", "3"])])), 2)
+
+    def test_exists(self):
+        """Test checking for a matching row"""
+        self.assertTrue(self.repo.exists(email="bob@example.com"))
+        self.assertFalse(self.repo.exists(email="bob@example.com", first_name="Alice"))
+
+    def test_get_version(self):
+        """Test the version reports the row count and the latest update"""
+        count, updated_at = self.repo.get_version()
+        self.repo.update(self.user1.id, {"first_name": "Alicia"})
+
+        # Assertions
+        self.assertEqual(count, 2)
+        self.assertGreaterEqual(self.repo.get_version()[1], updated_at)
+        self.assertEqual(self.repo.get_version([("id", "eq", "3")]), (0, None))
+
+    def test_rows(self):
+        """Test reading columns as tuples, in order and page by page"""
+        order = (("first_name", True), ("id", True))
+        first_page, cursor = self.repo.page_rows(["id", "email"], 1, order=order)
+        second_page, last_cursor = self.repo.page_rows(["id", "email"], 1, cursor, order=order)
+
+        # Assertions
+        self.assertEqual(self.repo.get_all_rows(["first_name"], order=order), [("Bob",), ("Alice",)])
+        self.assertEqual(first_page, [("2", "bob@example.com")])
+        self.assertEqual(second_page, [("1", "alice@example.com")])
+        self.assertIsNone(last_cursor)
+
+    def test_rows_of_related_columns(self):
+        """Test 'relationship.attr' columns are read through a join, None without a related row"""
+        db.session.add(Place(id="p1", title="Cabin", description="Small", price=10.0,
+                             latitude=1.0, longitude=1.0, owner_id="1"))
+        db.session.add(Place(id="p2", title="Flat", description="Orphan", price=20.0,
+                             latitude=1.0, longitude=1.0, owner_id="404"))
+        db.session.commit()
+        places = SQLAlchemyRepository(Place)
+
+        rows = places.get_all_rows(["id", "place_owner.first_name"], [("price", "gte", 5.0)],
+                                   order=(("price", False),))
+        page, _ = places.page_rows(["title", "place_owner.email"], 1, filters=[("owner_id", "eq", "1")])
+
+        # Assertions
+        self.assertEqual(rows, [("p1", "Alice"), ("p2", None)])
+        self.assertEqual(page, [("Cabin", "alice@example.com")])
+
+    def test_page_invalid_cursor(self):
+        """Test a malformed cursor is rejected"""
+        with self.assertRaises(ValueError):
+            self.repo.page_rows(["id"], 1, "not-a-cursor")
+
+    def test_page_cursor_of_wrong_types(self):
+        """Test a well-formed cursor whose values do not match the sort columns is rejected"""
+        for values in ([["x"], "y"], [{"dt": "2024-01-01T00:00:00"}, 7], [{"dt": "not a date"}, "1"]):
+            cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+            with self.subTest(values=values), self.assertRaises(ValueError):
+                self.repo.page_rows(["id"], 1, cursor)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,332 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from flask import Flask
+from sqlalchemy import event
+from app import create_app
+from app.cache.lru import LRUCache
+from app.cache.single_flight import SingleFlight
+from app.extensions import db
+from app.models.user import User
+from app.models.place import Place
+from app.persistence.repository import SQLAlchemyRepository
+from app.persistence.caching_repository import CachingRepository
+from config import TestingConfig
+
+
+class TestLRUCache(unittest.TestCase):
+    def setUp(self):
+        """Set up a cache driven by a fake clock"""
+        self.now = 0
+        self.cache = LRUCache(max_size=2, ttl=10, clock=lambda: self.now)
+
+    def test_eviction(self):
+        """Test the least recently used entry is evicted first"""
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        self.cache.set("c", 3)
+
+        # Assertions
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_ttl(self):
+        """Test entries expire after the ttl"""
+        self.cache.set("a", 1)
+        self.now = 11
+
+        # Assertions
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+
+class TestSingleFlight(unittest.TestCase):
+    def _run_concurrently(self, flight, load, threads=8):
+        results = []
+        workers = [threading.Thread(target=lambda: results.append(flight.do("key", load))) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return results
+
+    def test_concurrent_calls_share_one_load(self):
+        """Test callers arriving during a load wait for its result"""
+        flight = SingleFlight()
+        calls = []
+
+        def load():
+            calls.append(1)
+            time.sleep(0.2)
+            return "value"
+
+        results = self._run_concurrently(flight, load)
+
+        # Assertions
+        self.assertEqual(results, ["value"] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.stats(), {"loads": 1, "coalesced": 7})
+
+    def test_error_shared_and_key_released(self):
+        """Test waiting callers get the error and the next call loads again"""
+        flight = SingleFlight()
+
+        def fail():
+            time.sleep(0.1)
+            raise ValueError("boom")
+
+        errors = []
+
+        def call():
+            try:
+                flight.do("key", fail)
+            except ValueError as error:
+                errors.append(error)
+
+        workers = [threading.Thread(target=call) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        # Assertions
+        self.assertEqual(len(errors), 4)
+        self.assertEqual(flight.do("key", lambda: "ok"), "ok")
+
+
+class TestCachingRepository(unittest.TestCase):
+    def setUp(self):
+        """Set up the test app, database, and caching repository"""
+        self.app = Flask(__name__)
+        self.app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        self.app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        db.init_app(self.app)
+
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.repo = CachingRepository(SQLAlchemyRepository(User), max_size=10, ttl=60)
+        self.user = User(id="1", first_name="Alice", last_name="Doe",
+                         email="alice@example.com", password="password123")
+        self.repo.add(self.user)
+
+        self.statements = []
+        event.listen(db.engine, "before_cursor_execute", self._record)
+
+    def tearDown(self):
+        """Tear down the test database"""
+        event.remove(db.engine, "before_cursor_execute", self._record)
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def _new_request(self):
+        """Drop the session like the end of a request does"""
+        db.session.remove()
+        self.statements = []
+
+    def test_get_served_from_cache(self):
+        """Test a repeated get does not reach the database"""
+        self.repo.get("1")
+        self._new_request()
+
+        user = self.repo.get("1")
+
+        # Assertions
+        self.assertEqual(user.first_name, "Alice")
+        self.assertEqual(self.statements, [])
+        self.assertEqual(self.repo.stats()["get"]["hits"], 1)
+
+    def test_unknown_id_cached(self):
+        """Test a repeated lookup of an unknown id does not reach the database"""
+        self.assertIsNone(self.repo.get("404"))
+        self._new_request()
+
+        # Assertions
+        self.assertIsNone(self.repo.get("404"))
+        self.assertEqual(self.statements, [])
+        self.assertEqual(self.repo.stats()["missing"]["hits"], 1)
+
+    def test_add_forgets_unknown_id(self):
+        """Test an object added with a previously unknown id is found"""
+        self.repo.get("2")
+        self.repo.add(User(id="2", first_name="Bob", last_name="Smith",
+                           email="bob@example.com", password="password456"))
+        self._new_request()
+
+        # Assertions
+        self.assertEqual(self.repo.get("2").first_name, "Bob")
+
+    def test_get_by_attribute_served_from_cache(self):
+        """Test a repeated attribute lookup does not reach the database"""
+        self.repo.get_by_attribute("email", "alice@example.com")
+        self._new_request()
+
+        user = self.repo.get_by_attribute("email", "alice@example.com")
+
+        # Assertions
+        self.assertEqual(user.id, "1")
+        self.assertEqual(self.statements, [])
+
+    def test_update_invalidates(self):
+        """Test an update is visible to the next lookups"""
+        self.repo.get("1")
+        self.repo.get_by_attribute("email", "alice@example.com")
+        self.repo.update("1", {"email": "alicia@example.com"})
+        self._new_request()
+
+        # Assertions
+        self.assertEqual(self.repo.get("1").email, "alicia@example.com")
+        self.assertIsNone(self.repo.get_by_attribute("email", "alice@example.com"))
+
+    def test_cascade_delete_invalidates(self):
+        """Test objects deleted by a cascade from another repository are dropped"""
+        places = CachingRepository(SQLAlchemyRepository(Place))
+        places.add(Place(id="p1", title="Cabin", description="Small", price=10.0,
+                         latitude=1.0, longitude=1.0, owner_id="1"))
+        self.assertIsNotNone(places.get("p1"))
+
+        self.repo.delete("1")
+        self._new_request()
+
+        # Assertions
+        self.assertIsNone(self.repo.get("1"))
+        self.assertIsNone(places.get("p1"))
+
+
+    def test_bulk_writes_invalidate(self):
+        """Test bulk writes, and the objects they delete by cascade, are visible to the next lookups"""
+        places = CachingRepository(SQLAlchemyRepository(Place))
+        places.bulk_add([Place(id="p1", title="Cabin", description="Small", price=10.0,
+                               latitude=1.0, longitude=1.0, owner_id="1")])
+        self.assertIsNotNone(places.get("p1"))
+        self.repo.get("1")
+        self.repo.bulk_update({"1": {"first_name": "Alicia"}})
+        self._new_request()
+        self.assertEqual(self.repo.get("1").first_name, "Alicia")
+
+        self.repo.bulk_delete(["1"])
+        self._new_request()
+
+        # Assertions
+        self.assertIsNone(self.repo.get("1"))
+        self.assertIsNone(places.get("p1"))
+
+
+# Runs sys.argv[3] with a facade of another app on the same database and cache files
+OTHER_WORKER = """
+import sys
+import uuid
+from app import create_app
+from config import TestingConfig
+
+class WorkerConfig(TestingConfig):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + sys.argv[1]
+    RESPONSE_CACHE = {'path': sys.argv[2], 'ttl': 300}
+
+app = create_app(WorkerConfig)
+with app.app_context():
+    facade = app.extensions['FACADE']
+    exec(sys.argv[3])
+"""
+
+
+class TestCachingRepositoryAcrossWorkers(unittest.TestCase):
+    def setUp(self):
+        """Set up an app on a database file with a response cache, another worker runs in a subprocess"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.directory.name, 'hbnb.db')
+        self.responses = os.path.join(self.directory.name, 'responses.sqlite3')
+        database, responses = self.database, self.responses
+
+        class WorkerConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{database}'
+            RESPONSE_CACHE = {'path': responses, 'ttl': 300}
+            REPOSITORY_CACHE = {'place': {'max_size': 16, 'ttl': 300, 'negative_ttl': 300, 'check_interval': 0}}
+
+        self.app = create_app(WorkerConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.facade = self.app.extensions['FACADE']
+        owner = self.facade.create_user({"first_name": "Owner", "last_name": "Test",
+                                         "email": "owner@example.com", "password": "password123"})
+        self.place_id = self.facade.create_place({
+            "title": "Cabin", "description": "A small cabin", "price": 80.0,
+            "latitude": 45.0, "longitude": 2.0, "owner_id": owner.id, "amenities": []
+        }).id
+        self.owner_id = owner.id
+
+    def tearDown(self):
+        """Tear down the database and the cache files"""
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        self.directory.cleanup()
+
+    def _other_worker(self, statement):
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+        subprocess.run([sys.executable, "-c", OTHER_WORKER, self.database, self.responses, statement],
+                       check=True, cwd=root, capture_output=True)
+        db.session.remove()
+        self.facade.clear_identity_map()
+
+    def _get_place(self, place_id):
+        self.facade.clear_identity_map()
+        return self.facade.get_place(place_id)
+
+    def test_delete_seen(self):
+        """Test a place deleted by another worker is no longer served from this worker's cache"""
+        self._get_place(self.place_id)
+        self.assertIsNotNone(self._get_place(self.place_id))
+        self.assertEqual(self.facade.place_repo.stats()['get']['hits'], 1)
+
+        self._other_worker(f"facade.delete_place({self.place_id!r})")
+
+        # Assertions
+        self.assertIsNone(self._get_place(self.place_id))
+
+    def test_create_seen(self):
+        """Test an id remembered as unknown is found once another worker created it"""
+        place_id = '6f1c8a52-3c1e-4d5f-9a57-0c2b9a8e4d11'
+        self.assertIsNone(self._get_place(place_id))
+
+        self._other_worker(f"uuid.uuid4 = lambda: uuid.UUID({place_id!r})\n"
+                           f"facade.create_place({{'title': 'Loft', 'description': 'A loft', 'price': 90.0, "
+                           f"'latitude': 45.0, 'longitude': 2.0, 'owner_id': {self.owner_id!r}, 'amenities': []}})")
+
+        # Assertions
+        self.assertEqual(self._get_place(place_id).title, 'Loft')
+
+    def test_write_requests_skip_cache(self):
+        """Test a write request checks the place against the database, before this worker checks the version"""
+        self.facade.place_repo.check_interval = 3600
+        self._get_place(self.place_id)
+
+        self._other_worker(f"facade.delete_place({self.place_id!r})")
+        with self.app.test_request_context('/api/v1/reviews/', method='POST'):
+            self.app.preprocess_request()
+            try:
+                during_write = self._get_place(self.place_id)
+            finally:
+                self.app.do_teardown_request()
+
+        # Assertions
+        self.assertIsNone(during_write)
+        # The fresh load replaced the stale entry
+        self.assertIsNone(self._get_place(self.place_id))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,11 @@
+import os
+import tempfile
+import threading
 import unittest
+from app.models.place import Place
 from app.models.user import User
-from app.persistence.repository import InMemoryRepository
+from app.persistence.repository import InMemoryRepository, encode_cursor_values
+from app.persistence.rwlock import ReadWriteLock
 
 
 class TestInMemoryRepository(unittest.TestCase):
@@ -29,6 +34,17 @@ class TestInMemoryRepository(unittest.TestCase):
         self.assertEqual(retrieved_user.first_name, "Alice") # type: ignore
         self.assertEqual(retrieved_user.email, "alice@example.com") # type: ignore
 
+    def test_get_many(self):
+        """Test fetching several objects at once and reporting the missing ids"""
+        self.repo.add(self.user1)
+        self.repo.add(self.user2)
+
+        found, missing = self.repo.get_many(["2", "3", "1"])
+
+        # Assertions
+        self.assertEqual(found, [self.user2, self.user1])
+        self.assertEqual(missing, ["3"])
+
     def test_get_all(self):
         """Test retrieving all objects"""
         self.repo.add(self.user1)
@@ -72,6 +88,17 @@ class TestInMemoryRepository(unittest.TestCase):
         # Assertions
         self.assertIsNone(deleted_user)
 
+    def test_bulk_writes(self):
+        """Test adding, updating and deleting objects in chunks"""
+        self.repo.bulk_add([self.user1, self.user2], chunk_size=1)
+        self.repo.bulk_update({"1": {"first_name": "Alicia"}, "404": {"first_name": "Nobody"}}, chunk_size=1)
+        deleted = self.repo.bulk_delete(["2", "404"])
+
+        # Assertions
+        self.assertEqual(self.repo.get("1").first_name, "Alicia")
+        self.assertIsNone(self.repo.get("2"))
+        self.assertEqual(deleted, {User: ["2"]})
+
     def test_get_by_attribute(self):
         """Test retrieving an object by an attribute"""
         self.repo.add(self.user1)  # Add user1 to the repository
@@ -87,6 +114,266 @@ class TestInMemoryRepository(unittest.TestCase):
         self.assertIsNotNone(retrieved_user)
         self.assertEqual(retrieved_user.first_name, "Bob") # type: ignore
 
+    def test_find(self):
+        """Test filters are applied as a predicate pipeline"""
+        self.repo.add(self.user1)
+        self.repo.add(self.user2)
+
+        users = self.repo.find([("last_name", "eq", "Smith")])
+
+        # Assertions
+        self.assertEqual(users, [self.user2])
+        self.assertEqual(len(self.repo.find([("id", "in", ["1", "2", "3"])])), 2)
+
+    def test_exists(self):
+        """Test checking for a matching object"""
+        self.repo.add(self.user1)
+
+        # Assertions
+        self.assertTrue(self.repo.exists(email="alice@example.com"))
+        self.assertFalse(self.repo.exists(email="alice@example.com", first_name="Bob"))
+
+    def test_get_version(self):
+        """Test the version reports the row count and the latest update"""
+        self.repo.add(self.user1)
+        self.repo.add(self.user2)
+
+        count, updated_at = self.repo.get_version([("last_name", "eq", "Smith")])
+
+        # Assertions
+        self.assertEqual(count, 1)
+        self.assertEqual(updated_at, self.user2.updated_at)
+        self.assertEqual(self.repo.get_version([("id", "eq", "3")]), (0, None))
+
+    def test_page(self):
+        """Test walking the objects page by page with cursors"""
+        self.repo.add(self.user1)
+        self.repo.add(self.user2)
+
+        first_page, cursor = self.repo.page_rows(["id"], 1)
+        second_page, last_cursor = self.repo.page_rows(["id"], 1, cursor)
+
+        # Assertions
+        self.assertEqual(first_page, [(self.user1.id,)])
+        self.assertEqual(second_page, [(self.user2.id,)])
+        self.assertIsNone(last_cursor)
+
+    def test_rows(self):
+        """Test reading columns as tuples, in order and page by page"""
+        self.repo.add(self.user1)
+        self.repo.add(self.user2)
+        order = (("first_name", True), ("id", True))
+
+        first_page, cursor = self.repo.page_rows(["id", "email"], 1, order=order)
+        second_page, last_cursor = self.repo.page_rows(["id", "email"], 1, cursor, order=order)
+
+        # Assertions
+        self.assertEqual(self.repo.get_all_rows(["first_name"], order=order), [("Bob",), ("Alice",)])
+        self.assertEqual(first_page, [("2", "bob@example.com")])
+        self.assertEqual(second_page, [("1", "alice@example.com")])
+        self.assertIsNone(last_cursor)
+
+    def test_page_descending(self):
+        """Test paging in a custom descending order"""
+        self.repo.add(self.user1)
+        self.repo.add(self.user2)
+        order = (("first_name", True), ("id", True))
+
+        first_page, cursor = self.repo.page_rows(["id"], 1, order=order)
+        second_page, _ = self.repo.page_rows(["id"], 1, cursor, order=order)
+
+        # Assertions
+        self.assertEqual(first_page, [(self.user2.id,)])
+        self.assertEqual(second_page, [(self.user1.id,)])
+
+    def test_page_cursor_of_wrong_types(self):
+        """Test a cursor holding a number where the sort column holds strings is rejected"""
+        self.repo.add(self.user1)
+        self.repo.add(self.user2)
+        order = (("first_name", True), ("id", True))
+        cursor = encode_cursor_values([7, "1"])
+
+        # Assertions
+        with self.assertRaises(ValueError):
+            self.repo.page_rows(["id"], 1, cursor, order=order)
+
+
+class TestInMemoryIndexes(unittest.TestCase):
+    def setUp(self):
+        """Set up an indexed repository of places and an unindexed copy"""
+        self.repo = InMemoryRepository(indexes=('owner_id',), sorted_indexes=('price',))
+        self.scan = InMemoryRepository()
+        for i in range(20):
+            place = Place(id=str(i), title=f"Place {i}", description="Test", price=float(i % 7 * 10),
+                          latitude=0.0, longitude=0.0, owner_id=f"owner{i % 3}")
+            self.repo.add(place)
+            self.scan.add(place)
+
+    def test_filters_match_scan(self):
+        """Test indexed filters return the same objects as the linear scan"""
+        for filters in ([("owner_id", "eq", "owner1")],
+                        [("owner_id", "in", ["owner0", "owner2"]), ("price", "gte", 30.0)],
+                        [("price", "gte", 20.0), ("price", "lte", 40.0)],
+                        [("price", "in_ranges", [(0.0, 10.0), (50.0, 60.0)])],
+                        [("price", "eq", 30.0)]):
+            with self.subTest(filters=filters):
+                # Assertions
+                self.assertEqual(sorted(place.id for place in self.repo.find(filters)),
+                                 sorted(place.id for place in self.scan.find(filters)))
+
+    def test_indexes_follow_writes(self):
+        """Test update and delete move the objects in the indexes"""
+        self.repo.update("1", {"owner_id": "owner9", "price": 500.0})
+        self.repo.delete("4")
+
+        # Assertions
+        self.assertEqual(self.repo.get_by_attribute("owner_id", "owner9").id, "1")
+        self.assertNotIn("1", [place.id for place in self.repo.find([("owner_id", "eq", "owner1")])])
+        self.assertNotIn("4", [place.id for place in self.repo.find([("owner_id", "eq", "owner1")])])
+        self.assertEqual([place.id for place in self.repo.find([("price", "gte", 100.0)])], ["1"])
+        self.assertTrue(self.repo.exists(owner_id="owner9", price=500.0))
+
+    def test_concurrent_reads_and_writes(self):
+        """Test readers never see an object outside the index entry they looked up"""
+        errors = []
+        done = threading.Event()
+
+        def write():
+            for i in range(300):
+                self.repo.update(str(i % 20), {"owner_id": f"owner{i % 5}"})
+            done.set()
+
+        def read():
+            while not done.is_set():
+                for place in self.repo.find([("owner_id", "eq", "owner2")]):
+                    if place.owner_id != "owner2":
+                        errors.append(place.id)
+
+        threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Assertions
+        self.assertEqual(errors, [])
+
+
+class TestDurableInMemoryRepository(unittest.TestCase):
+    def setUp(self):
+        """Set up a durable repository of users in a temporary directory"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+        self.repo = self._open()
+
+    def tearDown(self):
+        self.repo.close()
+        self.directory.cleanup()
+
+    def _open(self, **kwargs):
+        return InMemoryRepository(indexes=('email',), path=self.path, model=User, **kwargs)
+
+    def _reopen(self, **kwargs):
+        self.repo.close()
+        self.repo = self._open(**kwargs)
+        return self.repo
+
+    def _user(self, i):
+        return User(id=str(i), first_name=f"User{i}", last_name="Doe", email=f"user{i}@example.com",
+                    password="hash", is_admin=False)
+
+    def test_restart_replays_log(self):
+        """Test adds, updates and deletes survive a restart"""
+        for i in range(3):
+            self.repo.add(self._user(i))
+        self.repo.update("1", {"first_name": "Renamed"})
+        self.repo.delete("2")
+        updated_at = self.repo.get("1").updated_at
+
+        repo = self._reopen()
+
+        # Assertions
+        self.assertEqual(sorted(user.id for user in repo.get_all()), ["0", "1"])
+        self.assertEqual(repo.get("1").first_name, "Renamed")
+        self.assertEqual(repo.get("1").updated_at, updated_at)
+        self.assertEqual(repo.get_by_attribute("email", "user0@example.com").id, "0")
+
+    def test_checkpoint_keeps_only_the_tail(self):
+        """Test a checkpoint replaces the log and a restart replays only what followed it"""
+        for i in range(5):
+            self.repo.add(self._user(i))
+        self.assertEqual(self.repo.checkpoint(), 5)
+        self.repo.delete("0")
+
+        repo = self._reopen()
+
+        # Assertions
+        self.assertEqual(len(repo.get_all()), 4)
+        self.assertEqual(repo._log.pending, 1)
+        self.assertEqual(sorted(os.listdir(self.path)), ["snapshot-00000001.ndjson", "wal-00000001.ndjson"])
+
+    def test_automatic_checkpoint(self):
+        """Test a checkpoint is taken every checkpoint_every changes"""
+        repo = self._reopen(checkpoint_every=3)
+        for i in range(4):
+            repo.add(self._user(i))
+
+        # Assertions
+        self.assertEqual(repo._log.pending, 1)
+        self.assertEqual(len(self._reopen().get_all()), 4)
+
+    def test_torn_append(self):
+        """Test a record cut by a crash is dropped and the log stays usable"""
+        self.repo.add(self._user(0))
+        self.repo.close()
+        with open(os.path.join(self.path, "wal-00000000.ndjson"), "ab") as log:
+            log.write(b'{"put":{"id":"1","first')
+
+        repo = self._open()
+        repo.add(self._user(2))
+        self.repo = repo
+        repo = self._reopen()
+
+        # Assertions
+        self.assertEqual(sorted(user.id for user in repo.get_all()), ["0", "2"])
+
+    def test_torn_before_newline(self):
+        """Test a complete record missing its newline is dropped, so the next append starts its own line"""
+        self.repo.add(self._user(0))
+        self.repo.close()
+        with open(os.path.join(self.path, "wal-00000000.ndjson"), "ab") as log:
+            log.write(b'{"delete":"0"}')
+
+        repo = self._open()
+        repo.add(self._user(2))
+        self.repo = repo
+        repo = self._reopen()
+
+        # Assertions
+        self.assertEqual(sorted(user.id for user in repo.get_all()), ["0", "2"])
+
+
+class TestReadWriteLock(unittest.TestCase):
+    def test_readers_share_writer_waits(self):
+        """Test two readers hold the lock together and a writer waits for both"""
+        lock = ReadWriteLock()
+        order = []
+
+        def write():
+            with lock.write():
+                order.append("write")
+
+        with lock.read():
+            with lock.read():
+                writer = threading.Thread(target=write)
+                writer.start()
+                writer.join(0.05)
+                order.append("read")
+        writer.join(1)
+
+        # Assertions
+        self.assertEqual(order, ["read", "write"])
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
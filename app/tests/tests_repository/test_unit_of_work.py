@@ -0,0 +1,192 @@
+import os
+import tempfile
+import unittest
+import warnings
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError, SAWarning
+from app import create_app
+from app.extensions import db
+from app.models.amenity import Amenity
+from app.models.user import User
+from app.persistence.caching_repository import CachingRepository
+from app.persistence.repository import SQLAlchemyRepository
+from app.persistence.unit_of_work import UnitOfWork, in_unit_of_work
+from config import TestingConfig
+
+
+class TestUnitOfWork(unittest.TestCase):
+    def setUp(self):
+        """Set up a database file, so commits and rollbacks reach SQLite, and a caching user repository"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(self.directory.name, 'uow.db')}"
+        self.app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        db.init_app(self.app)
+
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.repo = CachingRepository(SQLAlchemyRepository(User))
+        self.amenities = SQLAlchemyRepository(Amenity)
+        self.commits = []
+        event.listen(db.engine, "commit", self._commit)
+
+    def tearDown(self):
+        """Tear down the database"""
+        event.remove(db.engine, "commit", self._commit)
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+        self.ctx.pop()
+        self.directory.cleanup()
+
+    def _commit(self, conn):
+        self.commits.append(conn)
+
+    def _user(self, user_id, email):
+        return User(id=user_id, first_name="User", last_name=user_id, email=email, password="password")
+
+    def _committed_ids(self):
+        """Ids of the users another connection sees"""
+        with db.engine.connect() as conn:
+            return sorted(row[0] for row in conn.exec_driver_sql("SELECT id FROM users"))
+
+    def test_one_commit(self):
+        """Test the writes made inside a unit of work are committed once, when it ends"""
+        with UnitOfWork():
+            self.repo.add(self._user("1", "one@example.com"))
+            self.repo.update("1", {"first_name": "Renamed"})
+            self.amenities.add(Amenity(id="a1", name="Wifi"))
+            self.assertTrue(in_unit_of_work())
+            self.assertEqual(self._committed_ids(), [])
+
+        # Assertions
+        self.assertFalse(in_unit_of_work())
+        self.assertEqual(len(self.commits), 1)
+        self.assertEqual(self._committed_ids(), ["1"])
+
+    def test_rollback(self):
+        """Test an exception rolls back every write of the unit of work"""
+        with self.assertRaises(RuntimeError):
+            with UnitOfWork():
+                self.repo.add(self._user("1", "one@example.com"))
+                self.amenities.add(Amenity(id="a1", name="Wifi"))
+                raise RuntimeError
+
+        # Assertions
+        self.assertEqual(self.commits, [])
+        self.assertIsNone(self.repo.get("1"))
+        self.assertIsNone(self.amenities.get("a1"))
+
+    def test_nested_failure_keeps_outer(self):
+        """Test a failed nested write only rolls back its savepoint"""
+        with UnitOfWork():
+            self.repo.add(self._user("1", "one@example.com"))
+            with self.assertRaises(IntegrityError):
+                self.repo.add(self._user("2", "one@example.com"))
+            with self.assertRaises(RuntimeError):
+                with UnitOfWork():
+                    self.repo.update("1", {"first_name": "Renamed"})
+                    raise RuntimeError
+            self.repo.add(self._user("3", "three@example.com"))
+
+        # Assertions
+        self.assertEqual(self._committed_ids(), ["1", "3"])
+        self.assertEqual(self.repo.get("1").first_name, "User")
+
+    def test_savepoint_first(self):
+        """Test a nested unit opened before any other statement is not committed by its release"""
+        with self.assertRaises(RuntimeError):
+            with UnitOfWork():
+                with UnitOfWork():
+                    db.session.add(self._user("1", "one@example.com"))
+                raise RuntimeError
+
+        # Assertions
+        self.assertEqual(self._committed_ids(), [])
+
+    def test_cache_forgets_rolled_back_rows(self):
+        """Test a row cached while its unit of work was open is dropped when it rolls back"""
+        self.repo.add(self._user("1", "one@example.com"))
+        with self.assertRaises(RuntimeError):
+            with UnitOfWork():
+                self.repo.update("1", {"first_name": "Uncommitted"})
+                self.assertEqual(self.repo.get("1").first_name, "Uncommitted")
+                raise RuntimeError
+        db.session.remove()
+
+        # Assertions
+        self.assertEqual(self.repo.get("1").first_name, "User")
+
+
+class TestRequestUnitOfWork(unittest.TestCase):
+    def setUp(self):
+        """Set up the app with a route making several facade writes"""
+        self.app = create_app(TestingConfig)
+        facade = self.app.extensions['FACADE']
+
+        @self.app.route('/uow/<int:status>', methods=['POST'])
+        def write(status):
+            facade.create_amenity({"name": "Wifi"})
+            facade.create_amenity({"name": "Pool"})
+            return {}, status
+
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.facade = facade
+        self.commits = []
+        event.listen(db.engine, "commit", self._commit)
+
+    def tearDown(self):
+        """Tear down the test database"""
+        event.remove(db.engine, "commit", self._commit)
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _commit(self, conn):
+        self.commits.append(conn)
+
+    def test_one_commit_per_request(self):
+        """Test a request commits its writes once"""
+        response = self.client.post('/uow/201')
+
+        # Assertions
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(self.commits), 1)
+        self.assertEqual(sorted(item['name'] for item in self.facade.get_amenity_catalog()), ["Pool", "Wifi"])
+
+    def test_error_response_rolls_back(self):
+        """Test a request answering an error leaves nothing written"""
+        response = self.client.post('/uow/400')
+
+        # Assertions
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.commits, [])
+        self.assertEqual(self.facade.get_amenity_catalog(), [])
+
+    def test_place_linked_to_amenities(self):
+        """Test a place created with amenities in a unit of work is linked to them, without an ORM warning"""
+        owner = self.facade.create_user({"first_name": "Owner", "last_name": "Test",
+                                         "email": "owner@example.com", "password": "password123"})
+        amenity = self.facade.create_amenity({"name": "Wifi"})
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", SAWarning)
+            with UnitOfWork():
+                place = self.facade.create_place({
+                    "title": "Cabin", "description": "A small cabin", "price": 80.0, "latitude": 45.0,
+                    "longitude": 2.0, "owner_id": owner.id, "amenities": [amenity.id]})
+        place_id, amenity_id = place.id, amenity.id
+        db.session.remove()
+
+        # Assertions
+        self.assertEqual([row[0] for row in self.facade.get_place_rows({'amenities': [amenity_id]})], [place_id])
+
+
+if __name__ == "__main__":
+    unittest.main()
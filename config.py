@@ -5,13 +5,55 @@ import os
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
     DEBUG = False
+    PAGE_DEFAULT_LIMIT = 50
+    PAGE_MAX_LIMIT = 500
+    # Read-through cache of get / get_by_attribute lookups, per entity (ttl in seconds).
+    # Unknown ids are remembered for negative_ttl seconds. With RESPONSE_CACHE or TIERED_CACHE,
+    # the writes of other workers are noticed within check_interval seconds, otherwise after ttl
+    REPOSITORY_CACHE = {
+        'user': {'max_size': 2048, 'ttl': 30, 'negative_ttl': 10, 'check_interval': 1.0},
+        'place': {'max_size': 4096, 'ttl': 30, 'negative_ttl': 10, 'check_interval': 1.0},
+        'review': {'max_size': 4096, 'ttl': 30, 'negative_ttl': 10, 'check_interval': 1.0},
+        'amenity': {'max_size': 256, 'ttl': 300, 'negative_ttl': 10, 'check_interval': 1.0}
+    }
+    # Serialized public GET responses shared by all workers, path defaults to the instance folder.
+    # Endpoints listed here are served stale after soft_ttl (or a write) while they are rebuilt
+    # in the background, and dropped after hard_ttl (seconds). Every purge_every writes a worker
+    # deletes the expired entries and evicts the ones closest to expiring past max_entries
+    RESPONSE_CACHE = {
+        'path': None,
+        'ttl': 300,
+        'max_entries': 10000,
+        'purge_every': 100,
+        'endpoints': {
+            'place_list': {'soft_ttl': 10, 'hard_ttl': 120}
+        }
+    }
+    # In-process Bloom filter of registered emails, lets availability checks skip the database
+    EMAIL_BLOOM_FILTER = {'capacity': 100000, 'error_rate': 0.01, 'rebuild_interval': 600}
+    # Amenity list mapped from a snapshot file shared by the workers, path defaults to the
+    # instance folder; the version in the database is checked every check_interval seconds
+    AMENITY_CATALOG = {'path': None, 'check_interval': 1.0}
+    # Facade getters and listings cached in a per-process LRU (l1) in front of a SQLite file shared
+    # by the workers (path defaults to the instance folder). Other workers' l1 entries may lag a
+    # write by up to l1_ttl seconds. The shared file is purged like RESPONSE_CACHE
+    TIERED_CACHE = {'path': None, 'l1_size': 2048, 'l1_ttl': 5, 'ttl': 300, 'max_entries': 10000, 'purge_every': 100}
 
 class DevelopmentConfig(Config):
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///development.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    RESPONSE_CACHE = None
+    AMENITY_CATALOG = None
+    TIERED_CACHE = None
+
 config = {
     'development': DevelopmentConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
\ No newline at end of file
@@ -0,0 +1,29 @@
+"""Add catalog_versions table
+
+Revision ID: 5c1d2e7f9a30
+Revises: c3f8a1e5d207
+Create Date: 2026-10-18 10:12:41.208114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1d2e7f9a30'
+down_revision = 'c3f8a1e5d207'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('catalog_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('stamp', sa.String(length=32), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('catalog_versions')
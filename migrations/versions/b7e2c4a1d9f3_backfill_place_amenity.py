@@ -0,0 +1,41 @@
+"""Backfill place_amenity from places.amenities
+
+Revision ID: b7e2c4a1d9f3
+Revises: 049552849be0
+Create Date: 2026-10-18 14:05:12.417326
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2c4a1d9f3'
+down_revision = '049552849be0'
+branch_labels = None
+depends_on = None
+
+places = sa.table('places', sa.column('id', sa.String), sa.column('amenities', sa.JSON))
+amenities = sa.table('amenities', sa.column('id', sa.String))
+place_amenity = sa.table('place_amenity', sa.column('place_id', sa.String), sa.column('amenity_id', sa.String))
+
+
+def upgrade():
+    # The amenity filter joins through place_amenity, places stored with only
+    # the JSON list of ids would never match it
+    conn = op.get_bind()
+    known = {amenity_id for (amenity_id,) in conn.execute(sa.select(amenities.c.id))}
+    linked = set(conn.execute(sa.select(place_amenity.c.place_id, place_amenity.c.amenity_id)).all())
+
+    rows = []
+    for place_id, amenity_ids in conn.execute(sa.select(places.c.id, places.c.amenities)):
+        for amenity_id in dict.fromkeys(amenity_ids or []):
+            if amenity_id in known and (place_id, amenity_id) not in linked:
+                rows.append({'place_id': place_id, 'amenity_id': amenity_id})
+    if rows:
+        op.bulk_insert(place_amenity, rows)
+
+
+def downgrade():
+    # The links are valid data for the previous revision too
+    pass
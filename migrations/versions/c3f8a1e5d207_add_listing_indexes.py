@@ -0,0 +1,55 @@
+"""Add the listing indexes and one review per user and place
+
+Revision ID: c3f8a1e5d207
+Revises: e4a9d3c6b812
+Create Date: 2026-10-18 14:52:03.661840
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f8a1e5d207'
+down_revision = 'e4a9d3c6b812'
+branch_labels = None
+depends_on = None
+
+reviews = sa.table('reviews', sa.column('user_id', sa.String), sa.column('place_id', sa.String))
+
+
+def upgrade():
+    # The unique index below refuses a user reviewing a place twice. Stop before touching the
+    # schema when stored reviews break that rule, the operator decides which ones to keep
+    conn = op.get_bind()
+    duplicates = conn.execute(
+        sa.select(reviews.c.user_id, reviews.c.place_id, sa.func.count())
+        .group_by(reviews.c.user_id, reviews.c.place_id)
+        .having(sa.func.count() > 1)
+        .order_by(reviews.c.user_id, reviews.c.place_id)).all()
+    if duplicates:
+        pairs = ', '.join(f'(user_id={user_id}, place_id={place_id}: {count} reviews)'
+                          for user_id, place_id, count in duplicates)
+        raise RuntimeError('Cannot create uq_reviews_user_id_place_id, users reviewed the same place '
+                           f'more than once: {pairs}. Delete the extra reviews, then upgrade again.')
+
+    # Place search filters
+    op.create_index('ix_places_price', 'places', ['price'], unique=False)
+    op.create_index('ix_place_amenity_amenity_id', 'place_amenity', ['amenity_id'], unique=False)
+    # Places of one owner
+    op.create_index('ix_places_owner_id_created_at', 'places', ['owner_id', 'created_at'], unique=False)
+    # Per-place review listings sorted by date or rating, and the reviews of one user
+    op.create_index('ix_reviews_place_id_created_at', 'reviews', ['place_id', 'created_at'], unique=False)
+    op.create_index('ix_reviews_place_id_rating', 'reviews', ['place_id', 'rating'], unique=False)
+    op.create_index('ix_reviews_user_id_created_at', 'reviews', ['user_id', 'created_at'], unique=False)
+    op.create_index('uq_reviews_user_id_place_id', 'reviews', ['user_id', 'place_id'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_reviews_user_id_place_id', table_name='reviews')
+    op.drop_index('ix_reviews_user_id_created_at', table_name='reviews')
+    op.drop_index('ix_reviews_place_id_rating', table_name='reviews')
+    op.drop_index('ix_reviews_place_id_created_at', table_name='reviews')
+    op.drop_index('ix_places_owner_id_created_at', table_name='places')
+    op.drop_index('ix_place_amenity_amenity_id', table_name='place_amenity')
+    op.drop_index('ix_places_price', table_name='places')
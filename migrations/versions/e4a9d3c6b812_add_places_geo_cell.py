@@ -0,0 +1,40 @@
+"""Add places.geo_cell spatial index
+
+Revision ID: e4a9d3c6b812
+Revises: b7e2c4a1d9f3
+Create Date: 2026-10-18 14:31:47.902155
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.services.geo import geo_cell
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a9d3c6b812'
+down_revision = 'b7e2c4a1d9f3'
+branch_labels = None
+depends_on = None
+
+places = sa.table('places', sa.column('id', sa.String), sa.column('latitude', sa.Float),
+                  sa.column('longitude', sa.Float), sa.column('geo_cell', sa.Integer))
+
+
+def upgrade():
+    op.add_column('places', sa.Column('geo_cell', sa.Integer(), nullable=True))
+    op.create_index('ix_places_geo_cell', 'places', ['geo_cell'], unique=False)
+
+    # Places without a cell never match the bounding box and radius searches
+    conn = op.get_bind()
+    rows = [{'place_id': place_id, 'cell': geo_cell(latitude, longitude)}
+            for place_id, latitude, longitude in conn.execute(sa.select(places.c.id, places.c.latitude,
+                                                                        places.c.longitude))]
+    if rows:
+        conn.execute(places.update().where(places.c.id == sa.bindparam('place_id'))
+                     .values(geo_cell=sa.bindparam('cell')), rows)
+
+
+def downgrade():
+    op.drop_index('ix_places_geo_cell', table_name='places')
+    with op.batch_alter_table('places', schema=None) as batch_op:
+        batch_op.drop_column('geo_cell')